@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for the commit message hook.
+
+Every commit starts a fresh interpreter, so module import cost is paid on
+each run. This script measures it with ``python -X importtime`` in clean
+subprocesses and reports the slowest modules, whether a provider SDK was
+loaded, and the cost of loading each provider on demand.
+
+Usage:
+    python commit/benchmarks/import_time.py
+    python commit/benchmarks/import_time.py --runs 10 --max-ms 150
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_COMMIT_DIR = Path(__file__).resolve().parent.parent
+
+# Top-level packages that must never be imported just to start the hook
+_HEAVY_MODULES = ("openai", "anthropic", "httpx", "pydantic")
+
+# Provider name -> (provider module, SDK it loads on first request)
+_PROVIDER_MODULES = {
+    "anthropic": ("providers.anthropic_provider", "anthropic"),
+    "openai": ("providers.openai_provider", "openai"),
+    "openai-compatible": ("providers.openai_compatible", "openai"),
+}
+
+
+def _import_times(statement: str) -> Dict[str, Tuple[int, int]]:
+    """Run statement with -X importtime and return {module: (self_us, cumulative_us)}."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=_COMMIT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def _measure(modules: List[str], runs: int) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Import modules in order and return the median total ms and the last run's details."""
+    statement = "; ".join(f"import {module}" for module in modules)
+    totals: List[float] = []
+    times: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        times = _import_times(statement)
+        totals.append(sum(times.get(m, (0, 0))[1] for m in modules) / 1000)
+    return statistics.median(totals), times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Exit 1 if importing commit_analyzer takes longer than this",
+    )
+    args = parser.parse_args()
+
+    startup_ms, times = _measure(["commit_analyzer"], args.runs)
+    print(f"import commit_analyzer: {startup_ms:.1f} ms (median of {args.runs})")
+
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)
+    print("\nSlowest modules (self time):")
+    for name, (self_us, cumulative_us) in slowest[: args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {cumulative_us / 1000:7.1f} ms cumulative  {name}")
+
+    heavy = sorted({name.split(".")[0] for name in times} & set(_HEAVY_MODULES))
+    if heavy:
+        print(f"\nWARNING: hook startup imports {', '.join(heavy)}")
+    else:
+        print("\nNo provider SDK imported at startup")
+
+    print("\nOn-demand provider load (module + SDK, paid only when a request is made):")
+    for name, (module, sdk) in sorted(_PROVIDER_MODULES.items()):
+        try:
+            load_ms, _ = _measure([module, sdk], args.runs)
+        except subprocess.CalledProcessError:
+            print(f"  {name:18} SDK not installed")
+            continue
+        print(f"  {name:18} {load_ms:7.1f} ms")
+
+    if heavy or (args.max_ms is not None and startup_ms > args.max_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
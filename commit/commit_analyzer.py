@@ -10,77 +10,113 @@ Installation in another repo:
 4. Make a commit!
 """
 
+import argparse
+import atexit
+import io
+import os
 import subprocess
 import sys
 import codecs
+import json
+import re
+import threading
+import time
 
-from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Add this directory to path to import the providers module
 sys.path.insert(0, str(Path(__file__).parent))
-from providers import get_provider
+import daemon
+import metrics
+from context_index import ContextIndex
+from conventions import best_message, clean_message, score_message
+from diff_compression import compress_diff
+from diff_parser import (
+    CHARS_PER_TOKEN,
+    FileDiff,
+    estimate_tokens,
+    normalize_repo_path,
+    parse_diff,
+    render_diff,
+)
+from providers import get_provider, route_models
+from providers.base import is_retryable, set_usage_callback
+from response_cache import ResponseCache
+from rules import REPOSITORY_CONTEXT_PATH, classify, fallback_message
 
 
 # =============================================================================
 # GIT COMMAND SECURITY
 # =============================================================================
 
-_ALLOWED_GIT_SUBCOMMANDS = frozenset(["diff"])
+_ALLOWED_GIT_SUBCOMMANDS = frozenset(["diff", "write-tree", "rev-list"])
 _GIT_ARG_CACHED = "--cached"
 _GIT_ARG_NAME_ONLY = "--name-only"
 _GIT_ARG_HEAD_PREVIOUS = "HEAD~1"
+_GIT_ARG_REVERSE = "--reverse"
+_GIT_ARG_NO_MERGES = "--no-merges"
+_GIT_ARG_PARENTS = "--parents"
 _ALLOWED_GIT_ARGS = frozenset(
-    [_GIT_ARG_CACHED, _GIT_ARG_NAME_ONLY, _GIT_ARG_HEAD_PREVIOUS]
+    [
+        _GIT_ARG_CACHED,
+        _GIT_ARG_NAME_ONLY,
+        _GIT_ARG_HEAD_PREVIOUS,
+        _GIT_ARG_REVERSE,
+        _GIT_ARG_NO_MERGES,
+        _GIT_ARG_PARENTS,
+    ]
 )
 
-_REPOSITORY_CONTEXT_PATH = "DOCS/repository_context.txt"
-
+# Batch mode: full commit ids for diff, and one revision or range for
+# rev-list ("main..HEAD", "HEAD~3..", "<sha>^!", "HEAD"). Neither may start
+# with "-", so no argument can be read as an option.
+_COMMIT_ID_ARG = re.compile(r"^[0-9a-f]{40}(?:[0-9a-f]{24})?$")
+_REVISION_ARG = re.compile(r"^[\w/@~^{}][\w./@~^{}!-]*$")
 
-def _normalize_repo_path(path: str) -> str:
-    """Normalize paths to forward-slashed, workspace-relative form."""
-    return path.replace("\\", "/").lstrip("./")
+# Root commits have no parent and are diffed against the empty tree
+# (SHA-1 and SHA-256 object formats)
+_EMPTY_TREES = {
+    40: "4b825dc642cb6eb9a060e54bf8d69288fbee4904",
+    64: "6ef19b41225c5369f1c104d45d8d85efa9b057b53b14b4b9b939dd74decc5321",
+}
 
+_REPOSITORY_CONTEXT_PATH = REPOSITORY_CONTEXT_PATH
 
-def _filter_diff_excluding_paths(diff: str, excluded_paths: List[str]) -> str:
-    """Remove full per-file diff blocks for excluded paths."""
-    if not diff or not excluded_paths:
-        return diff
+# Per-repository state (caches etc.) lives inside the git directory
+_STATE_DIR = Path(".git") / "commit-analyzer"
 
-    excluded = {_normalize_repo_path(p) for p in excluded_paths}
-    kept: List[str] = []
-    skipping = False
+# Message generated ahead of time by --watch for the staged tree
+_PREGENERATED_PATH = _STATE_DIR / "pregenerated.json"
+_INDEX_PATH = Path(".git") / "index"
 
-    for line in diff.splitlines(True):
-        if line.startswith("diff --git "):
-            parts = line.strip().split()
-            a_path = ""
-            b_path = ""
-            if len(parts) >= 4:
-                a_token = parts[2]
-                b_token = parts[3]
-                if a_token.startswith("a/"):
-                    a_path = a_token[2:]
-                if b_token.startswith("b/"):
-                    b_path = b_token[2:]
+# Bump whenever the prompt changes so cached responses are not reused
+PROMPT_VERSION = "3"
 
-            file_path = b_path or a_path
-            skipping = _normalize_repo_path(file_path) in excluded
+# Provider SDKs, imported lazily by the providers
+_SDK_MODULES = ("anthropic", "openai")
 
-            if skipping:
-                continue
 
-        if skipping:
-            continue
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back on bad values."""
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
 
-        kept.append(line)
 
-    return "".join(kept)
+def _env_flag(name: str, default: bool = True) -> bool:
+    """Read a boolean setting from the environment."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
 
 
-def _run_git_command(args: List[str]) -> str:
-    """Safely execute a git command with strict whitelist validation."""
+def _validate_git_args(args: List[str]) -> None:
+    """Reject any git invocation outside the strict whitelist."""
     if not args:
         raise ValueError("Git command arguments cannot be empty")
 
@@ -89,8 +125,18 @@ def _run_git_command(args: List[str]) -> str:
         raise ValueError(f"Git subcommand '{subcommand}' not allowed")
 
     for arg in args[1:]:
-        if arg not in _ALLOWED_GIT_ARGS:
-            raise ValueError(f"Git argument '{arg}' not allowed")
+        if arg in _ALLOWED_GIT_ARGS:
+            continue
+        if subcommand == "diff" and _COMMIT_ID_ARG.match(arg):
+            continue
+        if subcommand == "rev-list" and _REVISION_ARG.match(arg):
+            continue
+        raise ValueError(f"Git argument '{arg}' not allowed")
+
+
+def _run_git_command(args: List[str]) -> str:
+    """Safely execute a git command with strict whitelist validation."""
+    _validate_git_args(args)
 
     full_command = ["git"] + list(args)
     result = subprocess.check_output(
@@ -101,71 +147,215 @@ def _run_git_command(args: List[str]) -> str:
     return result.decode("utf-8")
 
 
+def _stream_git_command(args: List[str]) -> Iterator[str]:
+    """Safely execute a git command and yield its output line by line.
+
+    Output is decoded incrementally, so it is never held in memory as a
+    whole. Closing the generator early terminates git.
+    """
+    _validate_git_args(args)
+
+    process = subprocess.Popen(
+        ["git"] + list(args),
+        shell=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    finished = False
+    try:
+        yield from io.TextIOWrapper(
+            process.stdout, encoding="utf-8", errors="replace", newline=""
+        )
+        finished = True
+    finally:
+        if not finished:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, ["git"] + list(args))
+
+
 # =============================================================================
 # DIFF ANALYSIS
 # =============================================================================
 
 
-def _is_lock_file(filename: str) -> bool:
-    """Check if a filename is a dependency lock file."""
-    lock_file_patterns = (
-        ".lock",
-        "lock.json",
-        "package-lock.json",
-        "yarn.lock",
-        "pnpm-lock.yaml",
-    )
-    return any(filename.endswith(pattern) for pattern in lock_file_patterns)
+def _rule_message(records: List[FileDiff]) -> Optional[str]:
+    """Return a rule-based message for changes that need no LLM call, if any.
+
+    COMMIT_RULES selects the rules to run (comma-separated names, "all" or
+    "none"); by default all of them run.
+    """
+    setting = os.getenv("COMMIT_RULES", "all").strip().lower()
+    if setting in ("", "all"):
+        return classify(records)
+    if setting in ("0", "none", "off"):
+        return None
+    return classify(records, [name.strip() for name in setting.split(",")])
 
 
-def get_staged_diff() -> Tuple[Optional[str], bool, List[str]]:
-    """Get the diff of staged changes and list of changed files.
+def _read_diff(source_args: List[str]) -> List[FileDiff]:
+    """Stream one git diff for a source and parse it into per-file records.
+
+    The repository context dump is counted but not kept, each file keeps at
+    most COMMIT_DIFF_MAX_FILE_TOKENS of diff text, and reading stops once
+    COMMIT_DIFF_MAX_TOKENS have been kept. Files beyond that point are
+    listed by name only, so lock-file detection still sees every path.
+    """
+    budget = _env_int("COMMIT_DIFF_MAX_TOKENS", 100000) * CHARS_PER_TOKEN
+    max_file_chars = _env_int("COMMIT_DIFF_MAX_FILE_TOKENS", 12000) * CHARS_PER_TOKEN
+
+    lines = _stream_git_command(["diff"] + source_args)
+    records: List[FileDiff] = []
+    kept = 0
+    try:
+        for record in parse_diff(
+            lines, excluded={_REPOSITORY_CONTEXT_PATH}, max_file_chars=max_file_chars
+        ):
+            records.append(record)
+            kept += record.stored_chars()
+            if kept >= budget:
+                break
+        else:
+            return records
+    finally:
+        lines.close()
+
+    print(f"Diff exceeds ~{budget // CHARS_PER_TOKEN} tokens; later files are listed by name only")
+    seen = {r.path for r in records}
+    for path in _run_git_command(["diff"] + source_args + [_GIT_ARG_NAME_ONLY]).splitlines():
+        path = normalize_repo_path(path)
+        if path not in seen:
+            records.append(FileDiff(path))
+    return records
+
+
+def get_staged_diff() -> Optional[List[FileDiff]]:
+    """Get the staged changes as per-file diff records.
+
+    Falls back to the changes of the previous commit when nothing is
+    staged. Each source costs a single git invocation.
 
     Returns
     -------
-        Tuple of (diff_content, has_lock_files, changed_files)
+        The parsed file diffs, or None if git failed.
     """
     try:
-        files_output = _run_git_command(["diff", _GIT_ARG_CACHED, _GIT_ARG_NAME_ONLY])
-        staged_files = files_output.splitlines()
-        staged_files_normalized = [_normalize_repo_path(f) for f in staged_files]
+        records = _read_diff([_GIT_ARG_CACHED])
+        if not records:
+            records = _read_diff([_GIT_ARG_HEAD_PREVIOUS])
+        return records
 
-        if any(_is_lock_file(f) for f in staged_files):
-            return None, True, staged_files
+    except subprocess.CalledProcessError as e:
+        print(f"Error getting git diff: {e}")
+        return None
+    except ValueError as e:
+        print(f"Internal error - invalid git command: {e}")
+        return None
 
-        if staged_files_normalized == [_REPOSITORY_CONTEXT_PATH]:
-            return "", False, staged_files
 
-        diff = _run_git_command(["diff", _GIT_ARG_CACHED])
+def _prompt_diff(records: List[FileDiff]) -> str:
+    """Render the diff sent to the model, leaving out the repository context dump.
 
-        if _REPOSITORY_CONTEXT_PATH in staged_files_normalized:
-            diff = _filter_diff_excluding_paths(diff, [_REPOSITORY_CONTEXT_PATH])
+    Unless COMMIT_COMPRESS is disabled, low-signal content is trimmed or
+    summarized first and the estimated token saving is reported.
+    """
+    records = [r for r in records if r.path != _REPOSITORY_CONTEXT_PATH]
+    if not _env_flag("COMMIT_COMPRESS"):
+        return render_diff(records)
+
+    diff, before, after = compress_diff(
+        records,
+        context_lines=_env_int("COMMIT_CONTEXT_LINES", 1),
+        max_file_tokens=_env_int("COMMIT_COMPRESS_FILE_TOKENS", 8000),
+    )
+    if before > after:
+        print(
+            f"Compressed diff: ~{before} -> ~{after} tokens "
+            f"(saved ~{before - after}, {(before - after) / before:.0%})"
+        )
+    return diff
 
-        if not diff:
-            diff = _run_git_command(["diff", _GIT_ARG_HEAD_PREVIOUS])
-            files_output = _run_git_command(
-                ["diff", _GIT_ARG_HEAD_PREVIOUS, _GIT_ARG_NAME_ONLY]
-            )
-            staged_files = files_output.splitlines()
-            staged_files_normalized = [_normalize_repo_path(f) for f in staged_files]
 
-            if any(_is_lock_file(f) for f in staged_files):
-                return None, True, staged_files
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
 
-            if staged_files_normalized == [_REPOSITORY_CONTEXT_PATH]:
-                return "", False, staged_files
 
-            if _REPOSITORY_CONTEXT_PATH in staged_files_normalized:
-                diff = _filter_diff_excluding_paths(diff, [_REPOSITORY_CONTEXT_PATH])
+def _open_response_cache() -> ResponseCache:
+    """Create the response cache using limits from the environment."""
+    return ResponseCache(
+        _STATE_DIR / "cache",
+        max_entries=_env_int("COMMIT_CACHE_MAX_ENTRIES", 200),
+        max_bytes=_env_int("COMMIT_CACHE_MAX_KB", 5120) * 1024,
+        max_age_seconds=_env_int("COMMIT_CACHE_MAX_AGE_DAYS", 30) * 24 * 3600,
+    )
 
-        return diff, False, staged_files
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error getting git diff: {e}")
-        return None, False, []
-    except ValueError as e:
-        print(f"Internal error - invalid git command: {e}")
-        return None, False, []
+# =============================================================================
+# LARGE DIFF SUMMARIZATION (MAP-REDUCE)
+# =============================================================================
+
+_SUMMARY_INSTRUCTIONS = """Summarize this part of a git diff for someone who will write the commit \
+message. For each file give one or two short bullet points describing what changed and, \
+where it is apparent, why. Do not write a commit message. Output only the bullet points."""
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, noting how many lines were dropped."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    omitted = text.count("\n", limit)
+    return f"{text[:limit]}\n[... {omitted} more lines truncated]\n"
+
+
+def _group_diff_blocks(records: List[FileDiff], max_tokens: int) -> List[str]:
+    """Pack per-file diffs, in order, into groups of at most max_tokens."""
+    groups: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for record in records:
+        block = _truncate_to_tokens(record.render(), max_tokens)
+        tokens = estimate_tokens(block)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append("".join(current))
+            current = []
+            current_tokens = 0
+        current.append(block)
+        current_tokens += tokens
+
+    if current:
+        groups.append("".join(current))
+    return groups
+
+
+def _summarize_diff(provider, model: str, diff: str, deadline: Optional[float] = None) -> str:
+    """Summarize file groups of an oversized diff concurrently (map step).
+
+    The returned summaries replace the raw diff in the final prompt, which
+    acts as the reduce step.
+    """
+    groups = _group_diff_blocks(
+        list(parse_diff(diff.splitlines(True))), _env_int("COMMIT_MAP_CHUNK_TOKENS", 8000)
+    )
+    workers = max(1, min(_env_int("COMMIT_MAP_WORKERS", 4), len(groups)))
+    print(
+        f"Large diff (~{estimate_tokens(diff)} tokens): "
+        f"summarizing {len(groups)} file groups with {workers} workers"
+    )
+
+    def summarize(group: str) -> str:
+        return provider.chat_completion(
+            f"Git diff:\n{group}", model, _SUMMARY_INSTRUCTIONS, deadline
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        summaries = list(executor.map(summarize, groups))
+    return "\n\n".join(summaries)
 
 
 # =============================================================================
@@ -173,13 +363,27 @@ def get_staged_diff() -> Tuple[Optional[str], bool, List[str]]:
 # =============================================================================
 
 
-def generate_commit_message(diff: str) -> Optional[str]:
-    """Generate commit message using the configured LLM provider."""
-    try:
-        load_dotenv()
-        provider = get_provider()
+def _relevant_context(diff: str) -> str:
+    """Return the repository context sections most relevant to a diff.
 
-        prompt = f"""You are a git commit message generator. Analyze the git diff and output ONLY \
+    Sections of the Repomix dump are ranked by a persisted BM25 index, so
+    only a few files' worth of context is sent instead of the whole dump.
+    """
+    max_tokens = _env_int("COMMIT_CONTEXT_TOKENS", 1500)
+    if max_tokens <= 0:
+        return ""
+
+    index = ContextIndex(
+        Path(_REPOSITORY_CONTEXT_PATH), _STATE_DIR / "context-index.json"
+    )
+    if not index.load():
+        return ""
+
+    paths = [record.path for record in parse_diff(diff.splitlines(True))]
+    return index.relevant_context(paths, diff, max_tokens * CHARS_PER_TOKEN)
+
+
+_COMMIT_INSTRUCTIONS = """You are a git commit message generator. Analyze the git diff and output ONLY \
 the commit message itself - no explanations, no prefixes like "Based on the diff...", \
 just the commit message exactly as it should appear in git.
 
@@ -237,20 +441,193 @@ just the commit message exactly as it should appear in git.
            - Explain what and why vs. how
            - Use proper punctuation
 
-        Git diff to analyze:
-        {diff}
+Output ONLY the commit message exactly as it should appear in git, with no additional text."""
+
+
+def _build_commit_prompt(
+    changes: str, changes_label: str = "Git diff to analyze", context: str = ""
+) -> str:
+    """Build the per-commit part of the prompt around a diff or a summary of one.
+
+    The static rules live in _COMMIT_INSTRUCTIONS and are sent as the
+    system prompt, so every request shares a cacheable prefix.
+    """
+    context_block = (
+        "Relevant repository context (for reference only, do not describe it):\n"
+        f"{context}\n\n"
+        if context
+        else ""
+    )
+    return f"{context_block}{changes_label}:\n{changes}"
+
+
+def _stream_message(
+    provider,
+    prompt: str,
+    model: str,
+    on_token: Callable[[str], None],
+    deadline: Optional[float] = None,
+) -> str:
+    """Stream a completion, forwarding each chunk to on_token as it arrives."""
+    parts: List[str] = []
+    for chunk in provider.stream_completion(prompt, model, _COMMIT_INSTRUCTIONS, deadline):
+        if not parts:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+        parts.append(chunk)
+        on_token(chunk)
+    return "".join(parts).strip()
+
+
+def _generation_settings() -> Dict[str, str]:
+    """Return the settings besides the prompt that shape the generated message.
+
+    Together with the provider's models they decide which models
+    route_models picks for a diff, so they key cached and pre-generated
+    messages.
+    """
+    return {
+        "candidates": str(_env_int("COMMIT_CANDIDATES", 1)),
+        "model_cascade": str(_env_flag("MODEL_CASCADE", False)),
+        "cascade_max_tokens": str(_env_int("CASCADE_MAX_TOKENS", 2000)),
+        "cascade_max_files": str(_env_int("CASCADE_MAX_FILES", 5)),
+        "cascade_min_score": str(_env_int("CASCADE_MIN_SCORE", 80)),
+        "map_reduce_tokens": str(_env_int("COMMIT_MAP_REDUCE_TOKENS", 16000)),
+    }
+
+
+def _settings_key(provider) -> str:
+    """Return a digest of everything besides the diff that shapes the message."""
+    return ResponseCache.make_key(
+        "",
+        _COMMIT_INSTRUCTIONS,
+        provider.name,
+        provider.model_signature(),
+        PROMPT_VERSION,
+        _generation_settings(),
+    )
+
 
-        Output ONLY the commit message exactly as it should appear in git, with no additional text."""
+def _complete(
+    provider,
+    prompt: str,
+    model: str,
+    on_token: Optional[Callable[[str], None]],
+    deadline: Optional[float],
+) -> str:
+    """Request the commit message from one model and clean it up."""
+    count = _env_int("COMMIT_CANDIDATES", 1)
+    if count > 1:
+        candidates = provider.generate_candidates(
+            prompt, count, model, _COMMIT_INSTRUCTIONS, deadline
+        )
+        message, score = best_message(candidates)
+        print(f"Picked the best of {len(candidates)} candidates (score {score}/100)")
+        return message
+    if on_token:
+        return clean_message(_stream_message(provider, prompt, model, on_token, deadline))
+    return clean_message(provider.chat_completion(prompt, model, _COMMIT_INSTRUCTIONS, deadline))
+
+
+def generate_commit_message(
+    diff: str,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    provider=None,
+    deadline: Optional[float] = None,
+) -> Optional[str]:
+    """Generate commit message using the configured LLM provider.
+
+    Identical requests (same prompt, provider, model and settings) are
+    answered from the on-disk response cache unless use_cache is False or
+    COMMIT_CACHE is disabled. When on_token is given the response is
+    streamed and each text chunk is passed to it as soon as it arrives.
+    With COMMIT_CANDIDATES above 1, that many candidates are requested at
+    once (without streaming) and the one that best follows the commit
+    conventions is returned.
+    With MODEL_CASCADE enabled, small diffs go to the provider's fast model
+    first and are escalated to the default model if the draft fails the
+    local convention checks.
+    A long-lived caller such as the daemon passes its own warm provider.
+    deadline is a time.monotonic() value that bounds all provider requests,
+    including retries.
+    Each step is timed as a stage of the current metrics run.
+    """
+    try:
+        load_dotenv()
+        with metrics.stage("provider_init"):
+            provider = provider or get_provider(state_dir=_STATE_DIR)
+            model = provider.get_default_model()
+        metrics.annotate(provider=provider.name, model=model)
+
+        with metrics.stage("prompt"):
+            context = _relevant_context(diff)
+            prompt = _build_commit_prompt(diff, context=context)
+        file_count = diff.count("diff --git ")
+        models = route_models(provider, estimate_tokens(diff), file_count)
+
+        cache = None
+        cache_key = ""
+        if use_cache and _env_flag("COMMIT_CACHE"):
+            with metrics.stage("cache"):
+                cache = _open_response_cache()
+                cache_key = ResponseCache.make_key(
+                    prompt,
+                    _COMMIT_INSTRUCTIONS,
+                    provider.name,
+                    # Not the model: under a chain it follows backend health
+                    provider.model_signature(),
+                    PROMPT_VERSION,
+                    _generation_settings(),
+                )
+                cached = cache.get(cache_key)
+            metrics.annotate(cache="hit" if cached else "miss")
+            if cached:
+                print(f"Response cache hit ({cache_key[:12]})")
+                return cached
+            print(f"Response cache miss ({cache_key[:12]})")
+
+        if estimate_tokens(diff) > _env_int("COMMIT_MAP_REDUCE_TOKENS", 16000):
+            with metrics.stage("map_summaries"):
+                summaries = _summarize_diff(provider, model, diff, deadline)
+            prompt = _build_commit_prompt(
+                summaries,
+                "Summaries of the staged changes (the full diff is too large to include)",
+                context,
+            )
 
-        message = provider.chat_completion(prompt)
+        # Providers import their SDK on the first request; flag runs whose
+        # completion time includes that import
+        sdk_loaded = any(name in sys.modules for name in _SDK_MODULES)
+
+        for index, model_to_use in enumerate(models):
+            if index + 1 == len(models):
+                with metrics.stage("completion"):
+                    message = _complete(provider, prompt, model_to_use, on_token, deadline)
+                break
+
+            # Not streamed: the draft may be discarded
+            with metrics.stage("completion"):
+                message = _complete(provider, prompt, model_to_use, None, deadline)
+            score = score_message(message)
+            if score >= _env_int("CASCADE_MIN_SCORE", 80):
+                print(f"Used fast model {model_to_use} (score {score}/100)")
+                break
+            print(
+                f"Fast model {model_to_use} scored {score}/100, "
+                f"escalating to {models[index + 1]}"
+            )
+        metrics.annotate(model=model_to_use, sdk_imported=not sdk_loaded)
 
-        if "Based on the diff" in message:
-            message = message.split("\n")[-1].strip()
+        if cache and message:
+            cache.put(cache_key, message, provider.name, model)
         return message
 
     except Exception as e:
         error_msg = str(e)
         print(f"Error generating commit message: {error_msg}")
+        metrics.annotate(error=type(e).__name__, retryable=is_retryable(e))
 
         if "500" in error_msg:
             print("\nServer error. Check MODEL_NAME if set.")
@@ -262,38 +639,501 @@ just the commit message exactly as it should appear in git.
         return None
 
 
+# =============================================================================
+# SPECULATIVE PRE-GENERATION
+# =============================================================================
+
+
+def _staged_tree_hash() -> Optional[str]:
+    """Return the tree hash of the index, or None if it cannot be written.
+
+    ``git write-tree`` fails while merge conflicts are unresolved.
+    """
+    try:
+        return _run_git_command(["write-tree"]).strip() or None
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def _load_pregenerated() -> Optional[str]:
+    """Return the pre-generated message if it was made for the staged tree.
+
+    The message must also come from the provider, models, prompt version
+    and settings in effect now, as for a response cache hit.
+    """
+    try:
+        with open(_PREGENERATED_PATH, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    tree = entry.get("tree")
+    if not tree or tree != _staged_tree_hash():
+        return None
+    try:
+        settings = _settings_key(get_provider(state_dir=_STATE_DIR))
+    except Exception:
+        # A provider that cannot be configured is reported by the normal path
+        return None
+    if entry.get("settings") != settings:
+        return None
+    return entry.get("message")
+
+
+def _save_pregenerated(tree: str, settings: str, message: str) -> None:
+    try:
+        _STATE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = _PREGENERATED_PATH.with_name(f"{_PREGENERATED_PATH.name}.{os.getpid()}.tmp")
+        entry = {"tree": tree, "settings": settings, "message": message, "created": time.time()}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, _PREGENERATED_PATH)
+    except OSError as e:
+        print(f"Could not store pre-generated message: {e}")
+
+
+def _pregenerate(use_cache: bool) -> Optional[str]:
+    """Generate and store a message for the staged tree, returning the tree hash."""
+    tree = _staged_tree_hash()
+    if not tree:
+        return None
+
+    try:
+        records = _read_diff([_GIT_ARG_CACHED])
+    except (subprocess.CalledProcessError, ValueError) as e:
+        print(f"Error getting git diff: {e}")
+        return tree
+
+    # Nothing staged, or a message the hook produces instantly anyway
+    if _rule_message(records) or not (diff := _prompt_diff(records)):
+        return tree
+
+    metrics.reset()
+    metrics.annotate(mode="watch")
+    try:
+        provider = get_provider(state_dir=_STATE_DIR)
+    except Exception as e:
+        print(f"Error configuring provider: {e}")
+        return tree
+    settings = _settings_key(provider)
+    message = generate_commit_message(diff, use_cache=use_cache, provider=provider)
+    metrics.annotate(source="provider" if message else "failed")
+    metrics.write_log()
+    if message and _staged_tree_hash() == tree:
+        _save_pregenerated(tree, settings, message)
+        print(f"Pre-generated commit message for tree {tree[:12]}")
+    return tree
+
+
+def watch(use_cache: bool = True) -> None:
+    """Pre-generate the commit message whenever staging settles.
+
+    The index is polled for changes. Once it has been unchanged for
+    COMMIT_WATCH_SETTLE_SECONDS, a message is generated for the staged tree
+    and stored, so the prepare-commit-msg hook can use it without waiting.
+    """
+    settle = _env_int("COMMIT_WATCH_SETTLE_SECONDS", 2)
+    poll = _env_int("COMMIT_WATCH_POLL_MS", 500) / 1000
+    last_mtime = None
+    changed_at = 0.0
+    pending = True
+    done_tree = None
+
+    print("Watching the index for staged changes (Ctrl+C to stop)")
+    try:
+        while True:
+            try:
+                mtime = _INDEX_PATH.stat().st_mtime_ns
+            except OSError:
+                mtime = None
+
+            if mtime != last_mtime:
+                last_mtime = mtime
+                changed_at = time.monotonic()
+                pending = True
+            elif pending and time.monotonic() - changed_at >= settle:
+                pending = False
+                tree = _staged_tree_hash()
+                # write-tree may rewrite the index; the next poll then finds
+                # the same tree and does nothing
+                if tree and tree != done_tree:
+                    load_dotenv(override=True)
+                    done_tree = _pregenerate(use_cache)
+
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+
+
+# =============================================================================
+# BATCH MODE
+# =============================================================================
+
+_BATCH_DIR = _STATE_DIR / "batch"
+
+
+def _commit_message_for(
+    sha: str, parent: Optional[str], provider, use_cache: bool
+) -> Optional[str]:
+    """Generate a message for one existing commit, from its diff to its parent.
+
+    Root commits (parent None) are diffed against the empty tree. Returns
+    None if the provider could not generate a message.
+    """
+    records = _read_diff([parent or _EMPTY_TREES[len(sha)], sha])
+    message = _rule_message(records)
+    if message:
+        return message
+
+    diff = _prompt_diff(records)
+    if not diff:
+        return fallback_message(records)
+
+    return generate_commit_message(diff, use_cache=use_cache, provider=provider)
+
+
+def run_batch(revision_range: str, use_cache: bool = True) -> Optional[str]:
+    """Generate messages for every non-merge commit in a revision range.
+
+    Commits are processed concurrently by COMMIT_BATCH_WORKERS workers, with
+    provider requests paced by the shared rate limiter. Each message is written to
+    .git/commit-analyzer/batch/<sha>.txt as soon as it is generated. A commit
+    that fails is reported and keeps its original message.
+
+    Returns
+    -------
+        A rebase todo list that rewords every commit, oldest first, or None
+        if the range could not be read.
+    """
+    try:
+        lines = _run_git_command(
+            ["rev-list", _GIT_ARG_REVERSE, _GIT_ARG_NO_MERGES, _GIT_ARG_PARENTS, revision_range]
+        ).splitlines()
+    except (subprocess.CalledProcessError, ValueError) as e:
+        print(f"Invalid revision range '{revision_range}': {e}")
+        return None
+    # Each line is "<sha> [<parent>]"; merges are excluded, so at most one parent
+    parents = {line.split()[0]: (line.split()[1:] or [None])[0] for line in lines if line}
+    shas = list(parents)
+    if not shas:
+        print(f"No commits in {revision_range}")
+        return ""
+
+    with metrics.stage("provider_init"):
+        provider = get_provider(state_dir=_STATE_DIR)
+        provider.warm_up()
+    metrics.annotate(commits=len(shas))
+    workers = max(1, min(_env_int("COMMIT_BATCH_WORKERS", 4), len(shas)))
+    print(f"Generating messages for {len(shas)} commits with {workers} workers")
+
+    _BATCH_DIR.mkdir(parents=True, exist_ok=True)
+
+    def generate(sha: str) -> Optional[str]:
+        try:
+            message = _commit_message_for(sha, parents[sha], provider, use_cache)
+        except Exception as e:
+            print(f"{sha[:12]} failed: {e}")
+            return None
+        if not message:
+            print(f"{sha[:12]} failed: no message generated")
+            return None
+        # Written right away so an interrupted batch keeps what it produced
+        with open(_BATCH_DIR / f"{sha}.txt", "w", encoding="utf-8") as f:
+            f.write(message + "\n")
+        print(f"{sha[:12]} {message.splitlines()[0]}")
+        return message
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        messages = list(executor.map(generate, shas))
+
+    todo: List[str] = []
+    for sha, message in zip(shas, messages):
+        if message is None:
+            todo.append(f"pick {sha}")
+            continue
+        todo.append(f"pick {sha} {message.splitlines()[0]}")
+        todo.append(
+            f"exec git commit --amend --no-verify -F {(_BATCH_DIR / f'{sha}.txt').as_posix()}"
+        )
+
+    failed = messages.count(None)
+    metrics.annotate(failed_commits=failed)
+    if failed:
+        print(f"{failed} of {len(shas)} commits failed and keep their original message")
+    return "\n".join(todo) + "\n"
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
 
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate a conventional commit message for the staged changes.",
+    )
+    parser.add_argument(
+        "--hook",
+        action="store_true",
+        help="Write the message to .git/COMMIT_EDITMSG (prepare-commit-msg hook)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached and pre-generated messages and always call the provider",
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Wait for the complete message instead of printing tokens as they arrive",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Generate in-process even if the background daemon is running",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and pre-generate the message whenever staging settles",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="RANGE",
+        help="Generate messages for every commit in a revision range (main..HEAD, "
+        "HEAD~3.., <sha>^! for one commit) and print a rebase todo list that rewords them",
+    )
+    parser.add_argument(
+        "--batch-output",
+        metavar="FILE",
+        help="Write the --batch rebase todo list to FILE instead of stdout",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long each stage took and the tokens used",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print response cache statistics and exit",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached responses and exit",
+    )
+    return parser.parse_args()
+
+
+def _print_cache_stats() -> None:
+    stats = _open_response_cache().stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = (stats["hits"] / lookups * 100) if lookups else 0
+    print(f"Entries:  {stats['entries']} ({stats['bytes'] / 1024:.1f} KB)")
+    print(f"Hits:     {stats['hits']}")
+    print(f"Misses:   {stats['misses']}")
+    print(f"Hit rate: {hit_rate:.0f}%")
+
+
+def _write_stdout(text: str) -> None:
+    """Write UTF-8 text to stdout regardless of the console encoding."""
+    sys.stdout.buffer.write(text.encode("utf-8"))
+    sys.stdout.buffer.flush()
+
+
+class _StreamPrinter:
+
+    """Print streamed tokens, emitting the message header before the first one."""
+
+    def __init__(self):
+        self.started = False
+        self.muted = False
+        self.text = ""
+        self.first_token_ms: Optional[float] = None
+
+    def __call__(self, chunk: str) -> None:
+        if self.muted:
+            return
+        if self.first_token_ms is None:
+            self.first_token_ms = round(metrics.current().elapsed_ms(), 1)
+            metrics.annotate(first_token_ms=self.first_token_ms)
+        if not self.started:
+            self.started = True
+            print("\nGenerated commit message:")
+            print("------------------------", flush=True)
+        self.text += chunk
+        _write_stdout(chunk)
+
+    def finish(self, mute: bool = True) -> None:
+        """Close the current streamed message, by default ignoring later tokens."""
+        self.muted = mute
+        if self.started:
+            print("\n------------------------")
+        self.started = False
+        self.text = ""
+
+
+def _wait_for_message(
+    generate: Callable[[], Optional[str]], deadline: int, printer: _StreamPrinter
+) -> Optional[str]:
+    """Run generate, giving up after deadline seconds (0 waits indefinitely).
+
+    A request that misses the deadline keeps running in a daemon thread,
+    which is abandoned when the process exits; its output is muted.
+    """
+    if deadline <= 0:
+        return generate()
+
+    result: List[Optional[str]] = []
+    worker = threading.Thread(target=lambda: result.append(generate()), daemon=True)
+    worker.start()
+    worker.join(deadline)
+    if worker.is_alive():
+        printer.finish()
+        print(f"No response within {deadline}s")
+        metrics.annotate(deadline_missed=True)
+        return None
+    return result[0] if result else None
+
+
+def _finish_metrics(show_timings: bool) -> None:
+    """Log the run's metrics and optionally print the stage breakdown."""
+    metrics.write_log()
+    if show_timings:
+        print("\nTimings:")
+        print(metrics.current().summary())
+
+
 def main():
-    diff, has_lock_files, changed_files = get_staged_diff()
-    normalized_changed = [_normalize_repo_path(f) for f in changed_files]
-
-    if has_lock_files:
-        commit_message = "📦 deps: update dependencies"
-    elif normalized_changed == [_REPOSITORY_CONTEXT_PATH]:
-        commit_message = "📝 docs: update repository context"
-    elif not diff:
-        print("No changes to analyze")
-        sys.exit(1)
+    args = _parse_args()
+    with metrics.stage("dotenv"):
+        load_dotenv()
+
+    if args.cache_stats or args.clear_cache:
+        if args.clear_cache:
+            removed = _open_response_cache().clear()
+            print(f"Removed {removed} cached responses")
+        else:
+            _print_cache_stats()
+        return
+
+    set_usage_callback(metrics.record_usage)
+
+    if args.watch:
+        watch(use_cache=not args.no_cache)
+        return
+
+    atexit.register(_finish_metrics, args.timings)
+    metrics.annotate(mode="batch" if args.batch else "hook" if args.hook else "interactive")
+
+    if args.batch:
+        todo = run_batch(args.batch, use_cache=not args.no_cache)
+        if todo is None:
+            sys.exit(1)
+        if args.batch_output:
+            with codecs.open(args.batch_output, "w", encoding="utf-8") as f:
+                f.write(todo)
+            print(f"Rebase todo list written to {args.batch_output}")
+        else:
+            _write_stdout(todo)
+        return
+
+    printer = _StreamPrinter()
+    commit_message = None
+    if args.hook and not args.no_cache:
+        with metrics.stage("pregenerated"):
+            commit_message = _load_pregenerated()
+
+    if commit_message:
+        print("Using the message pre-generated for the staged changes")
+        metrics.annotate(source="pregenerated")
     else:
-        commit_message = generate_commit_message(diff)
+        with metrics.stage("git_diff"):
+            records = get_staged_diff() or []
+        with metrics.stage("rules"):
+            rule_message = _rule_message(records)
+        if rule_message:
+            commit_message = rule_message
+            metrics.annotate(source="rules")
+        else:
+            with metrics.stage("compress"):
+                diff = _prompt_diff(records)
+            if not diff:
+                print("No changes to analyze")
+                sys.exit(1)
+            metrics.annotate(files=len(records), diff_tokens=estimate_tokens(diff))
+
+            stream = not args.no_stream and _env_flag("COMMIT_STREAM")
+
+            deadline_seconds = _env_int("COMMIT_DEADLINE_SECONDS", 60)
+            deadline = time.monotonic() + deadline_seconds if deadline_seconds > 0 else None
+
+            def generate() -> Optional[str]:
+                message = None
+                if not args.no_daemon:
+                    try:
+                        with metrics.stage("daemon"):
+                            message = daemon.request_message(
+                                _STATE_DIR,
+                                diff,
+                                use_cache=not args.no_cache,
+                                on_token=printer if stream else None,
+                                timeout=_env_int("COMMIT_DAEMON_TIMEOUT", 120),
+                                deadline_seconds=deadline - time.monotonic() if deadline else None,
+                            )
+                    except daemon.DaemonError as e:
+                        # The provider already failed once; asking it again
+                        # in-process would only double the load
+                        printer.finish()
+                        print(f"Daemon error: {e}")
+                        metrics.annotate(error=e.error_type, retryable=e.retryable)
+                        if e.deadline_missed:
+                            metrics.annotate(deadline_missed=True)
+                        return None
+                    if message:
+                        metrics.annotate(source="daemon")
+                if not message:
+                    printer.finish(mute=False)
+                    message = generate_commit_message(
+                        diff,
+                        use_cache=not args.no_cache,
+                        on_token=printer if stream else None,
+                        deadline=deadline,
+                    )
+                    if message:
+                        metrics.annotate(source="provider")
+                return message
+
+            commit_message = _wait_for_message(generate, deadline_seconds, printer)
+            # Only a slow or overloaded provider gets the fallback; other errors,
+            # such as a bad API key or model name, must not go unnoticed
+            run = metrics.current().fields
+            if not commit_message and (run.get("deadline_missed") or run.get("retryable")):
+                printer.finish()
+                print("Using the rule-based fallback message")
+                commit_message = fallback_message(records)
+                metrics.annotate(source="fallback")
 
     if not commit_message:
+        if printer.started:
+            print("\n------------------------")
         print("Failed to generate commit message")
         sys.exit(1)
 
-    print("\nGenerated commit message:")
-    print("------------------------")
-    sys.stdout.buffer.write(commit_message.encode("utf-8"))
-    sys.stdout.buffer.flush()
-    print("\n------------------------")
+    with metrics.stage("output"):
+        if printer.started:
+            print("\n------------------------")
+
+        if printer.text.strip() != commit_message:
+            print("\nGenerated commit message:")
+            print("------------------------")
+            _write_stdout(commit_message)
+            print("\n------------------------")
 
-    if len(sys.argv) > 1 and sys.argv[1] == "--hook":
-        with codecs.open(".git/COMMIT_EDITMSG", "w", encoding="utf-8") as f:
-            f.write(commit_message)
+        if args.hook:
+            with codecs.open(".git/COMMIT_EDITMSG", "w", encoding="utf-8") as f:
+                f.write(commit_message)
 
 
 if __name__ == "__main__":
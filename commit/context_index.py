@@ -0,0 +1,266 @@
+"""Retrieval index over the Repomix repository context dump.
+
+``DOCS/repository_context.txt`` holds the whole repository split into
+``## File: path`` sections. Sending all of it would cost far more than the
+diff itself, so this module indexes the sections and returns only the few
+most relevant to a change, ranked by BM25 over identifiers plus a bonus
+for paths close to the staged files.
+
+The index is persisted as JSON next to the other commit-analyzer state and
+rebuilt incrementally: when the dump changes, only sections whose content
+hash changed are re-tokenized.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+_SECTION_PREFIX = b"## File: "
+_INDEX_VERSION = 1
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# BM25 parameters (common defaults)
+_K1 = 1.2
+_B = 0.75
+
+# Path proximity bonuses, on the scale of typical BM25 scores
+_EXACT_PATH_BONUS = 10.0
+_SHARED_DIR_BONUS = 3.0
+
+# Identifiers taken from the diff itself to form the query
+_MAX_DIFF_TERMS = 40
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase identifier terms, including camelCase parts."""
+    terms: List[str] = []
+    for word in _IDENTIFIER.findall(text):
+        lowered = word.lower()
+        terms.append(lowered)
+        for part in _CAMEL_BOUNDARY.split(word.replace("_", " ")):
+            for piece in part.split():
+                piece = piece.lower()
+                if len(piece) >= 3 and piece != lowered:
+                    terms.append(piece)
+    return terms
+
+
+def _path_terms(path: str) -> List[str]:
+    return tokenize(path.replace("/", " ").replace(".", " ").replace("-", " "))
+
+
+def _scan_sections(source: Path) -> Iterable[Tuple[str, int, int, bytes]]:
+    """Yield (path, offset, length, content) for each file section of the dump."""
+    with open(source, "rb") as f:
+        data = f.read()
+
+    starts: List[Tuple[int, str]] = []
+    position = 0
+    while True:
+        index = data.find(_SECTION_PREFIX, position)
+        if index < 0:
+            break
+        if index == 0 or data[index - 1:index] == b"\n":
+            line_end = data.find(b"\n", index)
+            line_end = len(data) if line_end < 0 else line_end
+            path = data[index + len(_SECTION_PREFIX):line_end].decode("utf-8", "replace").strip()
+            starts.append((index, path))
+        position = index + len(_SECTION_PREFIX)
+
+    for number, (offset, path) in enumerate(starts):
+        end = starts[number + 1][0] if number + 1 < len(starts) else len(data)
+        yield path, offset, end - offset, data[offset:end]
+
+
+class ContextIndex:
+
+    """BM25 index of the ``## File:`` sections in a repository context dump."""
+
+    def __init__(self, source: Path, index_path: Path):
+        """Initialize the index.
+
+        Args
+        ----
+            source: The Repomix context file.
+            index_path: JSON file the index is persisted to.
+        """
+        self._source = source
+        self._index_path = index_path
+        self._sections: Dict[str, dict] = {}
+        self._document_frequency: Counter = Counter()
+        self._average_length = 0.0
+
+    def load(self) -> bool:
+        """Load the persisted index, rebuilding it if the source changed.
+
+        Returns
+        -------
+            False if the source file does not exist, True otherwise.
+        """
+        try:
+            stat = self._source.stat()
+        except OSError:
+            return False
+
+        stored = self._read_index()
+        if (
+            stored.get("version") == _INDEX_VERSION
+            and stored.get("size") == stat.st_size
+            and stored.get("mtime") == stat.st_mtime
+        ):
+            self._sections = stored["sections"]
+        else:
+            self._sections = self._rebuild(stored.get("sections", {}))
+            self._write_index(stat.st_size, stat.st_mtime)
+
+        self._document_frequency = Counter()
+        total_length = 0
+        for section in self._sections.values():
+            self._document_frequency.update(section["terms"].keys())
+            total_length += section["length_terms"]
+        self._average_length = total_length / len(self._sections) if self._sections else 0.0
+        return True
+
+    def _rebuild(self, previous: Dict[str, dict]) -> Dict[str, dict]:
+        """Scan the dump, re-tokenizing only sections whose content changed."""
+        sections: Dict[str, dict] = {}
+        for path, offset, length, content in _scan_sections(self._source):
+            digest = hashlib.sha1(content).hexdigest()
+            old = previous.get(path)
+            if old and old.get("hash") == digest:
+                terms = old["terms"]
+            else:
+                text = content.decode("utf-8", "replace")
+                terms = dict(Counter(tokenize(text) + _path_terms(path) * 3))
+            sections[path] = {
+                "offset": offset,
+                "length": length,
+                "hash": digest,
+                "terms": terms,
+                "length_terms": sum(terms.values()),
+            }
+        return sections
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, size: int, mtime: float) -> None:
+        payload = {
+            "version": _INDEX_VERSION,
+            "size": size,
+            "mtime": mtime,
+            "sections": self._sections,
+        }
+        try:
+            self._index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path.with_name(f"{self._index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self._index_path)
+        except OSError:
+            # The index is only an optimization; it is rebuilt next time
+            pass
+
+    def _bm25(self, section: dict, query: Counter) -> float:
+        count = len(self._sections)
+        length_norm = _K1 * (
+            1 - _B + _B * section["length_terms"] / (self._average_length or 1)
+        )
+        score = 0.0
+        for term, weight in query.items():
+            frequency = section["terms"].get(term)
+            if not frequency:
+                continue
+            df = self._document_frequency[term]
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            score += weight * idf * frequency * (_K1 + 1) / (frequency + length_norm)
+        return score
+
+    @staticmethod
+    def _path_proximity(path: str, staged_paths: List[str]) -> float:
+        best = 0.0
+        directory = path.split("/")[:-1]
+        for staged in staged_paths:
+            if staged == path:
+                return _EXACT_PATH_BONUS
+            staged_directory = staged.split("/")[:-1]
+            shared = 0
+            for a, b in zip(directory, staged_directory):
+                if a != b:
+                    break
+                shared += 1
+            if shared:
+                best = max(best, shared / max(len(directory), len(staged_directory)))
+        return best * _SHARED_DIR_BONUS
+
+    def search(self, staged_paths: List[str], diff: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Rank sections by relevance to the staged paths and diff.
+
+        Args
+        ----
+            staged_paths: Normalized paths of the changed files.
+            diff: The diff text; identifiers on changed lines join the query.
+            limit: Maximum number of results.
+
+        Returns
+        -------
+            List of (path, score) pairs, best first.
+        """
+        query: Counter = Counter()
+        for path in staged_paths:
+            query.update(_path_terms(path))
+
+        changed_lines = "\n".join(
+            line[1:]
+            for line in diff.splitlines()
+            if line[:1] in "+-" and not line.startswith(("+++", "---"))
+        )
+        for term, _count in Counter(tokenize(changed_lines)).most_common(_MAX_DIFF_TERMS):
+            query[term] += 1
+
+        scored = []
+        for path, section in self._sections.items():
+            score = self._bm25(section, query) + self._path_proximity(path, staged_paths)
+            if score > 0:
+                scored.append((path, score))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def read_section(self, path: str) -> str:
+        """Return the text of a section from the dump."""
+        section = self._sections[path]
+        with open(self._source, "rb") as f:
+            f.seek(section["offset"])
+            return f.read(section["length"]).decode("utf-8", "replace")
+
+    def relevant_context(self, staged_paths: List[str], diff: str, max_chars: int) -> str:
+        """Return the most relevant sections that fit within max_chars.
+
+        The best section is truncated rather than skipped if it alone is
+        larger than the budget.
+        """
+        parts: List[str] = []
+        remaining = max_chars
+        for path, _score in self.search(staged_paths, diff):
+            text = self.read_section(path)
+            if len(text) > remaining:
+                if parts:
+                    continue
+                text = text[:remaining] + "\n[... section truncated]\n"
+            parts.append(text)
+            remaining -= len(text)
+            if remaining <= 0:
+                break
+        return "".join(parts)
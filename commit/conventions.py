@@ -0,0 +1,196 @@
+"""Local checks of generated messages against the commit conventions.
+
+The rules mirror those given to the model in the prompt: a known
+``<emoji> <type>[(scope)]: <description>`` header, a short lowercase
+imperative description and a body wrapped at 72 characters. They are used
+to clean up model output and to pick the best of several candidates
+without another round trip.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Commit types and their emoji, as listed in the prompt
+COMMIT_TYPES = {
+    "feat": "✨",
+    "fix": "🐛",
+    "docs": "📝",
+    "style": "🎨",
+    "refactor": "♻️",
+    "perf": "⚡️",
+    "test": "✅",
+    "chore": "🔧",
+    "ci": "👷",
+    "security": "🔒",
+    "deps": "📦",
+    "breaking": "💥",
+    "ui": "💄",
+    "i18n": "🌐",
+    "typo": "✏️",
+    "init": "🎉",
+    "license": "📄",
+    "docker": "🐳",
+    "access": "♿️",
+    "logs": "🔊",
+    "db": "🗃️",
+    "cleanup": "🔥",
+    "wip": "🚧",
+    "move": "🚚",
+    "revert": "⏪",
+    "merge": "🔀",
+    "responsive": "📱",
+    "hotfix": "🚑",
+}
+
+MAX_DESCRIPTION_LENGTH = 50
+MAX_BODY_LINE_LENGTH = 72
+
+_HEADER = re.compile(r"^(\S+)\s+([a-z0-9]+)(\([^)]*\))?!?: (.+)$")
+_PREAMBLE = re.compile(
+    r"^(based on|here is|here's|sure|certainly|the commit message|commit message)\b.*:?\s*$",
+    re.IGNORECASE,
+)
+_VARIATION_SELECTOR = "\ufe0f"
+
+# Verbs that commit descriptions start with. A first word is only flagged as
+# not imperative when it is an inflected form of one of these, so base forms
+# that merely end like one ("embed", "bring", "process", "focus") pass.
+_COMMIT_VERBS = frozenset(
+    """
+    add address adjust allow apply avoid build bump cache catch change check clarify
+    clean cleanup configure convert correct cover create delete deprecate disable
+    document drop embed enable ensure expose extract fix focus format handle hide
+    implement improve include increase initialize install introduce limit load log make
+    merge migrate move optimize parse pass pin ping prevent process raise read
+    refactor reduce release remove rename render reorganize replace resolve restore
+    restructure retry return reuse revert rewrite run set show simplify skip sort
+    speed split start stop support switch test track tweak update upgrade use
+    validate wrap write
+    """.split()
+)
+
+# Header fields returned by parse_header: (emoji, type, scope, description)
+Header = Tuple[str, str, Optional[str], str]
+
+
+def clean_message(text: str) -> str:
+    """Strip chatty preambles, code fences and quotes around a commit message."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+
+    # Drop leading explanation lines up to the first header-shaped line
+    for index, line in enumerate(lines):
+        if _HEADER.match(line.strip("`*\"' ")):
+            lines = lines[index:]
+            break
+    else:
+        while lines and (not lines[0].strip() or _PREAMBLE.match(lines[0].strip())):
+            lines.pop(0)
+
+    lines = [line for line in lines if not line.startswith("```")]
+    if lines:
+        lines[0] = lines[0].strip("`*\"' ")
+    return "\n".join(lines).strip()
+
+
+def parse_header(line: str) -> Optional[Header]:
+    """Split a header line into its fields, or return None if it does not match."""
+    match = _HEADER.match(line.strip())
+    if not match:
+        return None
+    emoji, commit_type, scope, description = match.groups()
+    return emoji, commit_type, scope, description
+
+
+def _base_forms(word: str) -> List[str]:
+    """Return the possible base forms of an -s, -ed or -ing word."""
+    forms: List[str] = []
+    if word.endswith("ies"):
+        forms.append(word[:-3] + "y")
+    elif word.endswith("es"):
+        forms.append(word[:-2])
+    if word.endswith("s"):
+        forms.append(word[:-1])
+    if word.endswith("ied"):
+        forms.append(word[:-3] + "y")
+    for suffix in ("ed", "ing"):
+        if word.endswith(suffix):
+            stem = word[: -len(suffix)]
+            forms += [stem, stem + "e"]
+            # stopped -> stop, running -> run
+            if len(stem) > 2 and stem[-1] == stem[-2]:
+                forms.append(stem[:-1])
+    return forms
+
+
+def _is_imperative(word: str) -> bool:
+    """Return False if word is an inflected form of a common commit verb."""
+    word = word.lower()
+    return word in _COMMIT_VERBS or not any(f in _COMMIT_VERBS for f in _base_forms(word))
+
+
+def message_problems(message: str) -> List[Tuple[str, int]]:
+    """Return (problem, penalty) pairs for every rule a message breaks."""
+    lines = message.strip().splitlines()
+    if not lines:
+        return [("empty message", 100)]
+
+    problems: List[Tuple[str, int]] = []
+    header = parse_header(lines[0])
+    if header is None:
+        problems.append(("header is not '<emoji> <type>: <description>'", 50))
+    else:
+        emoji, commit_type, _scope, description = header
+        expected = COMMIT_TYPES.get(commit_type)
+        if expected is None:
+            problems.append((f"unknown type '{commit_type}'", 20))
+        elif emoji.replace(_VARIATION_SELECTOR, "") != expected.replace(_VARIATION_SELECTOR, ""):
+            problems.append((f"emoji does not match type '{commit_type}'", 10))
+
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            overflow = len(description) - MAX_DESCRIPTION_LENGTH
+            problems.append(
+                (f"description is {overflow} characters too long", min(20, 5 + overflow))
+            )
+        if description[:1].isupper():
+            problems.append(("description does not start lowercase", 5))
+        if description.endswith("."):
+            problems.append(("description ends with a period", 5))
+        first_word = description.split()[0] if description.split() else ""
+        if not _is_imperative(first_word):
+            problems.append(("description is not in imperative mood", 5))
+
+    if len(lines) < 3 or not any(line.strip() for line in lines[2:]):
+        problems.append(("missing body", 10))
+    elif lines[1].strip():
+        problems.append(("body is not separated by a blank line", 5))
+
+    long_lines = sum(1 for line in lines[1:] if len(line) > MAX_BODY_LINE_LENGTH)
+    if long_lines:
+        problems.append(
+            (
+                f"{long_lines} body lines exceed {MAX_BODY_LINE_LENGTH} characters",
+                min(10, 2 * long_lines),
+            )
+        )
+    return problems
+
+
+def score_message(message: str) -> int:
+    """Score a message from 0 to 100 by how well it follows the conventions."""
+    return max(0, 100 - sum(penalty for _problem, penalty in message_problems(message)))
+
+
+def best_message(candidates: List[str]) -> Tuple[str, int]:
+    """Clean the candidates and return the best one with its score.
+
+    Ties go to the earlier candidate.
+    """
+    scored = [
+        (score_message(cleaned), -index, cleaned)
+        for index, cleaned in enumerate(clean_message(c) for c in candidates)
+        if cleaned
+    ]
+    if not scored:
+        return "", 0
+    score, _index, message = max(scored)
+    return message, score
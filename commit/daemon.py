@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Warm background daemon for the prepare-commit-msg hook.
+
+The daemon keeps one provider instance (and with it the SDK client and its
+connection pool) alive between commits and serves generation requests over
+a Unix socket inside the git directory. ``commit_analyzer.py`` connects to
+it when it is running and falls back to in-process generation otherwise.
+
+Usage (from the repository root):
+    python commit/daemon.py start    # start in the background
+    python commit/daemon.py status   # check whether it is running
+    python commit/daemon.py stop     # shut it down
+    python commit/daemon.py run      # run in the foreground
+
+Protocol: the client sends one JSON object per line. For ``generate``
+requests the daemon answers with zero or more ``{"token": ...}`` lines
+followed by a final ``{"message": ...}`` or ``{"error": ...}`` line, which
+also carries the token usage of the request under ``"usage"``. An error
+line also names the exception (``"error_type"``) and says whether it was
+transient (``"retryable"``) or the deadline passed (``"deadline_missed"``).
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+_SOCKET_NAME = "daemon.sock"
+_LOG_NAME = "daemon.log"
+_CONNECT_TIMEOUT = 1.0
+
+
+class DaemonError(Exception):
+
+    """Raised when the daemon was reached but could not generate a message.
+
+    Attributes
+    ----------
+        error_type: Class name of the exception raised in the daemon, if any.
+        retryable: True if the provider failed with a transient error.
+        deadline_missed: True if the request's deadline passed in the daemon.
+    """
+
+    def __init__(self, reply: Dict[str, Any]):
+        super().__init__(reply.get("error") or "unknown error")
+        self.error_type: Optional[str] = reply.get("error_type")
+        self.retryable = bool(reply.get("retryable"))
+        self.deadline_missed = bool(reply.get("deadline_missed"))
+
+
+def is_supported() -> bool:
+    """Return True if this platform supports Unix domain sockets."""
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path(state_dir: Path) -> Path:
+    """Return the daemon socket path inside the given state directory."""
+    return state_dir / _SOCKET_NAME
+
+
+def _send(stream, payload: dict) -> None:
+    stream.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+    stream.flush()
+
+
+def _connect(state_dir: Path, timeout: float) -> Optional[socket.socket]:
+    """Connect to the daemon, returning None if it is not running."""
+    path = socket_path(state_dir)
+    if not is_supported() or not path.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(_CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(timeout)
+    return sock
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+
+def request_message(
+    state_dir: Path,
+    diff: str,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    timeout: float = 120.0,
+    deadline_seconds: Optional[float] = None,
+) -> Optional[str]:
+    """Ask a running daemon to generate a commit message.
+
+    Args
+    ----
+        state_dir: Directory containing the daemon socket.
+        diff: The filtered diff to generate a message for.
+        use_cache: Whether the daemon may answer from the response cache.
+        on_token: Optional callback receiving streamed text chunks.
+        timeout: Seconds to wait for the daemon's response.
+        deadline_seconds: Optional time budget for the daemon's provider requests.
+
+    Returns
+    -------
+        The generated message, or None if the daemon is not running or could
+        not be talked to, in which case the caller should generate in-process.
+
+    Raises
+    ------
+        DaemonError: If the daemon answered but its provider request failed.
+            Repeating the request in-process would only double the load on
+            a failing provider, so the caller should give up or fall back.
+    """
+    sock = _connect(state_dir, timeout)
+    if sock is None:
+        return None
+
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            _send(stream, {
+                "command": "generate",
+                "diff": diff,
+                "use_cache": use_cache,
+                "stream": on_token is not None,
+                "deadline_seconds": deadline_seconds,
+            })
+            for raw in stream:
+                reply = json.loads(raw.decode("utf-8"))
+                if "token" in reply:
+                    if on_token:
+                        on_token(reply["token"])
+                    continue
+                metrics.merge_models(reply.get("usage") or {})
+                if reply.get("message"):
+                    return reply["message"]
+                raise DaemonError(reply)
+    except (OSError, ValueError) as e:
+        print(f"Daemon unavailable ({e}), generating in-process")
+    return None
+
+
+def ping(state_dir: Path) -> bool:
+    """Return True if a daemon is listening on the socket."""
+    sock = _connect(state_dir, _CONNECT_TIMEOUT)
+    if sock is None:
+        return False
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            _send(stream, {"command": "ping"})
+            return json.loads(stream.readline().decode("utf-8")).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+def shutdown(state_dir: Path) -> bool:
+    """Ask a running daemon to exit. Returns False if none was running."""
+    sock = _connect(state_dir, _CONNECT_TIMEOUT)
+    if sock is None:
+        return False
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            _send(stream, {"command": "shutdown"})
+            stream.readline()
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+
+class _Server:
+
+    """Serve generation requests with a provider that stays warm.
+
+    The provider is rebuilt when ``.env`` changes so configuration edits
+    take effect without restarting the daemon.
+    """
+
+    def __init__(self, state_dir: Path, idle_timeout: float):
+        self._state_dir = state_dir
+        self._idle_timeout = idle_timeout
+        self._provider = None
+        self._env_mtime: Optional[float] = None
+
+    def _get_provider(self):
+        # Imported here so the client side of this module stays lightweight
+        from dotenv import load_dotenv
+        from providers import get_provider
+        from providers.base import set_usage_callback
+
+        try:
+            env_mtime: Optional[float] = Path(".env").stat().st_mtime
+        except OSError:
+            env_mtime = None
+
+        if self._provider is None or env_mtime != self._env_mtime:
+            load_dotenv(override=True)
+            set_usage_callback(metrics.record_usage)
+            self._provider = get_provider(state_dir=self._state_dir)
+            self._provider.warm_up()
+            self._env_mtime = env_mtime
+        return self._provider
+
+    def _handle(self, conn: socket.socket) -> bool:
+        """Handle one connection. Returns False when asked to shut down."""
+        import commit_analyzer
+
+        with conn, conn.makefile("rwb") as stream:
+            request = json.loads(stream.readline().decode("utf-8"))
+            command = request.get("command")
+
+            if command == "ping":
+                _send(stream, {"ok": True})
+                return True
+            if command == "shutdown":
+                _send(stream, {"ok": True})
+                return False
+            if command != "generate":
+                _send(stream, {"error": f"Unknown command '{command}'"})
+                return True
+
+            try:
+                provider = self._get_provider()
+            except Exception as e:
+                _send(stream, {"error": str(e), "error_type": type(e).__name__})
+                return True
+
+            deadline = None
+            if request.get("deadline_seconds") is not None:
+                deadline = time.monotonic() + request["deadline_seconds"]
+
+            def send_token(chunk: str) -> None:
+                _send(stream, {"token": chunk})
+
+            run = metrics.reset()
+            message = commit_analyzer.generate_commit_message(
+                request.get("diff", ""),
+                use_cache=request.get("use_cache", True),
+                on_token=send_token if request.get("stream") else None,
+                provider=provider,
+                deadline=deadline,
+            )
+            if message:
+                _send(stream, {"message": message, "usage": run.models})
+            else:
+                _send(stream, {
+                    "error": "Failed to generate commit message",
+                    "error_type": run.fields.get("error"),
+                    "retryable": bool(run.fields.get("retryable")),
+                    "deadline_missed": deadline is not None and time.monotonic() >= deadline,
+                    "usage": run.models,
+                })
+        return True
+
+    def serve_forever(self) -> None:
+        path = socket_path(self._state_dir)
+        self._state_dir.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if ping(self._state_dir):
+                print("Daemon is already running")
+                return
+            path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(path))
+            os.chmod(path, 0o600)
+            server.listen(4)
+            server.settimeout(self._idle_timeout)
+
+            # Build the client and pay SDK import cost before the first commit
+            try:
+                self._get_provider()
+            except Exception as e:
+                print(f"Could not configure provider: {e}", flush=True)
+                return
+            print(f"Listening on {path}", flush=True)
+
+            while True:
+                try:
+                    conn, _addr = server.accept()
+                except socket.timeout:
+                    print("Idle timeout reached, exiting", flush=True)
+                    break
+                conn.settimeout(None)
+                try:
+                    if not self._handle(conn):
+                        break
+                except (OSError, ValueError) as e:
+                    print(f"Request failed: {e}", flush=True)
+        finally:
+            server.close()
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def serve(state_dir: Path, idle_timeout: float) -> None:
+    """Run the daemon in the foreground until idle or shut down."""
+    _Server(state_dir, idle_timeout).serve_forever()
+
+
+def _start_background(state_dir: Path) -> int:
+    if ping(state_dir):
+        print("Daemon is already running")
+        return 0
+
+    state_dir.mkdir(parents=True, exist_ok=True)
+    with open(state_dir / _LOG_NAME, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "run"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    for _ in range(50):
+        if ping(state_dir):
+            print("Daemon started")
+            return 0
+        time.sleep(0.1)
+
+    print(f"Daemon did not start, see {state_dir / _LOG_NAME}")
+    return 1
+
+
+def main() -> None:
+    sys.path.insert(0, str(Path(__file__).parent))
+    import commit_analyzer
+
+    state_dir = commit_analyzer._STATE_DIR
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if not is_supported():
+        print("The daemon requires Unix domain sockets, which this platform lacks")
+        sys.exit(1)
+
+    if command == "run":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        serve(state_dir, commit_analyzer._env_int("COMMIT_DAEMON_IDLE_SECONDS", 3600))
+    elif command == "start":
+        sys.exit(_start_background(state_dir))
+    elif command == "stop":
+        print("Daemon stopped" if shutdown(state_dir) else "Daemon is not running")
+    elif command == "status":
+        running = ping(state_dir)
+        print("Daemon is running" if running else "Daemon is not running")
+        sys.exit(0 if running else 1)
+    else:
+        print(f"Unknown command '{command}'. Use start, stop, status or run.")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Compression of parsed diffs before they are sent to the model.
+
+Large parts of a typical diff carry little signal for a commit message:
+generated or minified files, source maps, snapshots, binary blobs, deleted
+file contents, whitespace-only hunks and wide context. This stage trims or
+collapses them into one-line summaries so requests are cheaper and faster.
+"""
+
+import posixpath
+from typing import Iterable, List, Optional, Tuple
+
+from diff_parser import CHARS_PER_TOKEN, STATUS_DELETED, FileDiff, estimate_tokens
+
+# Files whose content is produced by tools rather than written by hand
+_GENERATED_SUFFIXES = (
+    ".min.js",
+    ".min.css",
+    ".map",
+    ".snap",
+    ".lock",
+    "-lock.json",
+    "-lock.yaml",
+)
+_GENERATED_DIRS = (
+    "dist/",
+    "build/",
+    ".next/",
+    "coverage/",
+    "__snapshots__/",
+    "node_modules/",
+)
+
+# Lines longer than this are a strong sign of minified output
+_MINIFIED_LINE_LENGTH = 500
+
+# Files where indentation is syntax, so re-indenting changes behavior
+_INDENT_SENSITIVE_SUFFIXES = (".py", ".pyi", ".yml", ".yaml", ".mk", ".sass", ".pug")
+_INDENT_SENSITIVE_NAMES = ("Makefile", "GNUmakefile", "makefile")
+
+
+def _is_generated_path(path: str) -> bool:
+    if path.endswith(_GENERATED_SUFFIXES):
+        return True
+    return any(path.startswith(d) or f"/{d}" in path for d in _GENERATED_DIRS)
+
+
+def _has_minified_lines(record: FileDiff) -> bool:
+    return any(
+        len(line) > _MINIFIED_LINE_LENGTH
+        for hunk in record.hunks
+        for line in hunk.splitlines()
+    )
+
+
+def _stub_reason(record: FileDiff) -> Optional[str]:
+    """Return why a file's diff should be replaced by a summary, if it should."""
+    if record.binary:
+        return "binary"
+    if record.status == STATUS_DELETED:
+        return "deleted"
+    if _is_generated_path(record.path):
+        return "generated"
+    if _has_minified_lines(record):
+        return "minified"
+    return None
+
+
+def _is_indent_sensitive(path: str) -> bool:
+    return path.endswith(_INDENT_SENSITIVE_SUFFIXES) or (
+        posixpath.basename(path) in _INDENT_SENSITIVE_NAMES
+    )
+
+
+def _normalized_lines(body: List[str], marker: str, keep_indent: bool) -> List[tuple]:
+    """Return (indentation, tokens) of a hunk's removed or added lines.
+
+    Tokens come from str.split(), so joining or splitting words on a line
+    is a change. Blank lines are dropped; indentation is only kept when it
+    matters to the file type.
+    """
+    normalized = []
+    for line in body:
+        if not line.startswith(marker):
+            continue
+        text = line[1:].rstrip("\r\n")
+        tokens = tuple(text.split())
+        if not tokens:
+            continue
+        indent = text[: len(text) - len(text.lstrip())] if keep_indent else ""
+        normalized.append((indent, tokens))
+    return normalized
+
+
+def _is_whitespace_only(body: List[str], path: str) -> bool:
+    """Return True if a hunk's changes only differ in whitespace.
+
+    Lines are compared one by one, token for token; in indentation-sensitive
+    files such as Python, YAML and Makefiles their indentation must match too.
+    """
+    keep_indent = _is_indent_sensitive(path)
+    return _normalized_lines(body, "-", keep_indent) == _normalized_lines(
+        body, "+", keep_indent
+    )
+
+
+def has_only_whitespace_changes(record: FileDiff) -> bool:
+    """Return True if a fully parsed file's changes only differ in whitespace."""
+    return (
+        bool(record.hunks)
+        and not record.omitted
+        and all(
+            _is_whitespace_only(hunk.splitlines()[1:], record.path) for hunk in record.hunks
+        )
+    )
+
+
+def _trim_context(body: List[str], context_lines: int) -> List[str]:
+    """Keep only context lines within context_lines of a change."""
+    keep = set()
+    for index, line in enumerate(body):
+        if line.startswith(("+", "-")):
+            keep.update(range(index - context_lines, index + context_lines + 1))
+    return [
+        line
+        for index, line in enumerate(body)
+        if index in keep or line.startswith("\\")
+    ]
+
+
+def _stub(record: FileDiff, reason: str) -> str:
+    return (
+        f"diff --git a/{record.old_path} b/{record.path}\n"
+        f"[{reason} file, +{record.added} -{record.removed} lines, diff omitted]\n"
+    )
+
+
+def _compress_record(record: FileDiff, context_lines: int, max_file_tokens: int) -> str:
+    reason = _stub_reason(record)
+    if reason:
+        return _stub(record, reason)
+
+    hunks: List[str] = []
+    for hunk in record.hunks:
+        lines = hunk.splitlines(True)
+        head, body = lines[0], lines[1:]
+        if _is_whitespace_only(body, record.path):
+            continue
+        hunks.append(head + "".join(_trim_context(body, context_lines)))
+
+    if record.hunks and not hunks:
+        return _stub(record, "whitespace-only")
+
+    text = record.header + "".join(hunks)
+    if record.omitted:
+        text += f"[... {record.omitted} more diff lines omitted]\n"
+    if estimate_tokens(text) > max_file_tokens:
+        return _stub(record, "oversized")
+    return text
+
+
+def compress_diff(
+    records: Iterable[FileDiff],
+    context_lines: int = 1,
+    max_file_tokens: int = 8000,
+) -> Tuple[str, int, int]:
+    """Render records as a compressed diff.
+
+    Args
+    ----
+        records: Parsed file diffs to include.
+        context_lines: Unchanged lines kept around each change.
+        max_file_tokens: Files still larger than this after trimming are
+            replaced by a one-line stat summary.
+
+    Returns
+    -------
+        Tuple of (compressed_diff, estimated_tokens_before, estimated_tokens_after)
+    """
+    parts: List[str] = []
+    before_chars = 0
+    for record in records:
+        before_chars += record.stored_chars()
+        parts.append(_compress_record(record, context_lines, max_file_tokens))
+
+    text = "".join(parts)
+    before = (before_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return text, before, estimate_tokens(text)
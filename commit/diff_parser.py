@@ -0,0 +1,220 @@
+"""Single-pass parser turning ``git diff`` output into per-file records.
+
+The parser consumes diff lines once, in order, and yields one compact
+``FileDiff`` per ``diff --git`` block. Everything downstream (lock-file
+detection, path exclusion, prompt building) works off these records
+instead of re-splitting the diff text.
+"""
+
+from typing import Collection, Iterable, Iterator, List, Optional
+
+STATUS_ADDED = "A"
+STATUS_MODIFIED = "M"
+STATUS_DELETED = "D"
+STATUS_RENAMED = "R"
+STATUS_COPIED = "C"
+
+# Rough heuristic; good enough to decide between prompt strategies
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_repo_path(path: str) -> str:
+    """Normalize paths to forward-slashed, workspace-relative form."""
+    return path.replace("\\", "/").lstrip("./")
+
+
+def _header_path(line: str) -> str:
+    """Extract the file path from a ``diff --git a/... b/...`` header line."""
+    parts = line.strip().split()
+    a_path = ""
+    b_path = ""
+    if len(parts) >= 4:
+        a_token = parts[2]
+        b_token = parts[3]
+        if a_token.startswith("a/"):
+            a_path = a_token[2:]
+        if b_token.startswith("b/"):
+            b_path = b_token[2:]
+
+    return b_path or a_path
+
+
+def _marker_path(line: str, prefix: str) -> Optional[str]:
+    """Return the path of a ``--- a/x`` or ``+++ b/x`` line, None for /dev/null."""
+    target = line[4:].rstrip("\n").split("\t", 1)[0]
+    if target.startswith(prefix):
+        return target[len(prefix):]
+    return None
+
+
+class FileDiff:
+
+    """Parsed diff of a single file.
+
+    Attributes
+    ----------
+        path: Normalized path of the file after the change.
+        old_path: Normalized path before the change (differs for renames/copies).
+        status: One of the STATUS_* letters, as in ``git diff --name-status``.
+        header: Raw header lines (``diff --git`` up to the first hunk).
+        hunks: Raw text of each hunk, starting with its ``@@`` line.
+        added: Number of added lines.
+        removed: Number of removed lines.
+        binary: True if git reported a binary change.
+        omitted: Number of hunk lines counted but not kept in memory.
+    """
+
+    __slots__ = (
+        "path",
+        "old_path",
+        "status",
+        "header",
+        "hunks",
+        "added",
+        "removed",
+        "binary",
+        "omitted",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self.old_path = path
+        self.status = STATUS_MODIFIED
+        self.header = ""
+        self.hunks: List[str] = []
+        self.added = 0
+        self.removed = 0
+        self.binary = False
+        self.omitted = 0
+
+    def stored_chars(self) -> int:
+        """Return the number of diff characters held in memory for this file."""
+        return len(self.header) + sum(len(h) for h in self.hunks)
+
+    def render(self) -> str:
+        """Return the diff text of this file, noting any omitted lines."""
+        text = self.header + "".join(self.hunks)
+        if self.omitted:
+            text += f"[... {self.omitted} more diff lines omitted]\n"
+        return text
+
+    def __repr__(self) -> str:
+        return (
+            f"FileDiff({self.status} {self.path!r}, +{self.added} -{self.removed}"
+            f"{', binary' if self.binary else ''})"
+        )
+
+
+def parse_diff(
+    lines: Iterable[str],
+    excluded: Collection[str] = (),
+    max_file_chars: Optional[int] = None,
+) -> Iterator[FileDiff]:
+    """Parse diff lines into FileDiff records, yielding each file once complete.
+
+    Lines are consumed lazily, so when fed from a pipe only the current
+    file's kept text is held in memory.
+
+    Args
+    ----
+        lines: Lines of ``git diff`` output, each including its newline.
+        excluded: Normalized paths whose hunks are counted but not kept.
+        max_file_chars: Keep at most this many hunk characters per file;
+            further lines are only counted in ``omitted``.
+
+    Yields
+    ------
+        One FileDiff per ``diff --git`` block, in diff order.
+    """
+    current: Optional[FileDiff] = None
+    header: List[str] = []
+    hunk: List[str] = []
+    in_hunks = False
+    kept_chars = 0
+    keep_hunks = True
+
+    def finish_hunk() -> None:
+        if hunk:
+            current.hunks.append("".join(hunk))
+            hunk.clear()
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            if current is not None:
+                finish_hunk()
+                current.header = "".join(header)
+                yield current
+            current = FileDiff(normalize_repo_path(_header_path(line)))
+            header = [line]
+            in_hunks = False
+            kept_chars = 0
+            keep_hunks = current.path not in excluded
+            continue
+
+        if current is None:
+            continue
+
+        in_hunks = in_hunks or line.startswith("@@")
+        if in_hunks:
+            if line.startswith("+"):
+                current.added += 1
+            elif line.startswith("-"):
+                current.removed += 1
+
+            if keep_hunks and max_file_chars is not None:
+                keep_hunks = kept_chars + len(line) <= max_file_chars
+            if not keep_hunks:
+                current.omitted += 1
+                continue
+
+            kept_chars += len(line)
+            if line.startswith("@@"):
+                finish_hunk()
+            hunk.append(line)
+            continue
+
+        # Still in the per-file header
+        header.append(line)
+        if line.startswith("new file mode"):
+            current.status = STATUS_ADDED
+        elif line.startswith("deleted file mode"):
+            current.status = STATUS_DELETED
+        elif line.startswith("rename from "):
+            current.status = STATUS_RENAMED
+            current.old_path = normalize_repo_path(line[len("rename from "):].rstrip("\n"))
+        elif line.startswith("rename to "):
+            current.path = normalize_repo_path(line[len("rename to "):].rstrip("\n"))
+        elif line.startswith("copy from "):
+            current.status = STATUS_COPIED
+            current.old_path = normalize_repo_path(line[len("copy from "):].rstrip("\n"))
+        elif line.startswith("copy to "):
+            current.path = normalize_repo_path(line[len("copy to "):].rstrip("\n"))
+        elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+            current.binary = True
+        elif line.startswith("--- "):
+            old_path = _marker_path(line, "a/")
+            if old_path is not None:
+                current.old_path = normalize_repo_path(old_path)
+        elif line.startswith("+++ "):
+            new_path = _marker_path(line, "b/")
+            if new_path is None:
+                current.path = current.old_path
+            else:
+                current.path = normalize_repo_path(new_path)
+                if current.status == STATUS_ADDED:
+                    current.old_path = current.path
+
+    if current is not None:
+        finish_hunk()
+        current.header = "".join(header)
+        yield current
+
+
+def render_diff(records: Iterable[FileDiff]) -> str:
+    """Join records back into diff text."""
+    return "".join(record.render() for record in records)
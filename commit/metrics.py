@@ -0,0 +1,166 @@
+"""Per-stage timings and token usage of one commit-analyzer run.
+
+Stages such as reading the diff, building the prompt and waiting for the
+provider are timed with ``stage()``; providers report the token usage of
+each response through ``providers.base.report_usage``. With
+COMMIT_METRICS_LOG set, every run appends one JSON line to that file, so
+hook latency percentiles and token cost can be tracked per repository.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+_USAGE_FIELDS = ("requests", "input_tokens", "output_tokens", "cached_input_tokens")
+
+
+def _empty_usage() -> Dict[str, int]:
+    return dict.fromkeys(_USAGE_FIELDS, 0)
+
+
+class RunMetrics:
+
+    """Timings and token usage collected during one run.
+
+    Safe to update from several threads; stages entered more than once,
+    for example by batch workers, add up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._timestamp = time.time()
+        self.stages: Dict[str, float] = {}
+        self.usage: Dict[str, int] = _empty_usage()
+        self.models: Dict[str, Dict[str, int]] = {}
+        self.fields: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block and add its duration to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add_usage(self, key: str, usage: Dict[str, int]) -> None:
+        """Add token counts for a ``provider:model`` key to the totals."""
+        with self._lock:
+            per_model = self.models.setdefault(key, _empty_usage())
+            for field in _USAGE_FIELDS:
+                amount = int(usage.get(field) or 0)
+                per_model[field] += amount
+                self.usage[field] += amount
+
+    def annotate(self, **fields: Any) -> None:
+        """Attach fields, such as the outcome or the model used, to the record."""
+        with self._lock:
+            self.fields.update(fields)
+
+    def elapsed_ms(self) -> float:
+        """Return milliseconds since the run started."""
+        return (time.perf_counter() - self._started) * 1000
+
+    def to_record(self) -> Dict[str, Any]:
+        """Return the run as a JSON-serializable dict."""
+        with self._lock:
+            record: Dict[str, Any] = {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._timestamp)),
+                "repository": os.getcwd(),
+                "total_ms": round(self.elapsed_ms(), 1),
+                "stages_ms": {name: round(s * 1000, 1) for name, s in self.stages.items()},
+                "usage": dict(self.usage),
+                "models": {key: dict(usage) for key, usage in self.models.items()},
+            }
+            record.update(self.fields)
+        return record
+
+    def summary(self) -> str:
+        """Return a human-readable breakdown of the run."""
+        record = self.to_record()
+        lines = [f"{'total':<16}{record['total_ms']:>10.1f} ms"]
+        for name, ms in record["stages_ms"].items():
+            lines.append(f"  {name:<14}{ms:>10.1f} ms")
+        usage = record["usage"]
+        if usage["requests"]:
+            lines.append(
+                f"{usage['requests']} requests: {usage['input_tokens']} input tokens "
+                f"({usage['cached_input_tokens']} cached), {usage['output_tokens']} output tokens"
+            )
+        return "\n".join(lines)
+
+
+_current = RunMetrics()
+
+
+def current() -> RunMetrics:
+    """Return the metrics of the run in progress."""
+    return _current
+
+
+def reset() -> RunMetrics:
+    """Start a new run, for long-lived processes that handle several."""
+    global _current
+    _current = RunMetrics()
+    return _current
+
+
+def stage(name: str):
+    """Time a block as a stage of the current run."""
+    return _current.stage(name)
+
+
+def annotate(**fields: Any) -> None:
+    """Attach fields to the current run's record."""
+    _current.annotate(**fields)
+
+
+def record_usage(
+    provider_name: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_input_tokens: int = 0,
+) -> None:
+    """Add the token usage of one provider response to the current run."""
+    _current.add_usage(
+        f"{provider_name}:{model}",
+        {
+            "requests": 1,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_input_tokens": cached_input_tokens,
+        },
+    )
+
+
+def merge_models(models: Dict[str, Dict[str, int]]) -> None:
+    """Add per-model usage reported by another process, such as the daemon."""
+    for key, usage in models.items():
+        _current.add_usage(key, usage)
+
+
+def write_log(path: Optional[str] = None) -> None:
+    """Append the current run as one JSON line to COMMIT_METRICS_LOG, if set.
+
+    Failures are reported but never fail the run.
+    """
+    path = path or os.getenv("COMMIT_METRICS_LOG")
+    if not path:
+        return
+    line = json.dumps(_current.to_record(), ensure_ascii=False) + "\n"
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One write per line in append mode, so concurrent runs do not interleave
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}")
@@ -11,6 +11,6 @@ Usage:
     response = provider.chat_completion("Your prompt here")
 """
 
-from providers.factory import get_provider
+from providers.factory import get_provider, route_models
 
-__all__ = ["get_provider"]
+__all__ = ["get_provider", "route_models"]
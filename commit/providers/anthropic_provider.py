@@ -2,11 +2,14 @@
 SDK."""
 
 import os
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional
 
-from anthropic import Anthropic
-
-from providers.base import BaseProvider
+from providers.base import (
+    BaseProvider,
+    call_with_retries,
+    report_usage,
+    stream_with_retries,
+)
 
 
 class AnthropicProvider(BaseProvider):
@@ -18,8 +21,13 @@ class AnthropicProvider(BaseProvider):
     Environment variables:
         ANTHROPIC_API_KEY: Required. Your Anthropic API key.
         MODEL_NAME: Optional. Override the default model.
+        ANTHROPIC_MODEL_NAME: Optional. Model override for this provider only,
+            taking precedence over MODEL_NAME when several providers are combined.
+        FAST_MODEL_NAME / ANTHROPIC_FAST_MODEL_NAME: Optional. Model for small
+            changes when MODEL_CASCADE is enabled.
     """
 
+    DEFAULT_FAST_MODEL = "claude-haiku-4-5-20251001"
     DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 
     def __init__(self, api_key: Optional[str] = None):
@@ -38,7 +46,49 @@ class AnthropicProvider(BaseProvider):
             raise ValueError(
                 "Anthropic API key not found. Please set ANTHROPIC_API_KEY environment variable."
             )
-        self._client = Anthropic(api_key=self._api_key)
+        self._client_instance = None
+
+    def _get_client(self):
+        """Return the SDK client, importing the SDK on first use."""
+        if self._client_instance is None:
+            from anthropic import Anthropic
+
+            # Retries are handled by call_with_retries within the deadline
+            self._client_instance = Anthropic(api_key=self._api_key, max_retries=0)
+        return self._client_instance
+
+    def _request_args(self, model: str, prompt: str, system: Optional[str]) -> Dict[str, Any]:
+        """Build request arguments, marking the system prompt as cacheable.
+
+        With ``cache_control`` on the system block, repeated requests reuse
+        the processed instructions instead of paying for them again.
+        """
+        args: Dict[str, Any] = {
+            "model": model,
+            "max_tokens": self.max_output_tokens(),
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            args["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        return args
+
+    def _report_usage(self, model: str, usage) -> None:
+        """Report token usage; Anthropic counts cached prompt tokens separately."""
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        report_usage(
+            self.name,
+            model,
+            usage.input_tokens + cache_read + cache_write,
+            usage.output_tokens,
+            cache_read,
+        )
+
+    def warm_up(self) -> None:
+        """Create the Anthropic client ahead of the first request."""
+        self._get_client()
 
     @property
     def name(self) -> str:
@@ -47,15 +97,33 @@ class AnthropicProvider(BaseProvider):
 
     def get_default_model(self) -> str:
         """Return the default model for Anthropic."""
-        return os.getenv("MODEL_NAME", self.DEFAULT_MODEL)
+        return (
+            os.getenv("ANTHROPIC_MODEL_NAME")
+            or os.getenv("MODEL_NAME", self.DEFAULT_MODEL)
+        )
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return the model used for small changes when the cascade is enabled."""
+        return (
+            os.getenv("ANTHROPIC_FAST_MODEL_NAME")
+            or os.getenv("FAST_MODEL_NAME", self.DEFAULT_FAST_MODEL)
+        )
 
-    def chat_completion(self, prompt: str, model: Optional[str] = None) -> str:
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
         """Send a chat completion request to Anthropic.
 
         Args
         ----
             prompt: The user prompt to send.
             model: Optional model override.
+            system: Optional static instructions, sent as a cached system prompt.
+            deadline: Optional time.monotonic() value by which to finish.
 
         Returns
         -------
@@ -63,11 +131,45 @@ class AnthropicProvider(BaseProvider):
         """
         model_to_use = model or self.get_default_model()
 
-        response = self._client.messages.create(
-            model=model_to_use,
-            max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}],
+        args = self._request_args(model_to_use, prompt, system)
+
+        response = call_with_retries(
+            lambda timeout: self._get_client().messages.create(**args, timeout=timeout),
+            deadline,
         )
 
+        self._report_usage(model_to_use, response.usage)
+
         # Anthropic returns a list of content blocks
         return response.content[0].text.strip()
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Stream a message from Anthropic, yielding text as it arrives.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override.
+            system: Optional static instructions, sent as a cached system prompt.
+            deadline: Optional time.monotonic() value by which to finish.
+
+        Yields
+        ------
+            Text deltas from the model.
+        """
+        model_to_use = model or self.get_default_model()
+
+        args = self._request_args(model_to_use, prompt, system)
+
+        def open_stream(timeout: float) -> Iterator[str]:
+            with self._get_client().messages.stream(**args, timeout=timeout) as stream:
+                yield from stream.text_stream
+                self._report_usage(model_to_use, stream.get_final_message().usage)
+
+        yield from stream_with_retries(open_stream, deadline)
@@ -1,7 +1,226 @@
 """Base provider abstract class defining the interface all LLM providers must implement."""
 
+import os
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, overload
+RETRYABLE_STATUS_CODES = frozenset([408, 409, 429, 500, 502, 503, 504, 529])
+
+# SDK exception classes (OpenAI and Anthropic share these names) that carry
+# no status code but are transient
+_RETRYABLE_ERROR_NAMES = frozenset(["APIConnectionError", "APITimeoutError"])
+
+# HTTP statuses caused by the request or configuration rather than the
+# backend's health: bad request, bad credentials, unknown model
+CONFIGURATION_STATUS_CODES = frozenset([400, 401, 403, 404, 422])
+
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 8.0
+
+# Receives (provider name, model, input tokens, output tokens, cached input tokens)
+UsageCallback = Callable[[str, str, int, int, int], None]
+
+_usage_callback: Optional[UsageCallback] = None
+
+
+def set_usage_callback(callback: Optional[UsageCallback]) -> None:
+    """Register a function that receives the token usage of every response."""
+    global _usage_callback
+    _usage_callback = callback
+
+
+def report_usage(
+    provider_name: str,
+    model: str,
+    input_tokens: Optional[int],
+    output_tokens: Optional[int],
+    cached_input_tokens: Optional[int] = 0,
+) -> None:
+    """Pass the token usage of one response to the registered callback, if any.
+
+    input_tokens counts the whole prompt, including any part served from
+    the provider's prompt cache, which cached_input_tokens counts separately.
+    """
+    callback = _usage_callback
+    if callback is not None:
+        callback(
+            provider_name, model, input_tokens or 0, output_tokens or 0, cached_input_tokens or 0
+        )
+
+
+def report_chat_usage(provider_name: str, model: str, usage) -> None:
+    """Report the ``usage`` object of an OpenAI-style chat completion, if present."""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    report_usage(
+        provider_name,
+        model,
+        usage.prompt_tokens,
+        usage.completion_tokens,
+        getattr(details, "cached_tokens", 0),
+    )
+
+
+def chat_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+    """Build an OpenAI-style message list with an optional leading system message.
+
+    Keeping the static instructions in a separate first message gives every
+    request the same prefix, which the API can then serve from its prompt cache.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+    return messages
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class ProviderChainError(RuntimeError):
+
+    """Raised by a wrapper when every backend it tried has failed.
+
+    Attributes
+    ----------
+        errors: (backend name, exception) of each failed attempt.
+        retryable: True if every backend failed with a transient error, so
+            the chain as a whole may succeed when asked again.
+    """
+
+    def __init__(self, summary: str, errors: Sequence[Tuple[str, Exception]]):
+        details = "\n  ".join(f"{name}: {error}" for name, error in errors)
+        super().__init__(f"{summary}:\n  {details}" if errors else summary)
+        self.errors = list(errors)
+        self.retryable = bool(errors) and all(is_retryable(e) for _, e in errors)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True if a failed request may succeed when sent again."""
+    if isinstance(error, ProviderChainError):
+        return error.retryable
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_ERROR_NAMES:
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def is_configuration_error(error: Exception) -> bool:
+    """Return True if a request failed because of its model or credentials.
+
+    Such errors say nothing about a backend's availability, so they must
+    not trip a circuit breaker.
+    """
+    if isinstance(error, ValueError):
+        return True
+    return getattr(error, "status_code", None) in CONFIGURATION_STATUS_CODES
+
+
+def model_for(provider: "BaseProvider", model: Optional[str]) -> Optional[str]:
+    """Return the model override if it is one of the provider's own models.
+
+    Wrappers that chain several backends report the models of one of them;
+    passing that name to another backend would request a model it does not
+    have, so every other backend gets None and uses its default.
+    """
+    if model is None or model in (provider.get_default_model(), provider.get_fast_model()):
+        return model
+    return None
+
+
+def _remaining(deadline: Optional[float], timeout: float) -> float:
+    """Cap an attempt timeout by the time left until the deadline."""
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Deadline exceeded before the request could be sent")
+    return min(timeout, remaining)
+
+
+def _backoff(attempt: int, deadline: Optional[float], error: Exception) -> None:
+    """Sleep before a retry using full-jitter exponential backoff.
+
+    Raises the original error instead when the pause would run past the
+    deadline.
+    """
+    delay = random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise error
+    time.sleep(delay)
+
+
+def call_with_retries(call: Callable[[float], T], deadline: Optional[float] = None) -> T:
+    """Run a request with per-attempt timeouts and jittered exponential retry.
+
+    Args
+    ----
+        call: Sends one request; receives the timeout for that attempt in seconds.
+        deadline: Optional time.monotonic() value by which the call must finish.
+
+    Environment variables:
+        COMMIT_REQUEST_TIMEOUT: Seconds allowed per attempt (default 30).
+        COMMIT_MAX_RETRIES: Retries after the first attempt (default 2).
+
+    Returns
+    -------
+        The result of the first successful attempt.
+
+    Raises
+    ------
+        Exception: The last error once retries or the deadline are exhausted,
+            or immediately for errors that are not retryable.
+    """
+    attempts = int(_env_number("COMMIT_MAX_RETRIES", 2)) + 1
+    timeout = _env_number("COMMIT_REQUEST_TIMEOUT", 30)
+
+    attempt = 0
+    while True:
+        try:
+            return call(_remaining(deadline, timeout))
+        except Exception as e:
+            attempt += 1
+            if attempt >= attempts or not is_retryable(e):
+                raise
+            _backoff(attempt - 1, deadline, e)
+
+
+def stream_with_retries(
+    open_stream: Callable[[float], Iterator[str]], deadline: Optional[float] = None
+) -> Iterator[str]:
+    """Stream a response, retrying like call_with_retries until the first chunk.
+
+    Once text has been yielded errors are raised, because the caller has
+    already shown part of the response. The deadline is also checked
+    between chunks.
+    """
+    attempts = int(_env_number("COMMIT_MAX_RETRIES", 2)) + 1
+    timeout = _env_number("COMMIT_REQUEST_TIMEOUT", 30)
+
+    for attempt in range(attempts):
+        streamed = False
+        try:
+            for chunk in open_stream(_remaining(deadline, timeout)):
+                streamed = True
+                yield chunk
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("Deadline exceeded while streaming the response")
+            return
+        except Exception as e:
+            if streamed or attempt + 1 >= attempts or not is_retryable(e):
+                raise
+            _backoff(attempt, deadline, e)
 
 
 class BaseProvider(ABC):
@@ -17,8 +236,17 @@ class BaseProvider(ABC):
     def name(self) -> str:
         """Get the provider name."""
 
+    # Output token limit; commit messages and diff summaries are short
+    DEFAULT_MAX_OUTPUT_TOKENS = 1024
+
     @abstractmethod
-    def chat_completion(self, prompt: str, model: Optional[str] = None) -> str:
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
         """
         Send a chat completion request and return the response text.
 
@@ -26,6 +254,11 @@ class BaseProvider(ABC):
         ----
             prompt: The user prompt to send to the LLM.
             model: Optional model override. If not provided, uses the default model.
+            system: Optional static instructions sent ahead of the prompt.
+                They should not change between requests so that providers
+                can cache them.
+            deadline: Optional time.monotonic() value by which the request,
+                including retries, must finish.
 
         Returns
         -------
@@ -37,6 +270,114 @@ class BaseProvider(ABC):
 
         """
 
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Send a chat completion request and yield response text as it arrives.
+
+        Providers that support server-sent streaming override this. The
+        default implementation yields the complete response as a single chunk.
+
+        Args
+        ----
+            prompt: The user prompt to send to the LLM.
+            model: Optional model override. If not provided, uses the default model.
+            system: Optional static instructions sent ahead of the prompt.
+            deadline: Optional time.monotonic() value by which the stream must finish.
+
+        Yields
+        ------
+            Chunks of response text in order. Chunks are not stripped.
+
+        """
+        yield self.chat_completion(prompt, model, system, deadline)
+
+    def generate_candidates(
+        self,
+        prompt: str,
+        count: int,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        """
+        Request several independent completions of the same prompt.
+
+        Providers whose API can return multiple choices in one request
+        override this. The default implementation sends the requests in
+        parallel and keeps the ones that succeed.
+
+        Args
+        ----
+            prompt: The user prompt to send to the LLM.
+            count: Number of candidates to request.
+            model: Optional model override. If not provided, uses the default model.
+            system: Optional static instructions sent ahead of the prompt.
+            deadline: Optional time.monotonic() value by which all requests must finish.
+
+        Returns
+        -------
+            The successful responses, in request order.
+
+        Raises
+        ------
+            Exception: The first error if every request failed.
+
+        """
+        def attempt(_index: int):
+            try:
+                return self.chat_completion(prompt, model, system, deadline), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            results = list(executor.map(attempt, range(count)))
+
+        texts = [text for text, _error in results if text is not None]
+        if not texts:
+            raise results[0][1]
+        return texts
+
+    def candidate_requests(self, count: int) -> int:
+        """Return how many API requests generate_candidates(count) sends.
+
+        Used by rate limiting; providers that ask for several choices in
+        one request override this.
+        """
+        return count
+
+    def max_output_tokens(self) -> int:
+        """Return the output token limit, overridable with COMMIT_MAX_OUTPUT_TOKENS."""
+        return int(_env_number("COMMIT_MAX_OUTPUT_TOKENS", self.DEFAULT_MAX_OUTPUT_TOKENS))
+
+    def warm_up(self) -> None:
+        """Load the SDK and create the API client ahead of the first request.
+
+        Providers create their client lazily so that runs answered without
+        an API call never pay the SDK import. Long-lived callers use this
+        to pay that cost up front instead.
+        """
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return a faster, cheaper model for small changes, if the provider has one.
+
+        Used by the model cascade in providers.factory.route_models.
+        """
+        return None
+
+    def model_signature(self) -> str:
+        """Return the models this provider may answer with, for cache keys.
+
+        Unlike get_default_model this must not depend on runtime state such
+        as backend health, so identical requests keep the same key.
+        """
+        return f"{self.get_default_model()},{self.get_fast_model() or ''}"
+
     @abstractmethod
     def get_default_model(self) -> str:
         """Return the default model for this provider.
@@ -4,17 +4,24 @@ This module provides a factory function to get the appropriate LLM
 provider based on environment configuration.
 """
 
+import importlib
 import os
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
 
 from providers.base import BaseProvider
-from providers.openai_provider import OpenAIProvider
-from providers.anthropic_provider import AnthropicProvider
-from providers.openai_compatible import OpenAICompatibleProvider
 
 
+# Provider name -> (module, class). Modules are imported on first use so a
+# run only ever loads the SDK of the provider it actually talks to.
+_PROVIDER_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "anthropic": ("providers.anthropic_provider", "AnthropicProvider"),
+    "openai": ("providers.openai_provider", "OpenAIProvider"),
+    "openai-compatible": ("providers.openai_compatible", "OpenAICompatibleProvider"),
+}
+
 # Valid provider names for explicit selection
-VALID_PROVIDERS = frozenset(["anthropic", "openai", "openai-compatible"])
+VALID_PROVIDERS = frozenset(_PROVIDER_REGISTRY)
 
 
 class ProviderConfigurationError(Exception):
@@ -27,13 +34,19 @@ class InvalidProviderError(Exception):
     """Raised when an invalid provider name is specified."""
 
 
-def get_provider(provider_name: Optional[str] = None) -> BaseProvider:
+def get_provider(
+    provider_name: Optional[str] = None,
+    state_dir: Optional[Path] = None,
+) -> BaseProvider:
     """
     Get an LLM provider instance.
 
     If provider_name is specified, returns that specific provider.
-    Otherwise, checks the PROVIDER environment variable.
-    If PROVIDER is not set, auto-detects based on available API keys.
+    Otherwise, if PROVIDER_CHAIN is set, returns a FailoverProvider trying
+    those providers in turn, and if HEDGE_PROVIDERS lists several providers,
+    returns a HedgedProvider racing them. Otherwise, checks the PROVIDER
+    environment variable. If PROVIDER is not set, auto-detects based on
+    available API keys.
 
     Auto-detection priority order:
     1. Anthropic (if ANTHROPIC_API_KEY is set)
@@ -43,6 +56,9 @@ def get_provider(provider_name: Optional[str] = None) -> BaseProvider:
     Args
     ----
         provider_name: Optional explicit provider name ('anthropic', 'openai', 'openai-compatible').
+        state_dir: Optional directory for state persisted between runs, such as
+            the failover chain's circuit breakers and latency record and the
+            rate limit buckets shared between processes.
 
     Returns
     -------
@@ -54,6 +70,16 @@ def get_provider(provider_name: Optional[str] = None) -> BaseProvider:
         ProviderConfigurationError: If no provider can be configured.
 
     """
+    if not provider_name:
+        if os.getenv("PROVIDER_CHAIN") and os.getenv("HEDGE_PROVIDERS"):
+            raise ProviderConfigurationError(
+                "PROVIDER_CHAIN and HEDGE_PROVIDERS cannot be combined. Set only one of them."
+            )
+        if os.getenv("PROVIDER_CHAIN"):
+            return _create_failover_provider(state_dir)
+        if os.getenv("HEDGE_PROVIDERS"):
+            return _create_hedged_provider(state_dir)
+
     # Determine provider name
     name = provider_name or os.getenv("PROVIDER")
 
@@ -64,56 +90,241 @@ def get_provider(provider_name: Optional[str] = None) -> BaseProvider:
             raise InvalidProviderError(
                 f"Invalid provider '{name}'. Valid providers are: {', '.join(sorted(VALID_PROVIDERS))}"
             )
-        return _create_provider(name)
+        return _create_provider(name, state_dir)
 
     # Auto-detection mode
-    return _auto_detect_provider()
+    return _auto_detect_provider(state_dir)
+
+
+def _load_provider_class(name: str) -> Type[BaseProvider]:
+    """Import and return the provider class registered under name.
+
+    Args
+    ----
+        name: The provider name.
+
+    Returns
+    -------
+        The provider class.
+    """
+    if name not in _PROVIDER_REGISTRY:
+        raise InvalidProviderError(f"Unknown provider: {name}")
 
+    module_name, class_name = _PROVIDER_REGISTRY[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
 
-def _create_provider(name: str) -> BaseProvider:
+
+def _create_provider(name: str, state_dir: Optional[Path] = None) -> BaseProvider:
     """Create a provider instance by name.
 
+    Unless COMMIT_RATE_LIMIT is disabled, the provider is wrapped so its
+    requests wait for rate limit budget, shared through state_dir.
+
     Args
     ----
         name: The provider name.
+        state_dir: Optional directory holding the shared rate limit state.
 
     Returns
     -------
         A configured provider instance.
     """
-    if name == "anthropic":
-        return AnthropicProvider()
-    elif name == "openai":
-        return OpenAIProvider()
-    elif name == "openai-compatible":
-        return OpenAICompatibleProvider()
-    else:
-        raise InvalidProviderError(f"Unknown provider: {name}")
+    provider = _load_provider_class(name)()
+    if os.getenv("COMMIT_RATE_LIMIT", "1").strip().lower() in ("0", "false", "no", "off"):
+        return provider
 
+    from providers.rate_limit import RateLimitedProvider, get_limiter
 
-def _auto_detect_provider() -> BaseProvider:
+    return RateLimitedProvider(provider, get_limiter(state_dir))
+
+
+def _parse_provider_list(value: str) -> List[str]:
+    """Parse a comma-separated list of provider names.
+
+    Args
+    ----
+        value: Provider names such as "anthropic,openai".
+
+    Returns
+    -------
+        The normalized names in order, without duplicates.
+
+    Raises
+    ------
+        InvalidProviderError: If a name is not a valid provider.
     """
-    Auto-detect and return the appropriate provider based on available API keys.
+    names: List[str] = []
+    for raw in value.split(","):
+        name = raw.lower().strip()
+        if not name or name in names:
+            continue
+        if name not in VALID_PROVIDERS:
+            raise InvalidProviderError(
+                f"Invalid provider '{name}'. Valid providers are: {', '.join(sorted(VALID_PROVIDERS))}"
+            )
+        names.append(name)
+    return names
+
+
+def _create_hedged_provider(state_dir: Optional[Path]) -> BaseProvider:
+    """Create a HedgedProvider from HEDGE_PROVIDERS and HEDGE_AFTER_SECONDS.
+
+    Without HEDGE_AFTER_SECONDS (or with "auto") each backend is hedged
+    after its p95 latency from the health record shared with PROVIDER_CHAIN.
+
+    Args
+    ----
+        state_dir: Optional directory for the latency record and the shared
+            rate limit state.
 
     Returns
     -------
-        A configured provider instance.
+        A provider racing the configured backends.
 
     Raises
     ------
-        ProviderConfigurationError: If no API keys are found.
+        ProviderConfigurationError: If fewer than two providers are listed
+            or the hedge delay is not a number.
     """
-    # Check for Anthropic (highest priority)
-    if os.getenv("ANTHROPIC_API_KEY"):
-        return AnthropicProvider()
+    from providers.failover import ProviderHealth
+    from providers.hedged import HedgedProvider
+
+    names = _parse_provider_list(os.getenv("HEDGE_PROVIDERS", ""))
+    if len(names) < 2:
+        raise ProviderConfigurationError(
+            "HEDGE_PROVIDERS must list at least two providers, e.g. \"anthropic,openai\"."
+        )
+
+    setting = os.getenv("HEDGE_AFTER_SECONDS", "").strip().lower()
+    try:
+        hedge_after = None if setting in ("", "auto") else float(setting)
+    except ValueError as e:
+        raise ProviderConfigurationError(
+            "HEDGE_AFTER_SECONDS must be a number of seconds or \"auto\"."
+        ) from e
+
+    health = ProviderHealth(state_dir / "provider-health.json" if state_dir else None)
+    return HedgedProvider(
+        [_create_provider(n, state_dir) for n in names], hedge_after, health
+    )
 
-    # Check for OpenAI
-    if os.getenv("OPENAI_API_KEY"):
-        return OpenAIProvider()
 
-    # Check for OpenAI-compatible
+def _create_failover_provider(state_dir: Optional[Path]) -> BaseProvider:
+    """Create a FailoverProvider from PROVIDER_CHAIN.
+
+    PROVIDER_CHAIN is a comma-separated list of provider names, or "auto"
+    for every provider whose credentials are configured, in auto-detection
+    priority order.
+
+    Args
+    ----
+        state_dir: Optional directory for the persisted health record and
+            rate limit state.
+
+    Returns
+    -------
+        A provider failing over across the configured backends.
+
+    Raises
+    ------
+        ProviderConfigurationError: If the chain is empty or settings are invalid.
+    """
+    from providers.failover import FailoverProvider, ProviderHealth
+
+    chain = os.getenv("PROVIDER_CHAIN", "").strip().lower()
+    names = _configured_provider_names() if chain == "auto" else _parse_provider_list(chain)
+    if not names:
+        raise ProviderConfigurationError(
+            "PROVIDER_CHAIN does not name any configured provider."
+        )
+
+    try:
+        health = ProviderHealth(
+            state_dir / "provider-health.json" if state_dir else None,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3")),
+            cooldown_seconds=float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "300")),
+        )
+    except ValueError as e:
+        raise ProviderConfigurationError(
+            "CIRCUIT_FAILURE_THRESHOLD and CIRCUIT_COOLDOWN_SECONDS must be numbers."
+        ) from e
+
+    return FailoverProvider([_create_provider(n, state_dir) for n in names], health)
+
+
+def route_models(provider: BaseProvider, diff_tokens: int, file_count: int) -> List[str]:
+    """Choose the models to try for a change, in order.
+
+    With MODEL_CASCADE enabled, changes of at most CASCADE_MAX_TOKENS
+    estimated tokens touching at most CASCADE_MAX_FILES files go to the
+    provider's fast model first, followed by the default model as the
+    escalation step. Everything else goes straight to the default model.
+
+    Args
+    ----
+        provider: The provider that will serve the request.
+        diff_tokens: Estimated size of the diff in tokens.
+        file_count: Number of changed files.
+
+    Returns
+    -------
+        One or two model names; later ones are used if earlier output fails
+        local validation.
+    """
+    default_model = provider.get_default_model()
+    if os.getenv("MODEL_CASCADE", "0").strip().lower() in ("", "0", "false", "no", "off"):
+        return [default_model]
+
+    fast_model = provider.get_fast_model()
+    if not fast_model or fast_model == default_model:
+        return [default_model]
+
+    try:
+        max_tokens = int(os.getenv("CASCADE_MAX_TOKENS", "2000"))
+        max_files = int(os.getenv("CASCADE_MAX_FILES", "5"))
+    except ValueError as e:
+        raise ProviderConfigurationError(
+            "CASCADE_MAX_TOKENS and CASCADE_MAX_FILES must be whole numbers."
+        ) from e
+
+    if diff_tokens <= max_tokens and file_count <= max_files:
+        return [fast_model, default_model]
+    return [default_model]
+
+
+def _configured_provider_names() -> List[str]:
+    """Return the providers whose credentials are set, in auto-detection order."""
+    names: List[str] = []
+    if os.getenv("ANTHROPIC_API_KEY"):
+        names.append("anthropic")
+    if os.getenv("OPENAI_API_KEY"):
+        names.append("openai")
     if os.getenv("OPENAI_COMPATIBLE_API_KEY") and os.getenv("OPENAI_COMPATIBLE_BASE_URL"):
-        return OpenAICompatibleProvider()
+        names.append("openai-compatible")
+    return names
+
+
+def _auto_detect_provider(state_dir: Optional[Path] = None) -> BaseProvider:
+    """
+    Auto-detect and return the appropriate provider based on available API keys.
+
+    Args
+    ----
+        state_dir: Optional directory for the shared rate limit state.
+
+    Returns
+    -------
+        A configured provider instance.
+
+    Raises
+    ------
+        ProviderConfigurationError: If no API keys are found.
+    """
+    # Priority: Anthropic, then OpenAI, then OpenAI-compatible
+    configured = _configured_provider_names()
+    if configured:
+        return _create_provider(configured[0], state_dir)
 
     # No provider found
     raise ProviderConfigurationError(
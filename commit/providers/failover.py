@@ -0,0 +1,296 @@
+"""Failover provider with per-backend circuit breakers and latency routing.
+
+Backends are tried one after another until one answers. Each backend has a
+circuit breaker: after repeated failures it is skipped for a cooldown
+period, after which a single trial request decides whether it closes again.
+Among healthy backends the one with the best recent median latency is tried
+first. Breaker state and latency samples are persisted between runs, so one
+developer's timeout spares the next commit from paying it again.
+"""
+
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from providers.base import (
+    BaseProvider,
+    ProviderChainError,
+    is_configuration_error,
+    model_for,
+)
+from providers.state_file import locked_state, read_state
+
+
+class ProviderHealth:
+
+    """Circuit breaker state and rolling latency record for each backend.
+
+    The state is kept in a small JSON file when a path is given and only in
+    memory otherwise. Every update re-reads the file under a lock and
+    changes only the affected backend, so concurrent processes do not
+    overwrite each other's records.
+    """
+
+    _MAX_SAMPLES = 20
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 300.0,
+    ):
+        """Initialize the health record.
+
+        Args
+        ----
+            path: Optional JSON file used to persist state between runs.
+            failure_threshold: Consecutive failures that open a breaker.
+            cooldown_seconds: How long an open breaker skips its backend.
+        """
+        self._path = path
+        self._failure_threshold = failure_threshold
+        self._cooldown_seconds = cooldown_seconds
+        # Hedged requests record from several threads at once
+        self._lock = threading.Lock()
+        self._state: Dict[str, dict] = read_state(path) if path else {}
+
+    def is_available(self, name: str) -> bool:
+        """Return True if the breaker is closed or its cooldown has elapsed."""
+        opened_at = self._entry(name).get("opened_at")
+        return opened_at is None or time.time() - opened_at >= self._cooldown_seconds
+
+    def median_latency(self, name: str) -> Optional[float]:
+        """Return the median of recent successful request latencies, if any."""
+        samples = self._entry(name).get("latencies", [])
+        return statistics.median(samples) if samples else None
+
+    def latency_percentile(self, name: str, percentile: int, min_samples: int = 5) -> Optional[float]:
+        """Return a percentile of recent latencies, or None with too few samples."""
+        samples = self._entry(name).get("latencies", [])
+        if len(samples) < max(2, min_samples):
+            return None
+        return statistics.quantiles(samples, n=100, method="inclusive")[percentile - 1]
+
+    def rank(self, names: List[str]) -> List[str]:
+        """Order backends: available first, then by recent latency, then as given.
+
+        Backends with an open breaker are kept at the end as a last resort.
+        Backends without latency samples sort first so that each one is
+        measured once, which also makes the first request after a breaker's
+        cooldown its trial request.
+        """
+        def key(indexed):
+            index, name = indexed
+            latency = self.median_latency(name)
+            return (
+                not self.is_available(name),
+                latency if latency is not None else 0.0,
+                index,
+            )
+
+        return [name for _index, name in sorted(enumerate(names), key=key)]
+
+    def record_success(self, name: str, latency: float) -> None:
+        """Close the breaker and add a latency sample."""
+        def update(entry: dict) -> None:
+            entry["failures"] = 0
+            entry["opened_at"] = None
+            entry["latencies"] = (entry.get("latencies", []) + [round(latency, 3)])[
+                -self._MAX_SAMPLES:
+            ]
+
+        self._update(name, update)
+
+    def record_failure(self, name: str, error: str) -> None:
+        """Count a failure and open the breaker once the threshold is reached."""
+        def update(entry: dict) -> None:
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["last_error"] = error[:200]
+            if entry["failures"] >= self._failure_threshold:
+                entry["opened_at"] = time.time()
+
+        self._update(name, update)
+
+    def _entry(self, name: str) -> dict:
+        return self._state.setdefault(name, {})
+
+    def _update(self, name: str, update: Callable[[dict], None]) -> None:
+        """Apply update to a backend's entry, merged into the latest saved state."""
+        with self._lock:
+            if self._path:
+                try:
+                    with locked_state(self._path) as state:
+                        update(state.setdefault(name, {}))
+                    self._state = state
+                    return
+                except OSError:
+                    # Health tracking is best effort and must never fail a commit
+                    pass
+            update(self._entry(name))
+
+
+def _deadline_message(errors: List[Tuple[str, Exception]]) -> str:
+    details = "".join(f"\n  {name}: {error}" for name, error in errors)
+    return "Deadline passed before the provider chain answered:" + details
+
+
+class FailoverProvider(BaseProvider):
+
+    """Provider that tries an ordered chain of backends until one succeeds.
+
+    The order is recomputed for every request from the persisted health
+    record. An explicit model override only applies to the backend that
+    owns that model; the others use their own default model. Errors caused
+    by the model or credentials fail over without counting against the
+    backend's breaker.
+    """
+
+    def __init__(self, providers: List[BaseProvider], health: ProviderHealth):
+        """Initialize the failover provider.
+
+        Args
+        ----
+            providers: Backends in configured priority order.
+            health: Circuit breaker and latency record shared by the backends.
+
+        Raises
+        ------
+            ValueError: If no providers are given.
+        """
+        if not providers:
+            raise ValueError("FailoverProvider needs at least one provider")
+        self._providers = {p.name: p for p in providers}
+        self._order = [p.name for p in providers]
+        self._health = health
+
+    @property
+    def name(self) -> str:
+        """Return the provider name, listing the chained backends."""
+        return "failover:" + ",".join(self._order)
+
+    def get_default_model(self) -> str:
+        """Return the default model of the backend that would be tried first."""
+        return self._providers[self._health.rank(self._order)[0]].get_default_model()
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return the fast model of the backend that would be tried first."""
+        return self._providers[self._health.rank(self._order)[0]].get_fast_model()
+
+    def model_signature(self) -> str:
+        """Return the models of every backend in configured order, ignoring health."""
+        return ";".join(f"{name}={self._providers[name].model_signature()}" for name in self._order)
+
+    def warm_up(self) -> None:
+        """Create the clients of all chained backends."""
+        for provider in self._providers.values():
+            provider.warm_up()
+
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Send the prompt to the best available backend, failing over on errors.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override for the backend that owns it.
+            system: Optional static instructions passed to every backend.
+            deadline: Optional time.monotonic() value shared by all attempts.
+
+        Returns
+        -------
+            The text response from the first backend that succeeded.
+
+        Raises
+        ------
+            ProviderChainError: If every backend failed.
+            TimeoutError: If the deadline passed before every backend was tried.
+        """
+        errors: List[Tuple[str, Exception]] = []
+
+        for name in self._health.rank(self._order):
+            provider = self._providers[name]
+            if errors:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(_deadline_message(errors))
+                print(f"Failing over to {name}")
+
+            started = time.monotonic()
+            try:
+                text = provider.chat_completion(
+                    prompt, model_for(provider, model), system, deadline
+                )
+            except Exception as e:
+                if not is_configuration_error(e):
+                    self._health.record_failure(name, str(e))
+                errors.append((name, e))
+                continue
+
+            self._health.record_success(name, time.monotonic() - started)
+            return text
+
+        raise ProviderChainError("All providers in the chain failed", errors)
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Stream from the best available backend, failing over before the first chunk.
+
+        Once a backend has produced output its errors are raised, because the
+        caller has already shown part of its response.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override for the backend that owns it.
+            system: Optional static instructions passed to every backend.
+            deadline: Optional time.monotonic() value shared by all attempts.
+
+        Yields
+        ------
+            Text chunks from the backend that answered.
+
+        Raises
+        ------
+            ProviderChainError: If every backend failed before producing output.
+            TimeoutError: If the deadline passed before every backend was tried.
+        """
+        errors: List[Tuple[str, Exception]] = []
+
+        for name in self._health.rank(self._order):
+            provider = self._providers[name]
+            if errors:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(_deadline_message(errors))
+                print(f"Failing over to {name}")
+
+            started = time.monotonic()
+            streamed = False
+            try:
+                for chunk in provider.stream_completion(
+                    prompt, model_for(provider, model), system, deadline
+                ):
+                    streamed = True
+                    yield chunk
+            except Exception as e:
+                if not is_configuration_error(e):
+                    self._health.record_failure(name, str(e))
+                if streamed:
+                    raise
+                errors.append((name, e))
+                continue
+
+            self._health.record_success(name, time.monotonic() - started)
+            return
+
+        raise ProviderChainError("All providers in the chain failed", errors)
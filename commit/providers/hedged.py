@@ -0,0 +1,287 @@
+"""Hedged provider that races several backends to cut tail latency.
+
+The prompt goes to the primary provider first. If it has not answered
+within the hedge delay (roughly the backend's p95 latency), the same prompt
+is sent to the next provider, and so on. The first successful response wins
+and the remaining requests are abandoned. Streams are hedged the same way:
+the first backend to produce a token is committed to and the others are
+dropped.
+"""
+
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from providers.base import BaseProvider, ProviderChainError
+
+if TYPE_CHECKING:
+    from providers.failover import ProviderHealth
+
+# Hedge delay used until a backend has enough latency samples
+DEFAULT_HEDGE_AFTER = 3.0
+
+# Latency percentile a backend gets before the next one is started
+_HEDGE_PERCENTILE = 95
+
+
+class HedgedProvider(BaseProvider):
+
+    """Provider that wraps several backends and returns the fastest answer.
+
+    Backends are tried in order. A backend is started early when the
+    previous one exceeds the hedge delay, and immediately when it fails.
+    Only the primary receives an explicit model override; backups always
+    use their own default model.
+    """
+
+    def __init__(
+        self,
+        providers: List[BaseProvider],
+        hedge_after: Optional[float] = DEFAULT_HEDGE_AFTER,
+        health: Optional["ProviderHealth"] = None,
+    ):
+        """Initialize the hedged provider.
+
+        Args
+        ----
+            providers: Backends in priority order. At least two are required.
+            hedge_after: Seconds to wait for a backend before starting the
+                next, or None to use each backend's p95 latency from health.
+            health: Optional latency record; every completed request adds
+                a sample to it.
+
+        Raises
+        ------
+            ValueError: If fewer than two providers are given.
+        """
+        if len(providers) < 2:
+            raise ValueError("HedgedProvider needs at least two providers")
+        self._providers = providers
+        self._hedge_after = hedge_after
+        self._health = health
+
+    @property
+    def name(self) -> str:
+        """Return the provider name, listing the wrapped backends."""
+        return "hedged:" + ",".join(p.name for p in self._providers)
+
+    def get_default_model(self) -> str:
+        """Return the default model of the primary backend."""
+        return self._providers[0].get_default_model()
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return the fast model of the primary backend."""
+        return self._providers[0].get_fast_model()
+
+    def model_signature(self) -> str:
+        """Return the models of every backend in priority order."""
+        return ";".join(f"{p.name}={p.model_signature()}" for p in self._providers)
+
+    def warm_up(self) -> None:
+        """Create the clients of all wrapped backends."""
+        for provider in self._providers:
+            provider.warm_up()
+
+    def hedge_delay(self, provider: BaseProvider) -> float:
+        """Return how long to wait for a backend before starting the next one.
+
+        A fixed hedge_after wins; otherwise the backend's recent p95 latency
+        is used once enough samples exist.
+        """
+        if self._hedge_after is not None:
+            return self._hedge_after
+        if self._health is not None:
+            p95 = self._health.latency_percentile(provider.name, _HEDGE_PERCENTILE)
+            if p95 is not None:
+                return p95
+        return DEFAULT_HEDGE_AFTER
+
+    def _record_latency(self, provider: BaseProvider, started: float) -> None:
+        if self._health is not None:
+            self._health.record_success(provider.name, time.monotonic() - started)
+
+    def _wait(self, launched: int, deadline: Optional[float]) -> Optional[float]:
+        """Return the queue timeout: until the next hedge or the deadline."""
+        wait = None
+        if launched < len(self._providers):
+            wait = self.hedge_delay(self._providers[launched - 1])
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+            wait = remaining if wait is None else min(wait, remaining)
+        return wait
+
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Send the prompt with hedging and return the first successful response.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override for the primary backend.
+            system: Optional static instructions passed to every backend.
+            deadline: Optional time.monotonic() value by which an answer is needed.
+
+        Returns
+        -------
+            The text response of whichever backend answered first.
+
+        Raises
+        ------
+            ProviderChainError: If every backend failed.
+            TimeoutError: If no backend answered before the deadline.
+        """
+        results: "queue.Queue[Tuple[BaseProvider, Optional[str], Optional[Exception]]]" = (
+            queue.Queue()
+        )
+        errors: List[Tuple[str, Exception]] = []
+        launched = 0
+        in_flight = 0
+
+        def run(provider: BaseProvider, provider_model: Optional[str]) -> None:
+            started = time.monotonic()
+            try:
+                text = provider.chat_completion(prompt, provider_model, system, deadline)
+            except Exception as e:
+                results.put((provider, None, e))
+                return
+            # Recorded even when another backend already won, so slow
+            # backends are measured too
+            self._record_latency(provider, started)
+            results.put((provider, text, None))
+
+        def launch() -> None:
+            nonlocal launched, in_flight
+            provider = self._providers[launched]
+            provider_model = model if launched == 0 else None
+            # Daemon threads so an abandoned slow request never delays exit
+            threading.Thread(target=run, args=(provider, provider_model), daemon=True).start()
+            launched += 1
+            in_flight += 1
+
+        launch()
+        while in_flight:
+            try:
+                provider, text, error = results.get(timeout=self._wait(launched, deadline))
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("No hedged provider answered before the deadline")
+                launch()
+                continue
+
+            in_flight -= 1
+            if error is None:
+                return text
+
+            errors.append((provider.name, error))
+            if launched < len(self._providers):
+                launch()
+
+        raise ProviderChainError("All hedged providers failed", errors)
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Stream from whichever backend produces the first token.
+
+        Backends are started as in chat_completion. Once one of them yields
+        a chunk the stream is committed to it: the others stop reading and
+        its later errors are raised, because part of its response has
+        already been shown.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override for the primary backend.
+            system: Optional static instructions passed to every backend.
+            deadline: Optional time.monotonic() value by which an answer is needed.
+
+        Yields
+        ------
+            Text chunks from the committed backend.
+
+        Raises
+        ------
+            ProviderChainError: If every backend failed before producing output.
+            TimeoutError: If no backend produced output before the deadline.
+        """
+        # (backend index, "chunk" | "done" | "error", chunk text or exception)
+        events: "queue.Queue[Tuple[int, str, object]]" = queue.Queue()
+        # owner is the committed backend; closed tells every thread to stop
+        state = {"owner": None, "closed": False}
+        errors: List[Tuple[str, Exception]] = []
+        launched = 0
+        in_flight = 0
+
+        def abandoned(index: int) -> bool:
+            return state["closed"] or state["owner"] not in (None, index)
+
+        def run(index: int, provider: BaseProvider, provider_model: Optional[str]) -> None:
+            started = time.monotonic()
+            stream = provider.stream_completion(prompt, provider_model, system, deadline)
+            try:
+                for chunk in stream:
+                    if abandoned(index):
+                        return
+                    events.put((index, "chunk", chunk))
+            except Exception as e:
+                events.put((index, "error", e))
+                return
+            finally:
+                # Closing the generator ends the HTTP stream of a losing backend
+                stream.close()
+            self._record_latency(provider, started)
+            events.put((index, "done", None))
+
+        def launch() -> None:
+            nonlocal launched, in_flight
+            provider_model = model if launched == 0 else None
+            threading.Thread(
+                target=run, args=(launched, self._providers[launched], provider_model),
+                daemon=True,
+            ).start()
+            launched += 1
+            in_flight += 1
+
+        launch()
+        try:
+            while True:
+                owner = state["owner"]
+                if owner is None and not in_flight:
+                    raise ProviderChainError("All hedged providers failed", errors)
+                # After committing, the backend's own deadline checks apply
+                wait = self._wait(launched, deadline) if owner is None else None
+                try:
+                    index, kind, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError("No hedged provider answered before the deadline")
+                    launch()
+                    continue
+
+                if owner is not None and index != owner:
+                    continue
+                if kind == "error":
+                    if owner is not None:
+                        raise payload
+                    in_flight -= 1
+                    errors.append((self._providers[index].name, payload))
+                    if launched < len(self._providers):
+                        launch()
+                    continue
+                if kind == "done":
+                    return
+                if owner is None:
+                    state["owner"] = index
+                yield payload
+        finally:
+            state["closed"] = True
@@ -6,11 +6,15 @@ LLM services.
 """
 
 import os
-from typing import Optional
+from typing import Iterator, Optional
 
-from openai import OpenAI
-
-from providers.base import BaseProvider
+from providers.base import (
+    BaseProvider,
+    call_with_retries,
+    chat_messages,
+    report_chat_usage,
+    stream_with_retries,
+)
 
 
 class OpenAICompatibleProvider(BaseProvider):
@@ -24,6 +28,10 @@ class OpenAICompatibleProvider(BaseProvider):
         OPENAI_COMPATIBLE_API_KEY: Required. API key for the compatible endpoint.
         OPENAI_COMPATIBLE_BASE_URL: Required. Base URL for the compatible endpoint.
         MODEL_NAME: Required for this provider. The model to use.
+        OPENAI_COMPATIBLE_MODEL_NAME: Optional. Model for this provider only,
+            taking precedence over MODEL_NAME when several providers are combined.
+        FAST_MODEL_NAME / OPENAI_COMPATIBLE_FAST_MODEL_NAME: Optional. Model for
+            small changes when MODEL_CASCADE is enabled.
     """
 
     def __init__(
@@ -56,7 +64,22 @@ class OpenAICompatibleProvider(BaseProvider):
                 "Please set OPENAI_COMPATIBLE_BASE_URL environment variable."
             )
 
-        self._client = OpenAI(api_key=self._api_key, base_url=self._base_url)
+        self._client_instance = None
+
+    def _get_client(self):
+        """Return the SDK client, importing the SDK on first use."""
+        if self._client_instance is None:
+            from openai import OpenAI
+
+            # Retries are handled by call_with_retries within the deadline
+            self._client_instance = OpenAI(
+                api_key=self._api_key, base_url=self._base_url, max_retries=0
+            )
+        return self._client_instance
+
+    def warm_up(self) -> None:
+        """Create the OpenAI client ahead of the first request."""
+        self._get_client()
 
     @property
     def name(self) -> str:
@@ -69,7 +92,7 @@ class OpenAICompatibleProvider(BaseProvider):
         Note: For OpenAI-compatible providers, the model must be specified
         via MODEL_NAME environment variable as there's no universal default.
         """
-        model = os.getenv("MODEL_NAME")
+        model = os.getenv("OPENAI_COMPATIBLE_MODEL_NAME") or os.getenv("MODEL_NAME")
         if not model:
             raise ValueError(
                 "MODEL_NAME environment variable is required for openai-compatible provider. "
@@ -77,13 +100,26 @@ class OpenAICompatibleProvider(BaseProvider):
             )
         return model
 
-    def chat_completion(self, prompt: str, model: Optional[str] = None) -> str:
+    def get_fast_model(self) -> Optional[str]:
+        """Return the model for small changes; there is none unless configured."""
+        return os.getenv("OPENAI_COMPATIBLE_FAST_MODEL_NAME") or os.getenv("FAST_MODEL_NAME")
+
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
         """Send a chat completion request to the OpenAI-compatible endpoint.
 
         Args
         ----
             prompt: The user prompt to send.
             model: Optional model override.
+            system: Optional static instructions, sent as a leading system
+                message so the endpoint can reuse its cached prefix.
+            deadline: Optional time.monotonic() value by which to finish.
 
         Returns
         -------
@@ -91,10 +127,55 @@ class OpenAICompatibleProvider(BaseProvider):
         """
         model_to_use = model or self.get_default_model()
 
-        response = self._client.chat.completions.create(
-            model=model_to_use,
-            messages=[{"role": "user", "content": prompt}],
-            stream=False,
+        response = call_with_retries(
+            lambda timeout: self._get_client().chat.completions.create(
+                model=model_to_use,
+                messages=chat_messages(prompt, system),
+                max_tokens=self.max_output_tokens(),
+                stream=False,
+                timeout=timeout,
+            ),
+            deadline,
         )
 
+        report_chat_usage(self.name, model_to_use, response.usage)
         return response.choices[0].message.content.strip()
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Stream a chat completion, yielding text deltas as they arrive.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override.
+            system: Optional static instructions, sent as a leading system
+                message so the endpoint can reuse its cached prefix.
+            deadline: Optional time.monotonic() value by which to finish.
+
+        Yields
+        ------
+            Text deltas from the model.
+        """
+        model_to_use = model or self.get_default_model()
+
+        def open_stream(timeout: float) -> Iterator[str]:
+            stream = self._get_client().chat.completions.create(
+                model=model_to_use,
+                messages=chat_messages(prompt, system),
+                max_tokens=self.max_output_tokens(),
+                stream=True,
+                timeout=timeout,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # Only some servers include usage in streamed responses
+                report_chat_usage(self.name, model_to_use, getattr(chunk, "usage", None))
+
+        yield from stream_with_retries(open_stream, deadline)
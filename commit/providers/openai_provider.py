@@ -1,11 +1,15 @@
 """OpenAI provider implementation using the official OpenAI Python SDK."""
 
 import os
-from typing import Optional
+from typing import Iterator, List, Optional
 
-from openai import OpenAI
-
-from providers.base import BaseProvider
+from providers.base import (
+    BaseProvider,
+    call_with_retries,
+    chat_messages,
+    report_chat_usage,
+    stream_with_retries,
+)
 
 
 class OpenAIProvider(BaseProvider):
@@ -17,10 +21,18 @@ class OpenAIProvider(BaseProvider):
     Environment variables:
         OPENAI_API_KEY: Required. Your OpenAI API key.
         MODEL_NAME: Optional. Override the default model.
+        OPENAI_MODEL_NAME: Optional. Model override for this provider only,
+            taking precedence over MODEL_NAME when several providers are combined.
+        FAST_MODEL_NAME / OPENAI_FAST_MODEL_NAME: Optional. Model for small
+            changes when MODEL_CASCADE is enabled.
     """
 
+    DEFAULT_FAST_MODEL = "gpt-5-mini"
     DEFAULT_MODEL = "gpt-5.5"
 
+    # Reasoning models count their reasoning tokens against this limit
+    DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize the OpenAI provider.
@@ -39,7 +51,20 @@ class OpenAIProvider(BaseProvider):
             raise ValueError(
                 "OpenAI API key not found. Please set OPENAI_API_KEY environment variable."
             )
-        self._client = OpenAI(api_key=self._api_key)
+        self._client_instance = None
+
+    def _get_client(self):
+        """Return the SDK client, importing the SDK on first use."""
+        if self._client_instance is None:
+            from openai import OpenAI
+
+            # Retries are handled by call_with_retries within the deadline
+            self._client_instance = OpenAI(api_key=self._api_key, max_retries=0)
+        return self._client_instance
+
+    def warm_up(self) -> None:
+        """Create the OpenAI client ahead of the first request."""
+        self._get_client()
 
     @property
     def name(self) -> str:
@@ -48,15 +73,34 @@ class OpenAIProvider(BaseProvider):
 
     def get_default_model(self) -> str:
         """Return the default model for OpenAI."""
-        return os.getenv("MODEL_NAME", self.DEFAULT_MODEL)
+        return (
+            os.getenv("OPENAI_MODEL_NAME")
+            or os.getenv("MODEL_NAME", self.DEFAULT_MODEL)
+        )
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return the model used for small changes when the cascade is enabled."""
+        return (
+            os.getenv("OPENAI_FAST_MODEL_NAME")
+            or os.getenv("FAST_MODEL_NAME", self.DEFAULT_FAST_MODEL)
+        )
 
-    def chat_completion(self, prompt: str, model: Optional[str] = None) -> str:
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
         """Send a chat completion request to OpenAI.
 
         Args
         ----
             prompt: The user prompt to send.
             model: Optional model override.
+            system: Optional static instructions, sent as a leading system
+                message so the endpoint can reuse its cached prefix.
+            deadline: Optional time.monotonic() value by which to finish.
 
         Returns
         -------
@@ -64,10 +108,99 @@ class OpenAIProvider(BaseProvider):
         """
         model_to_use = model or self.get_default_model()
 
-        response = self._client.chat.completions.create(
-            model=model_to_use,
-            messages=[{"role": "user", "content": prompt}],
-            stream=False,
+        response = call_with_retries(
+            lambda timeout: self._get_client().chat.completions.create(
+                model=model_to_use,
+                messages=chat_messages(prompt, system),
+                max_completion_tokens=self.max_output_tokens(),
+                stream=False,
+                timeout=timeout,
+            ),
+            deadline,
         )
 
+        report_chat_usage(self.name, model_to_use, response.usage)
         return response.choices[0].message.content.strip()
+
+    def candidate_requests(self, count: int) -> int:
+        """Return 1: all candidates come from a single request."""
+        return 1
+
+    def generate_candidates(
+        self,
+        prompt: str,
+        count: int,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        """Request several choices in a single call using the API's ``n`` parameter.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            count: Number of candidates to request.
+            model: Optional model override.
+            system: Optional static instructions, sent as a leading system message.
+            deadline: Optional time.monotonic() value by which to finish.
+
+        Returns
+        -------
+            The text of each returned choice.
+        """
+        model_to_use = model or self.get_default_model()
+
+        response = call_with_retries(
+            lambda timeout: self._get_client().chat.completions.create(
+                model=model_to_use,
+                messages=chat_messages(prompt, system),
+                n=count,
+                max_completion_tokens=self.max_output_tokens(),
+                stream=False,
+                timeout=timeout,
+            ),
+            deadline,
+        )
+
+        report_chat_usage(self.name, model_to_use, response.usage)
+        return [c.message.content.strip() for c in response.choices if c.message.content]
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Stream a chat completion, yielding text deltas as they arrive.
+
+        Args
+        ----
+            prompt: The user prompt to send.
+            model: Optional model override.
+            system: Optional static instructions, sent as a leading system
+                message so the endpoint can reuse its cached prefix.
+            deadline: Optional time.monotonic() value by which to finish.
+
+        Yields
+        ------
+            Text deltas from the model.
+        """
+        model_to_use = model or self.get_default_model()
+
+        def open_stream(timeout: float) -> Iterator[str]:
+            stream = self._get_client().chat.completions.create(
+                model=model_to_use,
+                messages=chat_messages(prompt, system),
+                max_completion_tokens=self.max_output_tokens(),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # The final chunk has no choices and carries the usage
+                report_chat_usage(self.name, model_to_use, chunk.usage)
+
+        yield from stream_with_retries(open_stream, deadline)
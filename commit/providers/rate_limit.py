@@ -0,0 +1,297 @@
+"""Token-bucket rate limiting for provider requests, shared across processes.
+
+Each ``provider:model`` key has two buckets, one for requests per minute
+and one for tokens per minute. When a state file is given, the buckets
+live in that file and every update happens under an exclusive file lock,
+so all ``commit_analyzer.py`` processes using the same repository (hooks,
+batch runs, CI jobs) draw from the same budget and queue briefly instead
+of running into 429 responses.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from providers.base import BaseProvider
+from providers.state_file import LOCKING_SUPPORTED, locked_state
+
+# (requests per minute, tokens per minute) used when neither <PROVIDER>_RPM /
+# <PROVIDER>_TPM nor COMMIT_RPM / COMMIT_TPM are set. Conservative values for
+# entry-level API tiers; providers not listed, such as local endpoints, are
+# unlimited.
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "anthropic": (50, 30000),
+    "openai": (500, 500000),
+}
+
+# Longest single sleep, so waiters notice budget freed by other processes
+_MAX_SLEEP_SECONDS = 2.0
+
+
+def _env_limit(names: Tuple[str, ...], default: float) -> float:
+    """Return the first of the variables that holds a number, or the default."""
+    for name in names:
+        try:
+            return float(os.environ[name])
+        except (KeyError, ValueError):
+            continue
+    return default
+
+
+def limits_for(provider_name: str) -> Tuple[float, float]:
+    """Return (requests per minute, tokens per minute) for a provider; 0 is unlimited.
+
+    A provider's own ANTHROPIC_RPM, OPENAI_COMPATIBLE_TPM, ... take
+    precedence over COMMIT_RPM / COMMIT_TPM, which apply to every provider.
+    """
+    prefix = provider_name.upper().replace("-", "_")
+    rpm, tpm = DEFAULT_LIMITS.get(provider_name, (0.0, 0.0))
+    return (
+        _env_limit((f"{prefix}_RPM", "COMMIT_RPM"), rpm),
+        _env_limit((f"{prefix}_TPM", "COMMIT_TPM"), tpm),
+    )
+
+
+_warned_unshared = False
+
+
+def _warn_unshared() -> None:
+    """Say once per process that limits are not shared with other processes."""
+    global _warned_unshared
+    if not _warned_unshared:
+        _warned_unshared = True
+        print("File locks are unavailable; rate limits apply to this process only")
+
+
+class RateLimiter:
+
+    """Token buckets keyed by name, refilled continuously.
+
+    Each bucket holds up to a minute's worth of budget, so short bursts go
+    through immediately and sustained load is spread evenly.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize the limiter.
+
+        Args
+        ----
+            path: Optional JSON state file shared between processes. Without
+                it, or where file locks are unavailable, buckets are kept in
+                memory.
+        """
+        # Without file locks, concurrent processes would overwrite each
+        # other's buckets; limits are then only shared within one process
+        self._path = path if LOCKING_SUPPORTED else None
+        if path is not None and self._path is None:
+            _warn_unshared()
+        self._thread_lock = threading.Lock()
+        self._memory: Dict[str, dict] = {}
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, dict]]:
+        """Hold the limiter lock and yield the bucket state for updating."""
+        with self._thread_lock:
+            if self._path is None:
+                yield self._memory
+                return
+
+            with locked_state(self._path) as state:
+                yield state
+
+    def acquire(
+        self,
+        key: str,
+        requests_per_minute: float,
+        tokens_per_minute: float = 0,
+        tokens: int = 0,
+        requests: int = 1,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Take budget from the key's buckets, waiting until enough is available.
+
+        Args
+        ----
+            key: Bucket name, usually ``provider:model``.
+            requests_per_minute: Request budget; 0 or less disables it.
+            tokens_per_minute: Token budget; 0 or less disables it.
+            tokens: Estimated tokens the requests will use.
+            requests: Number of requests about to be sent.
+            timeout: Maximum seconds to wait, or None to wait as long as needed.
+
+        Returns
+        -------
+            True once the requests may be sent, False if the timeout expired.
+        """
+        wanted: List[Tuple[str, float, float]] = [
+            (field, capacity, min(amount, capacity))
+            for field, capacity, amount in (
+                ("requests", requests_per_minute, requests),
+                ("tokens", tokens_per_minute, tokens),
+            )
+            if capacity > 0 and amount > 0
+        ]
+        if not wanted:
+            return True
+
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._locked() as state:
+                entry = state.setdefault(key, {})
+                now = time.time()
+                levels = {}
+                wait = 0.0
+                for field, capacity, amount in wanted:
+                    level, updated = entry.get(field, (capacity, now))
+                    level = min(capacity, level + max(0.0, now - updated) * capacity / 60)
+                    levels[field] = level
+                    if level < amount:
+                        wait = max(wait, (amount - level) * 60 / capacity)
+
+                if not wait:
+                    for field, _capacity, amount in wanted:
+                        entry[field] = [levels[field] - amount, now]
+                    return True
+
+            if give_up_at is not None and time.monotonic() + wait > give_up_at:
+                return False
+            time.sleep(min(wait, _MAX_SLEEP_SECONDS))
+
+
+_LIMITERS: Dict[Optional[Path], RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(state_dir: Optional[Path]) -> RateLimiter:
+    """Return the limiter for a state directory, shared by all providers in this process."""
+    with _LIMITERS_LOCK:
+        if state_dir not in _LIMITERS:
+            _LIMITERS[state_dir] = RateLimiter(
+                state_dir / "rate-limits.json" if state_dir else None
+            )
+        return _LIMITERS[state_dir]
+
+
+class RateLimitedProvider(BaseProvider):
+
+    """Provider wrapper that waits for rate limit budget before each request.
+
+    The wrapper is transparent: it reports the wrapped provider's name and
+    models, so cache keys and health records are unaffected.
+    """
+
+    def __init__(self, provider: BaseProvider, limiter: RateLimiter):
+        """Initialize the wrapper.
+
+        Args
+        ----
+            provider: The provider whose requests are limited.
+            limiter: Limiter holding the buckets, usually from get_limiter.
+        """
+        self._provider = provider
+        self._limiter = limiter
+
+    @property
+    def name(self) -> str:
+        """Return the wrapped provider's name."""
+        return self._provider.name
+
+    def get_default_model(self) -> str:
+        """Return the wrapped provider's default model."""
+        return self._provider.get_default_model()
+
+    def get_fast_model(self) -> Optional[str]:
+        """Return the wrapped provider's fast model."""
+        return self._provider.get_fast_model()
+
+    def model_signature(self) -> str:
+        """Return the wrapped provider's model signature."""
+        return self._provider.model_signature()
+
+    def max_output_tokens(self) -> int:
+        """Return the wrapped provider's output token limit."""
+        return self._provider.max_output_tokens()
+
+    def warm_up(self) -> None:
+        """Warm up the wrapped provider."""
+        self._provider.warm_up()
+
+    def candidate_requests(self, count: int) -> int:
+        """Return the wrapped provider's request count for candidates."""
+        return self._provider.candidate_requests(count)
+
+    def _wait_for_budget(
+        self,
+        prompt: str,
+        model: Optional[str],
+        system: Optional[str],
+        deadline: Optional[float],
+        requests: int = 1,
+        outputs: int = 1,
+    ) -> None:
+        """Block until the requests fit the provider's limits.
+
+        Args
+        ----
+            requests: API requests about to be sent, each carrying the prompt.
+            outputs: Completions they return, each up to the output allowance.
+
+        Raises
+        ------
+            TimeoutError: If the wait would run past the deadline.
+        """
+        rpm, tpm = limits_for(self._provider.name)
+        # Rough estimate: four characters per token, plus the output allowance
+        tokens = (
+            requests * (len(prompt) + len(system or "")) // 4
+            + outputs * self._provider.max_output_tokens()
+        )
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        key = f"{self._provider.name}:{model or self._provider.get_default_model()}"
+        if not self._limiter.acquire(key, rpm, tpm, tokens, requests, timeout):
+            raise TimeoutError(f"Rate limit for {key} would not free up before the deadline")
+
+    def chat_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Wait for rate limit budget, then send the request."""
+        self._wait_for_budget(prompt, model, system, deadline)
+        return self._provider.chat_completion(prompt, model, system, deadline)
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Wait for rate limit budget, then stream the response."""
+        self._wait_for_budget(prompt, model, system, deadline)
+        yield from self._provider.stream_completion(prompt, model, system, deadline)
+
+    def generate_candidates(
+        self,
+        prompt: str,
+        count: int,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        """Wait for budget for all candidates, then request them.
+
+        Providers that return several choices from one request are charged
+        one request against the RPM budget, but every choice's output
+        against the TPM budget.
+        """
+        self._wait_for_budget(
+            prompt, model, system, deadline,
+            requests=self._provider.candidate_requests(count), outputs=count,
+        )
+        return self._provider.generate_candidates(prompt, count, model, system, deadline)
@@ -0,0 +1,90 @@
+"""JSON state files shared by every commit_analyzer.py process of a repository.
+
+Rate-limit buckets and backend health live in small JSON files under the
+git directory. Hooks, batch runs and the daemon update them concurrently,
+so every update re-reads the file and writes it back while holding an
+exclusive lock on a sibling ``.lock`` file: ``fcntl.flock`` on POSIX and
+``msvcrt.locking`` on Windows.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+# True when updates from different processes are serialized
+LOCKING_SUPPORTED = fcntl is not None or msvcrt is not None
+
+
+def read_state(path: Path) -> Dict[str, dict]:
+    """Return the state stored at path, or an empty dict if it is missing or invalid."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _lock(lock_file) -> None:
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        # Locks the first byte; LK_LOCK gives up after about 10 seconds
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def _unlock(lock_file) -> None:
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_state(path: Path, state: Dict[str, dict]) -> None:
+    # Unique per thread, so concurrent writers never rename each other's file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def locked_state(path: Path) -> Iterator[Dict[str, dict]]:
+    """Lock the state file, yield its current content and write it back.
+
+    Changes made to the yielded dict are saved when the block exits
+    normally; an exception leaves the file untouched.
+
+    Raises
+    ------
+        OSError: If the state or lock file cannot be read or written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        _lock(lock_file)
+        try:
+            state = read_state(path)
+            yield state
+            _write_state(path, state)
+        finally:
+            _unlock(lock_file)
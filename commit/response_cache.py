@@ -0,0 +1,238 @@
+"""Persistent, content-addressed cache for generated commit messages.
+
+Entries are stored as small JSON files under the repository's ``.git``
+directory and are keyed by a hash of everything that influences the
+generated message (the full prompt sent, provider, model, prompt version
+and generation settings).
+Eviction is least-recently-used, bounded by entry count, total size and
+age.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Batch mode looks up several commits at once; the hit/miss counters are
+# read, updated and written back under this lock so no increment is lost
+_STATS_LOCK = threading.Lock()
+
+
+class ResponseCache:
+
+    """On-disk LRU cache mapping a content key to a commit message.
+
+    The modification time of each entry file doubles as its last access
+    time, so a hit only needs an ``os.utime`` call to refresh recency.
+    """
+
+    _STATS_FILE = "stats.json"
+    _ENTRY_SUFFIX = ".json"
+
+    def __init__(
+        self,
+        directory: Path,
+        max_entries: int = 200,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_age_seconds: float = 30 * 24 * 3600,
+    ):
+        """Initialize the cache.
+
+        Args
+        ----
+            directory: Directory holding the cache entries. Created on first write.
+            max_entries: Maximum number of entries kept after eviction.
+            max_bytes: Maximum total size of all entries in bytes.
+            max_age_seconds: Entries not accessed for longer than this are dropped.
+        """
+        self._directory = directory
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def make_key(
+        prompt: str,
+        system: str,
+        provider: str,
+        model: str,
+        prompt_version: str,
+        settings: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Build the content key for a generation request.
+
+        Args
+        ----
+            prompt: The user prompt sent to the model, including the diff
+                and any repository context.
+            system: The system instructions sent with it.
+            provider: Provider name.
+            model: Model identifier, or the provider's model signature when
+                it may use several.
+            prompt_version: Version of the prompt template.
+            settings: Other settings that change the result, such as the
+                candidate count.
+
+        Returns
+        -------
+            A hex SHA-256 digest identifying the request.
+        """
+        digest = hashlib.sha256()
+        setting_parts = [f"{name}={value}" for name, value in sorted((settings or {}).items())]
+        for part in (prompt_version, provider, model, *setting_parts, system, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached message for key, or None on a miss."""
+        path = self._entry_path(key)
+        message = None
+        try:
+            if time.time() - path.stat().st_mtime <= self._max_age_seconds:
+                with open(path, encoding="utf-8") as f:
+                    message = json.load(f).get("message")
+        except (OSError, ValueError):
+            message = None
+
+        if message:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        self._record(hit=bool(message))
+        return message or None
+
+    def put(self, key: str, message: str, provider: str, model: str) -> None:
+        """Store a message under key and evict entries beyond the limits."""
+        entry = {
+            "message": message,
+            "provider": provider,
+            "model": model,
+            "created": time.time(),
+        }
+        try:
+            self._write_json(self._entry_path(key), entry)
+            self.evict()
+        except OSError:
+            # A cache that cannot be written must never break a commit
+            pass
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones over the limits.
+
+        Returns
+        -------
+            The number of entries removed.
+        """
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort(reverse=True)
+        now = time.time()
+        kept_bytes = 0
+        kept_count = 0
+        removed = 0
+
+        for mtime, size, path in entries:
+            keep = (
+                now - mtime <= self._max_age_seconds
+                and kept_count < self._max_entries
+                and kept_bytes + size <= self._max_bytes
+            )
+            if keep:
+                kept_bytes += size
+                kept_count += 1
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+
+        return removed
+
+    def clear(self) -> int:
+        """Remove every entry and reset the hit/miss counters."""
+        removed = 0
+        for path in self._entry_paths():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        try:
+            (self._directory / self._STATS_FILE).unlink()
+        except OSError:
+            pass
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count, total size and lifetime hit/miss counters."""
+        sizes = []
+        for path in self._entry_paths():
+            try:
+                sizes.append(path.stat().st_size)
+            except OSError:
+                continue
+
+        counters = self._read_counters()
+        return {
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+    def _entry_path(self, key: str) -> Path:
+        return self._directory / f"{key}{self._ENTRY_SUFFIX}"
+
+    def _entry_paths(self):
+        if not self._directory.is_dir():
+            return []
+        return [
+            p
+            for p in self._directory.iterdir()
+            if p.suffix == self._ENTRY_SUFFIX and p.name != self._STATS_FILE
+        ]
+
+    def _read_counters(self) -> Dict[str, int]:
+        try:
+            with open(self._directory / self._STATS_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, hit: bool) -> None:
+        field = "hits" if hit else "misses"
+        with _STATS_LOCK:
+            counters = self._read_counters()
+            counters[field] = counters.get(field, 0) + 1
+            try:
+                self._write_json(self._directory / self._STATS_FILE, counters)
+            except OSError:
+                pass
+
+    def _write_json(self, path: Path, data: dict) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Unique per thread, so concurrent writers never rename each other's file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
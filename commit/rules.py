@@ -0,0 +1,222 @@
+"""Rule-based commit messages for changes that need no LLM call.
+
+Many commits can be described from the diff statistics alone: dependency
+lock-file updates, pure renames, deletions, whitespace fixes, or changes
+confined to tests, docs or CI configuration. Each rule looks at the parsed
+file records and either returns a message or passes. The first matching
+rule wins, so rules are registered from most to least specific.
+
+The same engine provides the fallback message used when the provider misses
+the latency deadline or fails with a transient error.
+"""
+
+import posixpath
+from typing import Callable, Dict, Iterable, List, Optional
+
+from conventions import COMMIT_TYPES, MAX_DESCRIPTION_LENGTH
+from diff_compression import has_only_whitespace_changes
+from diff_parser import STATUS_ADDED, STATUS_DELETED, STATUS_RENAMED, FileDiff
+
+REPOSITORY_CONTEXT_PATH = "DOCS/repository_context.txt"
+
+_LOCK_FILE_SUFFIXES = (
+    ".lock",
+    "lock.json",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+)
+_TEST_DIRS = ("__tests__/", "tests/", "test/", "e2e/", "cypress/", "playwright/")
+_TEST_MARKERS = (".test.", ".spec.", ".cy.")
+_DOC_SUFFIXES = (".md", ".mdx", ".rst")
+# Files that are documentation by name, with or without an extension; other
+# .txt files, such as requirements.txt or CMakeLists.txt, are build inputs
+_DOC_NAMES = ("README", "CHANGELOG", "CONTRIBUTING", "AUTHORS")
+_LICENSE_NAMES = ("LICENSE", "LICENCE", "COPYING")
+_DOC_DIRS = ("docs/", "DOCS/")
+_CI_DIRS = (".github/workflows/", ".github/actions/")
+
+# Files listed in a rule-based message body
+_MAX_LISTED_FILES = 10
+
+Rule = Callable[[List[FileDiff]], Optional[str]]
+
+# Rules in evaluation order, keyed by name
+_RULES: Dict[str, Rule] = {}
+
+
+def rule(name: str) -> Callable[[Rule], Rule]:
+    """Register a rule under a name; rules run in registration order."""
+    def register(func: Rule) -> Rule:
+        _RULES[name] = func
+        return func
+
+    return register
+
+
+def rule_names() -> List[str]:
+    """Return the names of all registered rules in evaluation order."""
+    return list(_RULES)
+
+
+def is_lock_file(path: str) -> bool:
+    """Check if a path is a dependency lock file."""
+    return path.endswith(_LOCK_FILE_SUFFIXES)
+
+
+def _in_dirs(path: str, dirs: Iterable[str]) -> bool:
+    return any(path.startswith(d) or f"/{d}" in path for d in dirs)
+
+
+def _is_test_path(path: str) -> bool:
+    return _in_dirs(path, _TEST_DIRS) or any(m in posixpath.basename(path) for m in _TEST_MARKERS)
+
+
+def _document_name(path: str) -> str:
+    """Return the upper-cased name of a plain-text or markup file without its extension.
+
+    Source files return an empty name, so authors.js is not taken for AUTHORS.
+    """
+    name, extension = posixpath.splitext(posixpath.basename(path))
+    if extension.lower() not in ("", ".txt") + _DOC_SUFFIXES:
+        return ""
+    return name.upper()
+
+
+def _is_doc_path(path: str) -> bool:
+    if path.endswith(_DOC_SUFFIXES) or _in_dirs(path, _DOC_DIRS):
+        return True
+    return _document_name(path) in _DOC_NAMES
+
+
+def _is_license_path(path: str) -> bool:
+    return _document_name(path) in _LICENSE_NAMES
+
+
+def _is_ci_path(path: str) -> bool:
+    return _in_dirs(path, _CI_DIRS)
+
+
+def _message(commit_type: str, verb: str, noun: str, records: List[FileDiff], body: str) -> str:
+    """Build '<emoji> <type>: <verb> <target>' with a body listing the files.
+
+    A single file is named when the description stays within the length
+    limit; otherwise the files are counted.
+    """
+    if len(records) == 1:
+        description = f"{verb} {posixpath.basename(records[0].path)}"
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            description = f"{verb} {noun}"
+    else:
+        description = f"{verb} {len(records)} {noun}s"
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            description = f"{verb} {noun}s"
+
+    listed = [f"- {_describe_path(r)}" for r in records[:_MAX_LISTED_FILES]]
+    if len(records) > _MAX_LISTED_FILES:
+        listed.append(f"- ... and {len(records) - _MAX_LISTED_FILES} more")
+    files = "\n".join(listed)
+    return f"{COMMIT_TYPES[commit_type]} {commit_type}: {description}\n\n{body}\n\n{files}"
+
+
+def _describe_path(record: FileDiff) -> str:
+    if record.old_path != record.path:
+        return f"{record.old_path} -> {record.path}"
+    return record.path
+
+
+@rule("deps")
+def _dependencies(records: List[FileDiff]) -> Optional[str]:
+    if any(is_lock_file(r.path) for r in records):
+        return "📦 deps: update dependencies"
+    return None
+
+
+@rule("context")
+def _repository_context(records: List[FileDiff]) -> Optional[str]:
+    if [r.path for r in records] == [REPOSITORY_CONTEXT_PATH]:
+        return "📝 docs: update repository context"
+    return None
+
+
+@rule("rename")
+def _pure_renames(records: List[FileDiff]) -> Optional[str]:
+    if all(r.status == STATUS_RENAMED and not r.added and not r.removed for r in records):
+        return _message(
+            "move", "rename", "file", records, "Move files without changing their content."
+        )
+    return None
+
+
+@rule("delete")
+def _deletions(records: List[FileDiff]) -> Optional[str]:
+    if all(r.status == STATUS_DELETED for r in records):
+        return _message(
+            "cleanup", "remove", "file", records, "Delete files that are no longer used."
+        )
+    return None
+
+
+@rule("whitespace")
+def _whitespace(records: List[FileDiff]) -> Optional[str]:
+    if all(has_only_whitespace_changes(r) for r in records):
+        return _message(
+            "style", "fix whitespace in", "file", records, "Only whitespace and formatting changed."
+        )
+    return None
+
+
+@rule("tests")
+def _tests_only(records: List[FileDiff]) -> Optional[str]:
+    if all(_is_test_path(r.path) for r in records):
+        verb = "add" if all(r.status == STATUS_ADDED for r in records) else "update"
+        return _message("test", verb, "test file", records, f"{verb.capitalize()} tests only.")
+    return None
+
+
+@rule("license")
+def _license_only(records: List[FileDiff]) -> Optional[str]:
+    if all(_is_license_path(r.path) for r in records):
+        return _message("license", "update", "license file", records, "License changes only.")
+    return None
+
+
+@rule("docs")
+def _docs_only(records: List[FileDiff]) -> Optional[str]:
+    if all(_is_doc_path(r.path) for r in records):
+        return _message("docs", "update", "doc", records, "Documentation changes only.")
+    return None
+
+
+@rule("ci")
+def _ci_only(records: List[FileDiff]) -> Optional[str]:
+    if all(_is_ci_path(r.path) for r in records):
+        return _message("ci", "update", "workflow", records, "CI configuration changes only.")
+    return None
+
+
+def classify(records: List[FileDiff], enabled: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Return the message of the first matching rule, or None.
+
+    Args
+    ----
+        records: Parsed file diffs of the change.
+        enabled: Names of the rules to run; all rules when None.
+    """
+    if not records:
+        return None
+    names = set(_RULES) if enabled is None else set(enabled)
+    for name, func in _RULES.items():
+        if name in names:
+            message = func(records)
+            if message:
+                return message
+    return None
+
+
+def fallback_message(records: List[FileDiff]) -> str:
+    """Return a message for any change, used when the provider cannot answer in time."""
+    message = classify(records)
+    if message:
+        return message
+    return _message("chore", "update", "file", records, "Update files.")
@@ -0,0 +1,24 @@
+"""Make the commit analyzer's flat modules importable from the tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    """Return commit_analyzer with its state in tmp_path and no context, cache or .env."""
+    import commit_analyzer
+    import metrics
+
+    monkeypatch.setattr(commit_analyzer, "_STATE_DIR", tmp_path)
+    monkeypatch.setattr(commit_analyzer, "load_dotenv", lambda *args, **kwargs: None)
+    monkeypatch.setenv("COMMIT_CONTEXT_TOKENS", "0")
+    monkeypatch.setenv("COMMIT_CACHE", "0")
+    for name in ("COMMIT_CANDIDATES", "MODEL_CASCADE", "COMMIT_MAP_REDUCE_TOKENS"):
+        monkeypatch.delenv(name, raising=False)
+    metrics.reset()
+    return commit_analyzer
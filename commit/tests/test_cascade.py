@@ -0,0 +1,94 @@
+import pytest
+
+from providers import route_models
+from providers.base import BaseProvider
+from providers.factory import ProviderConfigurationError
+
+GOOD = "✨ feat: print b\n\nPrint b instead of a when the app starts."
+DIFF = """\
+diff --git a/src/app.py b/src/app.py
+--- a/src/app.py
++++ b/src/app.py
+@@ -1 +1 @@
+-print("a")
++print("b")
+"""
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, fast="fast", answers=None):
+        self._fast = fast
+        self.answers = answers or {}
+        self.models = []
+
+    @property
+    def name(self):
+        return "fake"
+
+    def get_default_model(self):
+        return "default"
+
+    def get_fast_model(self):
+        return self._fast
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        self.models.append(model)
+        return self.answers.get(model, GOOD)
+
+
+@pytest.fixture(autouse=True)
+def cascade(monkeypatch):
+    monkeypatch.setenv("MODEL_CASCADE", "1")
+    monkeypatch.delenv("CASCADE_MAX_TOKENS", raising=False)
+    monkeypatch.delenv("CASCADE_MAX_FILES", raising=False)
+
+
+def test_disabled_cascade_uses_the_default_model(monkeypatch):
+    monkeypatch.setenv("MODEL_CASCADE", "0")
+    assert route_models(FakeProvider(), 10, 1) == ["default"]
+
+
+@pytest.mark.parametrize(
+    "tokens, files, expected",
+    [
+        (2000, 5, ["fast", "default"]),
+        (2001, 5, ["default"]),
+        (2000, 6, ["default"]),
+    ],
+)
+def test_default_thresholds(tokens, files, expected):
+    assert route_models(FakeProvider(), tokens, files) == expected
+
+
+def test_thresholds_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CASCADE_MAX_TOKENS", "100")
+    monkeypatch.setenv("CASCADE_MAX_FILES", "1")
+    assert route_models(FakeProvider(), 100, 1) == ["fast", "default"]
+    assert route_models(FakeProvider(), 101, 1) == ["default"]
+    assert route_models(FakeProvider(), 100, 2) == ["default"]
+
+
+@pytest.mark.parametrize("fast", [None, "default"])
+def test_providers_without_a_distinct_fast_model(fast):
+    assert route_models(FakeProvider(fast), 10, 1) == ["default"]
+
+
+def test_invalid_threshold(monkeypatch):
+    monkeypatch.setenv("CASCADE_MAX_FILES", "many")
+    with pytest.raises(ProviderConfigurationError):
+        route_models(FakeProvider(), 10, 1)
+
+
+def test_good_fast_draft_is_kept(analyzer, monkeypatch):
+    monkeypatch.setenv("MODEL_CASCADE", "1")
+    provider = FakeProvider()
+    assert analyzer.generate_commit_message(DIFF, provider=provider) == GOOD
+    assert provider.models == ["fast"]
+
+
+def test_poor_fast_draft_escalates(analyzer, monkeypatch):
+    monkeypatch.setenv("MODEL_CASCADE", "1")
+    provider = FakeProvider(answers={"fast": "Updated stuff."})
+    assert analyzer.generate_commit_message(DIFF, provider=provider) == GOOD
+    assert provider.models == ["fast", "default"]
+    assert analyzer.metrics.current().fields["model"] == "default"
@@ -0,0 +1,96 @@
+import os
+
+import context_index
+from context_index import ContextIndex, tokenize
+
+SECTIONS = {
+    "src/components/Navbar.tsx": "export function Navbar() { return renderMenuItems(links); }\n",
+    "src/components/Footer.tsx": "export function Footer() { return copyrightNotice(); }\n",
+    "src/lib/fetchProjects.ts": "export async function fetchProjects() { return sanityClient; }\n",
+}
+
+
+def _write_dump(path, sections, mtime):
+    text = "This file is a merged representation of the repository.\n\n"
+    text += "".join(f"## File: {name}\n{body}\n" for name, body in sections.items())
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def _index(tmp_path):
+    return ContextIndex(tmp_path / "repository_context.txt", tmp_path / "index.json")
+
+
+def test_tokenize_splits_camel_case_and_snake_case():
+    terms = tokenize("renderMenuItems max_file_tokens")
+    assert {"rendermenuitems", "render", "menu", "items", "max_file_tokens", "file"} <= set(
+        terms
+    )
+
+
+def test_missing_source(tmp_path):
+    assert not _index(tmp_path).load()
+
+
+def test_search_ranks_identifiers_and_nearby_paths(tmp_path):
+    _write_dump(tmp_path / "repository_context.txt", SECTIONS, 1000)
+    index = _index(tmp_path)
+    assert index.load()
+
+    diff = "+++ b/src/components/Header.tsx\n+const items = renderMenuItems(links);\n"
+    results = index.search(["src/components/Header.tsx"], diff)
+
+    assert results[0][0] == "src/components/Navbar.tsx"
+    assert "src/lib/fetchProjects.ts" not in [path for path, _score in results[:2]]
+    assert index.read_section("src/components/Navbar.tsx").startswith(
+        "## File: src/components/Navbar.tsx\n"
+    )
+
+
+def test_unchanged_source_reuses_the_stored_index(tmp_path, monkeypatch):
+    _write_dump(tmp_path / "repository_context.txt", SECTIONS, 1000)
+    _index(tmp_path).load()
+
+    def fail(_source):
+        raise AssertionError("the dump should not be scanned again")
+
+    monkeypatch.setattr(context_index, "_scan_sections", fail)
+    index = _index(tmp_path)
+    assert index.load()
+    assert index.search(["src/lib/fetchProjects.ts"], "")[0][0] == "src/lib/fetchProjects.ts"
+
+
+def test_rebuild_only_retokenizes_changed_sections(tmp_path, monkeypatch):
+    source = tmp_path / "repository_context.txt"
+    _write_dump(source, SECTIONS, 1000)
+    _index(tmp_path).load()
+
+    changed = dict(SECTIONS)
+    changed["src/components/Footer.tsx"] = "export function Footer() { return socialLinks(); }\n"
+    _write_dump(source, changed, 2000)
+
+    tokenized = []
+    original = context_index.tokenize
+
+    def counting(text):
+        if text.startswith("## File: "):
+            tokenized.append(text.splitlines()[0])
+        return original(text)
+
+    monkeypatch.setattr(context_index, "tokenize", counting)
+    index = _index(tmp_path)
+    index.load()
+
+    assert tokenized == ["## File: src/components/Footer.tsx"]
+    assert index.search([], "+socialLinks()\n")[0][0] == "src/components/Footer.tsx"
+
+
+def test_relevant_context_fits_the_budget(tmp_path):
+    _write_dump(tmp_path / "repository_context.txt", SECTIONS, 1000)
+    index = _index(tmp_path)
+    index.load()
+
+    context = index.relevant_context(["src/components/Navbar.tsx"], "", 40)
+    assert context.startswith("## File: src/components/Navbar.tsx")
+    assert context.endswith("[... section truncated]\n")
+    assert index.relevant_context(["src/components/Navbar.tsx"], "", 10000).count("## File:") > 1
@@ -0,0 +1,71 @@
+import pytest
+
+from conventions import best_message, clean_message, message_problems, score_message
+
+GOOD = "✨ feat: add dark mode toggle\n\nLet users switch themes from the header."
+
+
+def _problems(message):
+    return [problem for problem, _penalty in message_problems(message)]
+
+
+def test_well_formed_message_scores_full_marks():
+    assert score_message(GOOD) == 100
+
+
+@pytest.mark.parametrize(
+    "message, problem",
+    [
+        ("", "empty message"),
+        ("add dark mode\n\nBody.", "header is not '<emoji> <type>: <description>'"),
+        ("✨ feature: add dark mode\n\nBody.", "unknown type 'feature'"),
+        ("🐛 feat: add dark mode\n\nBody.", "emoji does not match type 'feat'"),
+        ("✨ feat: Add dark mode\n\nBody.", "description does not start lowercase"),
+        ("✨ feat: add dark mode.\n\nBody.", "description ends with a period"),
+        ("✨ feat: add dark mode", "missing body"),
+        ("✨ feat: add dark mode\nBody.\nMore.", "body is not separated by a blank line"),
+    ],
+)
+def test_problems(message, problem):
+    assert problem in _problems(message)
+
+
+def test_long_description_penalty_grows_with_overflow():
+    short = score_message(GOOD.replace("add dark mode toggle", "add " + "x" * 47))
+    long = score_message(GOOD.replace("add dark mode toggle", "add " + "x" * 60))
+    assert 100 > short > long
+
+
+@pytest.mark.parametrize(
+    "verb", ["added", "adds", "adding", "updated", "fixes", "applied", "stopped", "uses"]
+)
+def test_inflected_verbs_are_not_imperative(verb):
+    message = GOOD.replace("add", verb, 1)
+    assert "description is not in imperative mood" in _problems(message)
+
+
+@pytest.mark.parametrize(
+    "verb", ["embed", "bring", "ping", "process", "address", "focus", "pass", "unless"]
+)
+def test_base_forms_ending_like_inflections_are_imperative(verb):
+    message = GOOD.replace("add", verb, 1)
+    assert "description is not in imperative mood" not in _problems(message)
+
+
+def test_clean_message_strips_preamble_and_fences():
+    text = "Here is the commit message:\n```\n" + GOOD + "\n```"
+    assert clean_message(text) == GOOD
+
+
+def test_best_message_picks_highest_score_after_cleaning():
+    candidates = ["Added dark mode", "```\n" + GOOD + "\n```", ""]
+    assert best_message(candidates) == (GOOD, 100)
+
+
+def test_best_message_prefers_earlier_candidate_on_ties():
+    other = GOOD.replace("dark", "light")
+    assert best_message([GOOD, other])[0] == GOOD
+
+
+def test_best_message_without_candidates():
+    assert best_message(["", "  "]) == ("", 0)
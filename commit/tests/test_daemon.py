@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+import commit_analyzer
+import daemon
+import metrics
+
+pytestmark = pytest.mark.skipif(not daemon.is_supported(), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon._Server, "_get_provider", lambda self: object())
+    thread = threading.Thread(target=daemon.serve, args=(tmp_path, 5.0), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if daemon.ping(tmp_path):
+            break
+        time.sleep(0.01)
+    yield tmp_path
+    daemon.shutdown(tmp_path)
+    thread.join(1)
+
+
+def _generator(message=None, **fields):
+    def generate(diff, use_cache=True, on_token=None, provider=None, deadline=None):
+        metrics.annotate(**fields)
+        return message
+
+    return generate
+
+
+def test_message_from_daemon(server, monkeypatch):
+    monkeypatch.setattr(commit_analyzer, "generate_commit_message", _generator("✨ feat: add"))
+    assert daemon.request_message(server, "diff") == "✨ feat: add"
+
+
+def test_provider_error_is_reported_not_hidden(server, monkeypatch):
+    monkeypatch.setattr(
+        commit_analyzer,
+        "generate_commit_message",
+        _generator(error="ProviderChainError", retryable=True),
+    )
+    with pytest.raises(daemon.DaemonError) as info:
+        daemon.request_message(server, "diff", deadline_seconds=0)
+    assert info.value.error_type == "ProviderChainError"
+    assert info.value.retryable
+    assert info.value.deadline_missed
+
+
+def test_unreachable_daemon_returns_none(tmp_path):
+    assert daemon.request_message(tmp_path, "diff") is None
@@ -0,0 +1,56 @@
+import pytest
+
+from diff_compression import compress_diff, has_only_whitespace_changes
+from diff_parser import parse_diff
+
+
+def _diff(path, removed, added):
+    lines = [
+        f"diff --git a/{path} b/{path}\n",
+        "index 1111111..2222222 100644\n",
+        f"--- a/{path}\n",
+        f"+++ b/{path}\n",
+        f"@@ -1,{len(removed)} +1,{len(added)} @@\n",
+    ]
+    lines += [f"-{line}\n" for line in removed]
+    lines += [f"+{line}\n" for line in added]
+    return next(parse_diff(lines))
+
+
+@pytest.mark.parametrize(
+    "path, removed, added",
+    [
+        ("app.js", ["  if (x) {", "    run();", "  }"], ["if (x) {", "  run();", "}"]),
+        ("app.py", ["x = 1   "], ["x = 1"]),
+        ("app.py", ["x  =  1"], ["x = 1"]),
+        ("style.css", [".a {", "", "}"], [".a {", "}"]),
+    ],
+)
+def test_whitespace_only(path, removed, added):
+    assert has_only_whitespace_changes(_diff(path, removed, added))
+
+
+@pytest.mark.parametrize(
+    "path, removed, added",
+    [
+        ("app.py", ["if x:", "    delete_everything()"], ["if x:", "delete_everything()"]),
+        (".github/workflows/ci.yml", ["  run: make"], ["    run: make"]),
+        ("Makefile", ["\tbuild"], ["    build"]),
+        ("app.js", ["foo bar"], ["foobar"]),
+        ("style.css", [".a .b {}"], [".a.b {}"]),
+    ],
+)
+def test_meaningful_whitespace(path, removed, added):
+    assert not has_only_whitespace_changes(_diff(path, removed, added))
+
+
+def test_whitespace_only_hunks_are_stubbed():
+    record = _diff("app.js", ["  run();"], ["run();"])
+    text, _, _ = compress_diff([record])
+    assert "[whitespace-only file" in text
+
+
+def test_python_dedent_is_kept():
+    record = _diff("app.py", ["    delete_everything()"], ["delete_everything()"])
+    text, _, _ = compress_diff([record])
+    assert "+delete_everything()" in text
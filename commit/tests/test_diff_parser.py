@@ -0,0 +1,109 @@
+from diff_parser import (
+    STATUS_ADDED,
+    STATUS_DELETED,
+    STATUS_MODIFIED,
+    STATUS_RENAMED,
+    parse_diff,
+    render_diff,
+)
+
+
+def _lines(text):
+    return text.splitlines(keepends=True)
+
+
+MODIFIED = """\
+diff --git a/src/app.py b/src/app.py
+index 1111111..2222222 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,2 +1,3 @@
+ import os
+-print("a")
++print("b")
++print("c")
+"""
+
+ADDED = """\
+diff --git a/new.txt b/new.txt
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/new.txt
+@@ -0,0 +1 @@
++hello
+"""
+
+DELETED = """\
+diff --git a/old.txt b/old.txt
+deleted file mode 100644
+index 3333333..0000000
+--- a/old.txt
++++ /dev/null
+@@ -1 +0,0 @@
+-bye
+"""
+
+RENAMED = """\
+diff --git a/a/b.py b/c/d.py
+similarity index 100%
+rename from a/b.py
+rename to c/d.py
+"""
+
+BINARY = """\
+diff --git a/logo.png b/logo.png
+index 4444444..5555555 100644
+Binary files a/logo.png and b/logo.png differ
+"""
+
+
+def test_modified_file_counts_lines():
+    (record,) = parse_diff(_lines(MODIFIED))
+    assert record.path == "src/app.py"
+    assert record.status == STATUS_MODIFIED
+    assert (record.added, record.removed) == (2, 1)
+    assert record.render() == MODIFIED
+
+
+def test_statuses_and_paths():
+    records = list(parse_diff(_lines(ADDED + DELETED + RENAMED + BINARY)))
+    assert [r.status for r in records] == [
+        STATUS_ADDED, STATUS_DELETED, STATUS_RENAMED, STATUS_MODIFIED,
+    ]
+    assert records[1].path == "old.txt"
+    assert (records[2].old_path, records[2].path) == ("a/b.py", "c/d.py")
+    assert not records[2].added and not records[2].removed
+    assert records[3].binary
+
+
+def test_excluded_paths_are_counted_but_not_kept():
+    (record,) = parse_diff(_lines(MODIFIED), excluded={"src/app.py"})
+    assert (record.added, record.removed) == (2, 1)
+    assert record.hunks == []
+    assert record.omitted == 5
+
+
+def test_max_file_chars_truncates_hunks():
+    (record,) = parse_diff(_lines(MODIFIED), max_file_chars=30)
+    assert record.stored_chars() - len(record.header) <= 30
+    assert record.omitted > 0
+    assert "more diff lines omitted" in record.render()
+
+
+def test_render_round_trips_several_files():
+    text = MODIFIED + ADDED + DELETED
+    assert render_diff(parse_diff(_lines(text))) == text
+
+
+def test_parse_is_lazy():
+    consumed = []
+
+    def lines():
+        for line in _lines(MODIFIED + ADDED):
+            consumed.append(line)
+            yield line
+
+    first = next(parse_diff(lines()))
+    assert first.path == "src/app.py"
+    assert len(consumed) < len(_lines(MODIFIED + ADDED))
@@ -0,0 +1,174 @@
+import time
+
+import pytest
+
+from providers import failover
+from providers.base import BaseProvider, ProviderChainError, is_retryable
+from providers.failover import FailoverProvider, ProviderHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(failover.time, "time", fake.time)
+    return fake
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, name, model, error=None):
+        self._name = name
+        self._model = model
+        self.error = error
+        self.models = []
+
+    @property
+    def name(self):
+        return self._name
+
+    def get_default_model(self):
+        return self._model
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        self.models.append(model)
+        if self.error:
+            raise self.error
+        return f"{self._name} answer"
+
+
+def test_rank_puts_unmeasured_then_fastest_first(clock):
+    health = ProviderHealth()
+    health.record_success("slow", 2.0)
+    health.record_success("fast", 0.5)
+    assert health.rank(["slow", "fast", "new"]) == ["new", "fast", "slow"]
+
+
+def test_breaker_opens_at_threshold_and_closes_on_success(clock):
+    health = ProviderHealth(failure_threshold=2, cooldown_seconds=60)
+    health.record_failure("a", "boom")
+    assert health.is_available("a")
+    health.record_failure("a", "boom")
+    assert not health.is_available("a")
+    assert health.rank(["a", "b"]) == ["b", "a"]
+
+    clock.now += 61
+    assert health.is_available("a")
+    health.record_success("a", 0.1)
+    health.record_failure("a", "boom")
+    assert health.is_available("a")
+
+
+def test_health_persists_between_instances(tmp_path, clock):
+    path = tmp_path / "health.json"
+    health = ProviderHealth(path, failure_threshold=1)
+    health.record_failure("a", "boom")
+    health.record_success("b", 0.25)
+
+    reloaded = ProviderHealth(path, failure_threshold=1)
+    assert not reloaded.is_available("a")
+    assert reloaded.median_latency("b") == 0.25
+
+
+def test_latency_percentile_needs_samples(clock):
+    health = ProviderHealth()
+    for latency in (1.0, 1.0, 1.0, 1.0):
+        health.record_success("a", latency)
+    assert health.latency_percentile("a", 95) is None
+    health.record_success("a", 3.0)
+    assert 1.0 < health.latency_percentile("a", 95) <= 3.0
+
+
+def test_model_override_only_reaches_its_backend(clock):
+    anthropic = FakeProvider("anthropic", "claude-x", StatusError(503))
+    openai = FakeProvider("openai", "gpt-x")
+    provider = FailoverProvider([anthropic, openai], ProviderHealth())
+
+    assert provider.chat_completion("prompt", "claude-x") == "openai answer"
+    assert anthropic.models == ["claude-x"]
+    assert openai.models == [None]
+
+
+def test_configuration_errors_do_not_open_the_breaker(clock):
+    health = ProviderHealth(failure_threshold=1)
+    broken = FakeProvider("anthropic", "claude-x", StatusError(401))
+    provider = FailoverProvider([broken, FakeProvider("openai", "gpt-x")], health)
+
+    assert provider.chat_completion("prompt") == "openai answer"
+    assert health.is_available("anthropic")
+
+    broken.error = StatusError(500)
+    provider.chat_completion("prompt")
+    assert not health.is_available("anthropic")
+
+
+def test_all_backends_failing_raises(clock):
+    provider = FailoverProvider(
+        [FakeProvider("a", "m", StatusError(500)), FakeProvider("b", "n", StatusError(502))],
+        ProviderHealth(),
+    )
+    with pytest.raises(ProviderChainError, match="All providers in the chain failed") as info:
+        provider.chat_completion("prompt")
+    assert is_retryable(info.value)
+
+
+def test_chain_is_not_retryable_when_any_backend_is_misconfigured(clock):
+    provider = FailoverProvider(
+        [FakeProvider("a", "m", StatusError(503)), FakeProvider("b", "n", StatusError(401))],
+        ProviderHealth(),
+    )
+    with pytest.raises(ProviderChainError) as info:
+        provider.chat_completion("prompt")
+    assert not is_retryable(info.value)
+
+
+def test_passed_deadline_stops_failover_with_a_timeout(clock):
+    backup = FakeProvider("b", "n")
+    provider = FailoverProvider(
+        [FakeProvider("a", "m", StatusError(503)), backup], ProviderHealth()
+    )
+    with pytest.raises(TimeoutError, match="a: HTTP 503"):
+        provider.chat_completion("prompt", deadline=time.monotonic() - 1)
+    assert backup.models == []
+
+
+def test_model_signature_ignores_backend_health(clock):
+    health = ProviderHealth()
+    provider = FailoverProvider(
+        [FakeProvider("anthropic", "claude-x"), FakeProvider("openai", "gpt-x")], health
+    )
+    signature = provider.model_signature()
+    health.record_success("anthropic", 3.0)
+    health.record_success("openai", 0.5)
+
+    assert provider.get_default_model() == "gpt-x"
+    assert provider.model_signature() == signature == "anthropic=claude-x,;openai=gpt-x,"
+
+
+def test_concurrent_processes_merge_their_records(tmp_path, clock):
+    path = tmp_path / "health.json"
+    first = ProviderHealth(path, failure_threshold=2)
+    second = ProviderHealth(path, failure_threshold=2)
+
+    first.record_success("anthropic", 1.0)
+    second.record_failure("openai", "HTTP 503")
+    first.record_failure("openai", "HTTP 503")
+
+    merged = ProviderHealth(path)
+    assert merged.median_latency("anthropic") == 1.0
+    assert not merged.is_available("openai")
@@ -0,0 +1,51 @@
+import pytest
+
+from commit_analyzer import _EMPTY_TREES, _validate_git_args
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["diff", "--cached"],
+        ["diff", "--cached", "--name-only"],
+        ["diff", SHA, "fedcba9876543210fedcba9876543210fedcba98"],
+        ["diff", _EMPTY_TREES[40], SHA],
+        ["diff", "a" * 64, "b" * 64],
+        ["write-tree"],
+        ["rev-list", "--reverse", "--no-merges", "--parents", "main..HEAD"],
+        ["rev-list", "--reverse", "--no-merges", "--parents", "HEAD~3.."],
+        ["rev-list", "--reverse", "--no-merges", "--parents", f"{SHA}^!"],
+        ["rev-list", "--reverse", "--no-merges", "--parents", "HEAD"],
+        ["rev-list", "--reverse", "--no-merges", "--parents", "origin/main...feature/x"],
+        ["rev-list", "--reverse", "--no-merges", "--parents", "@{u}..HEAD"],
+    ],
+)
+def test_allowed(args):
+    _validate_git_args(args)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        [],
+        ["push"],
+        ["config", "user.name"],
+        ["diff", "--output=/tmp/x"],
+        ["diff", "HEAD"],
+        ["diff", SHA[:12]],
+        ["diff", f"{SHA}^"],
+        ["diff", "main..HEAD"],
+        ["rev-list", "--all"],
+        ["rev-list", "-n1"],
+        ["rev-list", "--output=/tmp/x"],
+        ["rev-list", "..HEAD"],
+        ["rev-list", "main..HEAD;rm"],
+        ["rev-list", "main HEAD"],
+        ["write-tree", "main..HEAD"],
+    ],
+)
+def test_rejected(args):
+    with pytest.raises(ValueError):
+        _validate_git_args(args)
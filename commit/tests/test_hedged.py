@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from providers.base import BaseProvider, ProviderChainError, is_retryable
+from providers.failover import ProviderHealth
+from providers.hedged import DEFAULT_HEDGE_AFTER, HedgedProvider
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, name, delay, error=None):
+        self._name = name
+        self.delay = delay
+        self.error = error
+        self.closed = False
+
+    @property
+    def name(self):
+        return self._name
+
+    def get_default_model(self):
+        return self._name
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self._name
+
+    def stream_completion(self, prompt, model=None, system=None, deadline=None):
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            for index in range(3):
+                yield f"{self._name}{index} "
+        finally:
+            self.closed = True
+
+
+def test_hedge_delay_uses_p95_latency():
+    health = ProviderHealth()
+    for latency in (0.2, 0.2, 0.2, 0.2, 0.2):
+        health.record_success("primary", latency)
+    primary, backup = FakeProvider("primary", 0), FakeProvider("backup", 0)
+
+    provider = HedgedProvider([primary, backup], None, health)
+    assert provider.hedge_delay(primary) == pytest.approx(0.2)
+    assert provider.hedge_delay(backup) == DEFAULT_HEDGE_AFTER
+    assert HedgedProvider([primary, backup], 1.5, health).hedge_delay(primary) == 1.5
+
+
+def test_slow_primary_is_hedged():
+    provider = HedgedProvider([FakeProvider("slow", 1.0), FakeProvider("fast", 0)], 0.05)
+    assert provider.chat_completion("prompt") == "fast"
+
+
+def test_stream_commits_to_the_first_backend_with_output():
+    slow = FakeProvider("slow", 0.5)
+    provider = HedgedProvider([slow, FakeProvider("fast", 0)], 0.05)
+    assert "".join(provider.stream_completion("prompt")) == "fast0 fast1 fast2 "
+
+    time.sleep(0.6)
+    assert slow.closed
+
+
+def test_stream_fails_over_immediately_on_error():
+    provider = HedgedProvider(
+        [FakeProvider("broken", 0, RuntimeError("boom")), FakeProvider("backup", 0)], 10
+    )
+    started = time.monotonic()
+    assert list(provider.stream_completion("prompt"))[0] == "backup0 "
+    assert time.monotonic() - started < 1
+
+
+def test_stream_raises_when_every_backend_fails():
+    provider = HedgedProvider(
+        [FakeProvider("a", 0, RuntimeError("boom")), FakeProvider("b", 0, RuntimeError("bust"))],
+        10,
+    )
+    with pytest.raises(ProviderChainError, match="All hedged providers failed") as info:
+        list(provider.stream_completion("prompt"))
+    assert not info.value.retryable
+
+
+def test_chain_of_transient_failures_is_retryable():
+    provider = HedgedProvider(
+        [FakeProvider("a", 0, TimeoutError("slow")), FakeProvider("b", 0, ConnectionError())],
+        10,
+    )
+    with pytest.raises(ProviderChainError) as info:
+        provider.chat_completion("prompt")
+    assert is_retryable(info.value)
+
+
+def test_stream_deadline():
+    provider = HedgedProvider([FakeProvider("a", 1.0), FakeProvider("b", 1.0)], 0.05)
+    with pytest.raises(TimeoutError):
+        list(provider.stream_completion("prompt", deadline=time.monotonic() + 0.2))
@@ -0,0 +1,81 @@
+import threading
+
+from diff_parser import parse_diff
+from providers.base import BaseProvider
+
+
+def _file_diff(path, lines):
+    body = "".join(f"+line {index} of {path}\n" for index in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        f"@@ -0,0 +1,{lines} @@\n"
+        f"{body}"
+    )
+
+
+def _records(diff):
+    return list(parse_diff(diff.splitlines(True)))
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return "fake"
+
+    def get_default_model(self):
+        return "model"
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        with self._lock:
+            self.prompts.append((prompt, system))
+        if prompt.startswith("Git diff:"):
+            return f"- summary of {prompt.count('diff --git')} files"
+        return "✨ feat: add files\n\nAdd generated line files to the project."
+
+
+def test_groups_keep_file_order_and_respect_the_budget(analyzer):
+    diff = "".join(_file_diff(f"f{index}.txt", 20) for index in range(5))
+    groups = analyzer._group_diff_blocks(_records(diff), 300)
+
+    assert len(groups) > 1
+    assert "".join(groups) == diff
+    assert all(analyzer.estimate_tokens(group) <= 300 for group in groups)
+
+
+def test_oversized_file_is_truncated_into_its_own_group(analyzer):
+    diff = _file_diff("small.txt", 2) + _file_diff("huge.txt", 500)
+    groups = analyzer._group_diff_blocks(_records(diff), 200)
+
+    assert len(groups) == 2
+    assert groups[0].startswith("diff --git a/small.txt")
+    assert "more lines truncated" in groups[1]
+
+
+def test_large_diffs_are_summarized_before_the_final_prompt(analyzer, monkeypatch):
+    monkeypatch.setenv("COMMIT_MAP_REDUCE_TOKENS", "500")
+    monkeypatch.setenv("COMMIT_MAP_CHUNK_TOKENS", "400")
+    diff = "".join(_file_diff(f"f{index}.txt", 30) for index in range(6))
+    provider = FakeProvider()
+
+    message = analyzer.generate_commit_message(diff, provider=provider)
+
+    assert message.startswith("✨ feat: add files")
+    summaries = [p for p, system in provider.prompts if system == analyzer._SUMMARY_INSTRUCTIONS]
+    final = [p for p, system in provider.prompts if system == analyzer._COMMIT_INSTRUCTIONS]
+    assert len(summaries) > 1
+    assert len(final) == 1
+    assert "Summaries of the staged changes" in final[0]
+    assert "diff --git" not in final[0]
+    assert "map_summaries" in analyzer.metrics.current().stages
+
+
+def test_small_diffs_go_straight_to_the_model(analyzer):
+    provider = FakeProvider()
+    analyzer.generate_commit_message(_file_diff("a.txt", 3), provider=provider)
+    assert len(provider.prompts) == 1
@@ -0,0 +1,99 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import metrics
+from providers.base import report_usage, set_usage_callback
+
+
+@pytest.fixture(autouse=True)
+def run(monkeypatch):
+    monkeypatch.delenv("COMMIT_METRICS_LOG", raising=False)
+    yield metrics.reset()
+    set_usage_callback(None)
+
+
+def test_repeated_stages_add_up(run):
+    with metrics.stage("completion"):
+        time.sleep(0.01)
+    with metrics.stage("completion"):
+        time.sleep(0.01)
+    assert run.stages["completion"] >= 0.02
+
+
+def test_usage_is_totalled_per_model(run):
+    metrics.record_usage("openai", "gpt-x", 100, 20, 40)
+    metrics.record_usage("openai", "gpt-x", 50, 10)
+    metrics.record_usage("anthropic", "claude-x", 10, 5)
+
+    assert run.models["openai:gpt-x"] == {
+        "requests": 2,
+        "input_tokens": 150,
+        "output_tokens": 30,
+        "cached_input_tokens": 40,
+    }
+    assert run.usage["requests"] == 3
+    assert run.usage["input_tokens"] == 160
+
+
+def test_providers_report_through_the_callback(run):
+    set_usage_callback(metrics.record_usage)
+    report_usage("openai", "gpt-x", 10, 2)
+    assert run.usage["requests"] == 1
+
+
+def test_daemon_usage_is_merged(run):
+    metrics.merge_models({"openai:gpt-x": {"requests": 1, "input_tokens": 7}})
+    assert run.models["openai:gpt-x"]["input_tokens"] == 7
+    assert run.usage["output_tokens"] == 0
+
+
+def test_concurrent_stages_and_usage(run):
+    def work(_index):
+        with metrics.stage("batch"):
+            metrics.record_usage("openai", "gpt-x", 1, 1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(100)))
+    assert run.usage["requests"] == 100
+
+
+def test_log_appends_one_json_line_per_run(tmp_path, monkeypatch):
+    path = tmp_path / "logs" / "metrics.jsonl"
+    monkeypatch.setenv("COMMIT_METRICS_LOG", str(path))
+
+    for source in ("rules", "provider"):
+        metrics.reset()
+        with metrics.stage("git_diff"):
+            pass
+        metrics.annotate(source=source)
+        metrics.write_log()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["source"] for r in records] == ["rules", "provider"]
+    assert set(records[0]) >= {"timestamp", "repository", "total_ms", "stages_ms", "usage"}
+    assert "git_diff" in records[0]["stages_ms"]
+
+
+def test_log_is_skipped_without_a_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.write_log()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unwritable_log_is_reported_not_raised(tmp_path, capsys):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    metrics.write_log(str(blocker / "metrics.jsonl"))
+    assert "Could not write metrics" in capsys.readouterr().out
+
+
+def test_summary_lists_stages_and_usage(run):
+    with metrics.stage("prompt"):
+        pass
+    metrics.record_usage("openai", "gpt-x", 100, 20, 40)
+    summary = run.summary()
+    assert "prompt" in summary
+    assert "1 requests: 100 input tokens (40 cached), 20 output tokens" in summary
@@ -0,0 +1,56 @@
+import pytest
+
+import commit_analyzer
+from providers.base import BaseProvider
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, model="model-a"):
+        self._model = model
+
+    @property
+    def name(self):
+        return "fake"
+
+    def get_default_model(self):
+        return self._model
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        return "✨ feat: add"
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(commit_analyzer, "_STATE_DIR", tmp_path)
+    monkeypatch.setattr(commit_analyzer, "_PREGENERATED_PATH", tmp_path / "pregenerated.json")
+    monkeypatch.setattr(commit_analyzer, "_staged_tree_hash", lambda: "tree-1")
+    monkeypatch.setattr(commit_analyzer, "get_provider", lambda state_dir=None: provider)
+    commit_analyzer._save_pregenerated(
+        "tree-1", commit_analyzer._settings_key(provider), "✨ feat: add"
+    )
+    return provider
+
+
+def test_matching_tree_and_settings(state):
+    assert commit_analyzer._load_pregenerated() == "✨ feat: add"
+
+
+def test_tree_mismatch(state, monkeypatch):
+    monkeypatch.setattr(commit_analyzer, "_staged_tree_hash", lambda: "tree-2")
+    assert commit_analyzer._load_pregenerated() is None
+
+
+def test_model_change(state):
+    state._model = "model-b"
+    assert commit_analyzer._load_pregenerated() is None
+
+
+def test_setting_change(state, monkeypatch):
+    monkeypatch.setenv("COMMIT_CANDIDATES", "3")
+    assert commit_analyzer._load_pregenerated() is None
+
+
+def test_prompt_version_change(state, monkeypatch):
+    monkeypatch.setattr(commit_analyzer, "PROMPT_VERSION", "next")
+    assert commit_analyzer._load_pregenerated() is None
@@ -0,0 +1,159 @@
+import pytest
+
+from providers import rate_limit
+from providers.base import BaseProvider
+from providers.rate_limit import RateLimitedProvider, RateLimiter, limits_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # At least a millisecond, like a real sleep; rounding can leave a
+        # wait too small to move a float clock around 1000.0
+        self.now += max(seconds, 0.001)
+
+
+@pytest.fixture(autouse=True)
+def default_limits(monkeypatch):
+    for name in ("COMMIT_RPM", "COMMIT_TPM", "ANTHROPIC_RPM", "OPENAI_RPM", "OPENAI_TPM",
+                 "OPENAI_COMPATIBLE_TPM"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "time", fake.time)
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_burst_up_to_capacity_then_refill(clock):
+    limiter = RateLimiter()
+    for _ in range(6):
+        assert limiter.acquire("p:m", requests_per_minute=6, timeout=0)
+    assert not limiter.acquire("p:m", requests_per_minute=6, timeout=0)
+
+    # 6 per minute refills one request every 10 seconds
+    clock.now += 10
+    assert limiter.acquire("p:m", requests_per_minute=6, timeout=0)
+    assert not limiter.acquire("p:m", requests_per_minute=6, timeout=0)
+
+
+def test_waits_for_the_token_bucket(clock):
+    limiter = RateLimiter()
+    assert limiter.acquire("p:m", 0, tokens_per_minute=600, tokens=600)
+    started = clock.now
+    assert limiter.acquire("p:m", 0, tokens_per_minute=600, tokens=300)
+    assert clock.now - started == pytest.approx(30)
+
+
+def test_timeout_gives_up_without_taking_budget(clock):
+    limiter = RateLimiter()
+    assert limiter.acquire("p:m", 0, tokens_per_minute=600, tokens=600)
+    assert not limiter.acquire("p:m", 0, tokens_per_minute=600, tokens=300, timeout=5)
+    clock.now += 30
+    assert limiter.acquire("p:m", 0, tokens_per_minute=600, tokens=300, timeout=0)
+
+
+def test_keys_and_disabled_limits_are_independent(clock):
+    limiter = RateLimiter()
+    assert limiter.acquire("a:m", 1, timeout=0)
+    assert limiter.acquire("b:m", 1, timeout=0)
+    assert limiter.acquire("a:m", 0, timeout=0)
+
+
+def test_state_file_is_shared(tmp_path, clock):
+    path = tmp_path / "rate-limits.json"
+    assert RateLimiter(path).acquire("p:m", 1, timeout=0)
+    assert not RateLimiter(path).acquire("p:m", 1, timeout=0)
+
+
+def test_limits_for_prefers_provider_variables(monkeypatch):
+    assert limits_for("anthropic") == (50, 30000)
+    assert limits_for("openai-compatible") == (0.0, 0.0)
+
+    monkeypatch.setenv("COMMIT_RPM", "10")
+    monkeypatch.setenv("ANTHROPIC_RPM", "5")
+    monkeypatch.setenv("OPENAI_COMPATIBLE_TPM", "1000")
+    assert limits_for("anthropic") == (5.0, 30000)
+    assert limits_for("openai") == (10.0, 500000)
+    assert limits_for("openai-compatible") == (10.0, 1000.0)
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def acquire(self, key, requests_per_minute, tokens_per_minute=0, tokens=0,
+                requests=1, timeout=None):
+        self.calls.append((key, tokens, requests))
+        return True
+
+
+class FakeProvider(BaseProvider):
+    name = "openai"
+
+    def __init__(self, requests_per_call):
+        self._requests_per_call = requests_per_call
+
+    def get_default_model(self):
+        return "gpt-x"
+
+    def max_output_tokens(self):
+        return 100
+
+    def candidate_requests(self, count):
+        return self._requests_per_call or count
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        return "answer"
+
+    def generate_candidates(self, prompt, count, model=None, system=None, deadline=None):
+        return ["answer"] * count
+
+
+@pytest.mark.parametrize("requests_per_call, expected_requests", [(1, 1), (None, 3)])
+def test_candidates_charge_the_requests_actually_sent(requests_per_call, expected_requests):
+    limiter = RecordingLimiter()
+    provider = RateLimitedProvider(FakeProvider(requests_per_call), limiter)
+    provider.generate_candidates("x" * 400, 3)
+
+    ((key, tokens, requests),) = limiter.calls
+    assert key == "openai:gpt-x"
+    assert requests == expected_requests
+    # The prompt once per request, the output allowance once per candidate
+    assert tokens == expected_requests * 100 + 3 * 100
+
+
+def test_deadline_turns_a_long_wait_into_a_timeout(clock):
+    limiter = RateLimiter()
+    provider = RateLimitedProvider(FakeProvider(1), limiter)
+    # Empty the request bucket: the next request frees up in 60 / 500 seconds
+    limiter.acquire("openai:gpt-x", 500, requests=500)
+    with pytest.raises(TimeoutError):
+        provider.chat_completion("prompt", deadline=clock.now + 0.05)
+    assert provider.chat_completion("prompt", deadline=clock.now + 1) == "answer"
+
+
+def test_missing_file_locks_fall_back_to_memory_with_one_warning(
+    tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setattr(rate_limit, "LOCKING_SUPPORTED", False)
+    monkeypatch.setattr(rate_limit, "_warned_unshared", False)
+
+    RateLimiter(tmp_path / "limits.json")
+    assert RateLimiter(tmp_path / "limits.json").acquire("openai:gpt-x", 10)
+
+    assert capsys.readouterr().out.count("rate limits apply to this process only") == 1
+    assert not (tmp_path / "limits.json").exists()
@@ -0,0 +1,86 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import ResponseCache
+
+
+def _key(prompt="diff", settings=None):
+    return ResponseCache.make_key(prompt, "system", "openai", "gpt-x", "3", settings)
+
+
+def _age(cache, key, seconds):
+    path = cache._entry_path(key)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_key_is_stable_and_covers_every_input():
+    assert _key() == _key()
+    assert _key(settings={"a": "1", "b": "2"}) == _key(settings={"b": "2", "a": "1"})
+    assert _key() != _key(prompt="other diff")
+    assert _key(settings={"candidates": "1"}) != _key(settings={"candidates": "3"})
+    assert ResponseCache.make_key("ab", "c", "p", "m", "3") != ResponseCache.make_key(
+        "b", "ac", "p", "m", "3"
+    )
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ResponseCache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", "✨ feat: add", "openai", "gpt-x")
+    assert cache.get("k") == "✨ feat: add"
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["bytes"] > 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path, max_entries=2)
+    cache.put("a", "message a", "p", "m")
+    cache.put("b", "message b", "p", "m")
+    _age(cache, "a", 20)
+    _age(cache, "b", 10)
+    cache.get("a")
+
+    cache.put("c", "message c", "p", "m")
+    assert cache.get("a") == "message a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "message c"
+
+
+def test_size_limit(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=300)
+    for index in range(5):
+        cache.put(str(index), "x" * 100, "p", "m")
+    stats = cache.stats()
+    assert stats["entries"] < 5
+    assert stats["bytes"] <= 300
+
+
+def test_expired_entries_miss_and_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path, max_age_seconds=60)
+    cache.put("old", "message", "p", "m")
+    _age(cache, "old", 120)
+    assert cache.get("old") is None
+    assert cache.evict() == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_clear_resets_entries_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("k", "message", "p", "m")
+    cache.get("k")
+    assert cache.clear() == 1
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0}
+
+
+def test_concurrent_lookups_keep_every_count(tmp_path):
+    def lookup(index):
+        ResponseCache(tmp_path).get(f"missing-{index}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lookup, range(200)))
+
+    assert ResponseCache(tmp_path).stats()["misses"] == 200
+    assert not list(tmp_path.glob("*.tmp"))
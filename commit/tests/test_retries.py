@@ -0,0 +1,146 @@
+import pytest
+
+from providers import base
+from providers.base import call_with_retries, is_retryable, stream_with_retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(base.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(base.time, "sleep", fake.sleep)
+    # Always wait the longest backoff, so delays are predictable
+    monkeypatch.setattr(base.random, "uniform", lambda low, high: high)
+    monkeypatch.setenv("COMMIT_MAX_RETRIES", "2")
+    monkeypatch.setenv("COMMIT_REQUEST_TIMEOUT", "30")
+    return fake
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _failing(errors, result="ok"):
+    """Return a call that raises the given errors in turn, then succeeds."""
+    timeouts = []
+
+    def call(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) <= len(errors):
+            raise errors[len(timeouts) - 1]
+        return result
+
+    return call, timeouts
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(401), False),
+        (TimeoutError(), True),
+        (ValueError("bad model"), False),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_transient_errors_are_retried_with_growing_backoff(clock):
+    call, timeouts = _failing([StatusError(503), StatusError(429)])
+    assert call_with_retries(call) == "ok"
+    assert timeouts == [30, 30, 30]
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_retries_stop_after_the_limit(clock):
+    call, timeouts = _failing([StatusError(503)] * 3)
+    with pytest.raises(StatusError):
+        call_with_retries(call)
+    assert len(timeouts) == 3
+
+
+def test_permanent_errors_are_not_retried(clock):
+    call, timeouts = _failing([StatusError(401)])
+    with pytest.raises(StatusError):
+        call_with_retries(call)
+    assert len(timeouts) == 1
+
+
+def test_attempt_timeout_is_capped_by_the_deadline(clock):
+    call, timeouts = _failing([])
+    call_with_retries(call, deadline=clock.now + 5)
+    assert timeouts == [5]
+
+
+def test_backoff_past_the_deadline_raises_the_last_error(clock):
+    call, timeouts = _failing([StatusError(503)])
+    with pytest.raises(StatusError):
+        call_with_retries(call, deadline=clock.now + 0.2)
+    assert len(timeouts) == 1
+    assert clock.sleeps == []
+
+
+def test_expired_deadline_sends_nothing(clock):
+    call, timeouts = _failing([])
+    with pytest.raises(TimeoutError):
+        call_with_retries(call, deadline=clock.now - 1)
+    assert timeouts == []
+
+
+def test_stream_retries_until_the_first_chunk(clock):
+    attempts = []
+
+    def open_stream(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            raise StatusError(503)
+        yield "a"
+        yield "b"
+
+    assert list(stream_with_retries(open_stream)) == ["a", "b"]
+    assert len(attempts) == 2
+
+
+def test_stream_errors_after_output_are_raised(clock):
+    attempts = []
+
+    def open_stream(timeout):
+        attempts.append(timeout)
+        yield "a"
+        raise StatusError(503)
+
+    chunks = []
+    with pytest.raises(StatusError):
+        for chunk in stream_with_retries(open_stream):
+            chunks.append(chunk)
+    assert chunks == ["a"]
+    assert len(attempts) == 1
+
+
+def test_stream_stops_when_the_deadline_passes_between_chunks(clock):
+    def open_stream(timeout):
+        yield "a"
+        yield "b"
+
+    stream = stream_with_retries(open_stream, deadline=clock.now + 5)
+    assert next(stream) == "a"
+    clock.now += 10
+    with pytest.raises(TimeoutError):
+        next(stream)
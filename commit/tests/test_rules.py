@@ -0,0 +1,108 @@
+import pytest
+
+from diff_parser import FileDiff, STATUS_ADDED, STATUS_DELETED, STATUS_RENAMED
+from rules import REPOSITORY_CONTEXT_PATH, classify, fallback_message, rule_names
+
+
+def _record(path, status=None, added=1, removed=0, old_path=None, hunks=None):
+    record = FileDiff(path)
+    if status:
+        record.status = status
+    record.old_path = old_path or path
+    record.added = added
+    record.removed = removed
+    record.hunks = hunks if hunks is not None else ["@@ -1 +1 @@\n-a\n+b\n"]
+    return record
+
+
+def _subject(message):
+    return message.splitlines()[0] if message else None
+
+
+def test_lock_file_wins():
+    records = [_record("pnpm-lock.yaml"), _record("src/app.ts")]
+    assert classify(records) == "📦 deps: update dependencies"
+
+
+def test_repository_context_only():
+    assert _subject(classify([_record(REPOSITORY_CONTEXT_PATH)])) == (
+        "📝 docs: update repository context"
+    )
+
+
+def test_pure_rename():
+    record = _record("b.py", STATUS_RENAMED, added=0, old_path="a.py", hunks=[])
+    message = classify([record])
+    assert _subject(message) == "🚚 move: rename b.py"
+    assert "- a.py -> b.py" in message
+
+
+def test_deletions():
+    records = [_record("a.py", STATUS_DELETED), _record("b.py", STATUS_DELETED)]
+    assert _subject(classify(records)).endswith("remove 2 files")
+
+
+def test_tests_only_added():
+    records = [_record("src/__tests__/a.test.ts", STATUS_ADDED)]
+    assert _subject(classify(records)) == "✅ test: add a.test.ts"
+
+
+@pytest.mark.parametrize(
+    "path", ["README.md", "docs/setup.txt", "CHANGELOG", "AUTHORS.txt", "guide.rst"]
+)
+def test_docs_only(path):
+    assert _subject(classify([_record(path)])).startswith("📝 docs: update")
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "requirements.txt",
+        "CMakeLists.txt",
+        "src/readme_utils.py",
+        "src/changelog_parser.ts",
+        "src/authors.js",
+    ],
+)
+def test_files_named_like_docs_are_not_docs(path):
+    assert classify([_record(path)]) is None
+
+
+@pytest.mark.parametrize("path", ["LICENSE", "LICENSE.txt", "vendor/lib/LICENSE.md"])
+def test_license_only(path):
+    assert _subject(classify([_record(path)])).startswith("📄 license: update")
+
+
+def test_whitespace_only():
+    hunk = "@@ -1,2 +1,2 @@\n-  if (x) {\n-    run();\n+if (x) {\n+  run();\n"
+    message = classify([_record("src/app.js", hunks=[hunk])])
+    assert _subject(message) == "🎨 style: fix whitespace in app.js"
+
+
+def test_python_indentation_change_is_not_whitespace():
+    hunk = "@@ -1,2 +1,2 @@\n if x:\n-    delete_everything()\n+delete_everything()\n"
+    assert classify([_record("src/app.py", hunks=[hunk])]) is None
+
+
+def test_ci_only():
+    assert _subject(classify([_record(".github/workflows/ci.yml")])) == (
+        "👷 ci: update ci.yml"
+    )
+
+
+def test_source_change_needs_the_provider():
+    assert classify([_record("src/app.ts")]) is None
+    assert classify([]) is None
+
+
+def test_enabled_rules_filter():
+    records = [_record("README.md")]
+    assert classify(records, enabled=["ci"]) is None
+    assert classify(records, enabled=["docs"]) is not None
+    assert "docs" in rule_names()
+
+
+def test_fallback_message_covers_any_change():
+    message = fallback_message([_record("src/app.ts"), _record("src/lib.ts")])
+    assert _subject(message) == "🔧 chore: update 2 files"
+    assert "- src/lib.ts" in message
@@ -0,0 +1,80 @@
+from providers.base import BaseProvider
+
+DIFF = """\
+diff --git a/src/app.py b/src/app.py
+--- a/src/app.py
++++ b/src/app.py
+@@ -1 +1 @@
+-print("a")
++print("b")
+"""
+
+MESSAGE = "✨ feat: print b\n\nPrint b instead of a when the app starts."
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.streamed = False
+
+    @property
+    def name(self):
+        return "fake"
+
+    def get_default_model(self):
+        return "model"
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        return "".join(self.chunks)
+
+    def stream_completion(self, prompt, model=None, system=None, deadline=None):
+        self.streamed = True
+        yield from self.chunks
+
+
+class Blocking(BaseProvider):
+    name = "blocking"
+
+    def get_default_model(self):
+        return "model"
+
+    def chat_completion(self, prompt, model=None, system=None, deadline=None):
+        return " whole response "
+
+
+def test_default_stream_yields_the_whole_response():
+    assert list(Blocking().stream_completion("prompt")) == [" whole response "]
+
+
+def test_tokens_are_forwarded_as_they_arrive(analyzer):
+    provider = FakeProvider(
+        ["\n", "  ✨ feat", ": print b\n\n", "Print b instead of a ", "when the app starts."]
+    )
+    tokens = []
+
+    message = analyzer.generate_commit_message(DIFF, on_token=tokens.append, provider=provider)
+
+    assert provider.streamed
+    assert message == MESSAGE
+    assert tokens[0] == "✨ feat"
+    assert "".join(tokens) == MESSAGE
+
+
+def test_without_on_token_nothing_is_streamed(analyzer):
+    provider = FakeProvider([MESSAGE])
+    assert analyzer.generate_commit_message(DIFF, provider=provider) == MESSAGE
+    assert not provider.streamed
+
+
+def test_printer_records_first_token_time(analyzer, capsys):
+    printer = analyzer._StreamPrinter()
+    printer("✨ feat")
+    printer(": print b")
+
+    assert printer.text == "✨ feat: print b"
+    assert printer.first_token_ms is not None
+    assert analyzer.metrics.current().fields["first_token_ms"] == printer.first_token_ms
+
+    printer.finish()
+    printer("ignored")
+    assert "ignored" not in capsys.readouterr().out
@@ -5,12 +5,17 @@
 from __future__ import annotations
 
 import argparse
+import base64
+import json
 import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional
 
 import niquests
 
@@ -21,6 +26,39 @@ import niquests
 _GITHUB_API_HOST = "api.github.com"
 _DEFAULT_WORKFLOW_DIR = ".github/workflows"
 _WORKFLOW_DIR_HELP = "Workflow directory to scan"
+# Refs resolved in parallel (each may take several API round trips)
+_DEFAULT_JOBS = 8
+
+# Seconds a cached API response is reused without asking GitHub again.
+# Branches move often and tags rarely; tag objects are addressed by their
+# SHA and never change, so they are kept until purged.
+_CACHE_TTL_BRANCH = 5 * 60
+_CACHE_TTL_TAG = 60 * 60
+_CACHE_VERSION = 1
+
+# Refs per GraphQL query; each asks for a tag and a branch of that name
+_GRAPHQL_BATCH_SIZE = 50
+# Ref target, peeling up to two levels of annotated tags
+_GRAPHQL_TARGET = (
+    "target { __typename oid ... on Tag { target { __typename oid "
+    "... on Tag { target { __typename oid } } } } }"
+)
+RESOLVERS = ("auto", "graphql", "rest")
+
+# Rate limiting: longest wait for a limit to reset before giving up, the
+# remaining budget below which requests are spaced out, and the backoff for
+# secondary (abuse) limits that come without a Retry-After header
+_DEFAULT_MAX_WAIT = 60
+_LOW_BUDGET = 10
+_MAX_PACING_DELAY = 1.0
+_SECONDARY_LIMIT_BACKOFF = 60
+_MAX_ATTEMPTS = 3
+
+# Transitive crawl: nesting levels followed below the workflow files
+_MAX_CRAWL_DEPTH = 10
+_ACTION_FILES = ("action.yml", "action.yaml")
+# API paths for file contents at a commit SHA, which never change
+_CONTENT_AT_SHA = re.compile(r"/contents/.*\?ref=[0-9a-f]{40}$")
 
 SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
 # Matches:  uses: owner/repo@ref           (simple)
@@ -162,36 +200,286 @@ def scan_workflows(workflow_dir: Path) -> AuditResult:
         if fpath.suffix not in (".yml", ".yaml"):
             continue
         with open(fpath, encoding="utf-8") as f:
-            for line_num, line in enumerate(f, start=1):
-                m = USES_PATTERN.match(line)
-                if m:
-                    result.refs.append(
-                        ActionRef(
-                            file=fpath,
-                            line_number=line_num,
-                            line_text=line.rstrip(),
-                            action=m.group("action"),
-                            ref=m.group("ref"),
-                            comment=m.group("comment"),
-                        )
-                    )
+            result.refs.extend(scan_lines(f, fpath))
 
     return result
 
 
+def scan_lines(lines: Iterable[str], fpath: Path) -> list[ActionRef]:
+    """Return the action references in the lines of one workflow or action file."""
+    refs: list[ActionRef] = []
+    for line_num, line in enumerate(lines, start=1):
+        m = USES_PATTERN.match(line)
+        if m:
+            refs.append(
+                ActionRef(
+                    file=fpath,
+                    line_number=line_num,
+                    line_text=line.rstrip(),
+                    action=m.group("action"),
+                    ref=m.group("ref"),
+                    comment=m.group("comment"),
+                )
+            )
+    return refs
+
+
+# ---------------------------------------------------------------------------
+# Response cache — GitHub API responses persisted between runs
+# ---------------------------------------------------------------------------
+
+
+def _default_cache_path() -> Path:
+    """Return the cache file: PIN_ACTIONS_CACHE, else under XDG_CACHE_HOME."""
+    override = os.environ.get("PIN_ACTIONS_CACHE")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pin-actions" / "responses.json"
+
+
+def _cache_ttl(path: str) -> Optional[float]:
+    """Return how long a response may be reused unchecked; None is forever."""
+    if "/git/tags/" in path or _CONTENT_AT_SHA.search(path):
+        return None
+    if "/branches/" in path:
+        return _CACHE_TTL_BRANCH
+    return _CACHE_TTL_TAG
+
+
+class ResponseCache:
+    """GitHub API responses on disk, keyed by API path.
+
+    Fresh entries are returned without a request. Expired entries are
+    revalidated with If-None-Match; a 304 reply does not count against the
+    rate limit and restarts the entry's TTL.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Load the cache file at path, starting empty if it is unreadable."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            ok = data.get("version") == _CACHE_VERSION
+            self._entries: dict[str, dict] = data["entries"] if ok else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self._entries = {}
+
+    @staticmethod
+    def is_fresh(api_path: str, entry: dict, now: Optional[float] = None) -> bool:
+        """Return True if entry may be used without revalidation."""
+        ttl = _cache_ttl(api_path)
+        if ttl is None:
+            return True
+        return (now or time.time()) - entry["stored"] < ttl
+
+    def get(self, api_path: str) -> Optional[dict]:
+        """Return the entry for an API path, or None."""
+        with self._lock:
+            return self._entries.get(api_path)
+
+    def store(self, api_path: str, etag: Optional[str], body: object) -> None:
+        """Record a 200 response."""
+        with self._lock:
+            self._entries[api_path] = {"etag": etag, "stored": time.time(), "body": body}
+            self._dirty = True
+            self.fetched += 1
+
+    def touch(self, api_path: str) -> None:
+        """Restart an entry's TTL after GitHub confirmed it is unchanged."""
+        with self._lock:
+            self._entries[api_path]["stored"] = time.time()
+            self._dirty = True
+            self.revalidated += 1
+
+    def hit(self) -> None:
+        """Count a response served without a request."""
+        with self._lock:
+            self.fresh_hits += 1
+
+    def items(self) -> list[tuple[str, dict]]:
+        """Return (API path, entry) pairs sorted by path."""
+        with self._lock:
+            return sorted(self._entries.items())
+
+    def purge(self, expired_only: bool = False, repo: Optional[str] = None) -> int:
+        """Remove entries, optionally only expired ones or one repo's. Returns the count."""
+        now = time.time()
+        with self._lock:
+            doomed = [
+                api_path for api_path, entry in self._entries.items()
+                if (repo is None or api_path.startswith(f"/repos/{repo}/"))
+                and not (expired_only and self.is_fresh(api_path, entry, now))
+            ]
+            for api_path in doomed:
+                del self._entries[api_path]
+            self._dirty = self._dirty or bool(doomed)
+        return len(doomed)
+
+    def save(self) -> None:
+        """Write the cache back if it changed, replacing the file atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": _CACHE_VERSION, "entries": self._entries}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(yellow(f"Warning: could not save cache {self.path}: {e}"), file=sys.stderr)
+
+    def summary(self) -> str:
+        """Describe how requests were served during this run."""
+        return (
+            f"{self.fresh_hits} from cache, {self.revalidated} revalidated (304), "
+            f"{self.fetched} fetched"
+        )
+
+
+# Enabled by the CLI for commands that resolve refs
+_response_cache: Optional[ResponseCache] = None
+
+
+def _enable_response_cache(path: Optional[Path] = None) -> ResponseCache:
+    """Load the response cache and route API requests through it."""
+    global _response_cache  # noqa: PLW0603
+    _response_cache = ResponseCache(path or _default_cache_path())
+    return _response_cache
+
+
 # ---------------------------------------------------------------------------
 # GitHub API — resolve ref to SHA (uses niquests for secure HTTPS)
 # ---------------------------------------------------------------------------
 
+class RateLimitError(RuntimeError):
+    """The API budget is exhausted for longer than the run is willing to wait."""
+
+
+@dataclass
+class RateLimitBudget:
+    limit: int
+    remaining: int
+    reset: float  # epoch seconds when the budget refills
+
+
+class RateLimiter:
+    """Track GitHub's rate limit headers per resource and pace requests.
+
+    Every response updates the budget of its resource (``core`` for REST,
+    ``graphql``). Before a request, one unit is reserved so concurrent
+    workers cannot overrun the budget; when it is low requests are spaced
+    out, and when it is spent the request waits for the reset or fails
+    with RateLimitError without being sent.
+    """
+
+    def __init__(self, max_wait: float = _DEFAULT_MAX_WAIT) -> None:
+        """Create a limiter that waits at most max_wait seconds at a time."""
+        self.max_wait = max_wait
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._budgets: dict[str, RateLimitBudget] = {}
+
+    def acquire(self, resource: str) -> None:
+        """Wait until a request against resource fits the known budget."""
+        with self._lock:
+            budget = self._budgets.get(resource)
+            now = time.time()
+            if budget is None or budget.reset <= now:
+                return
+            if budget.remaining <= 0:
+                delay = budget.reset - now + 1
+            elif budget.remaining <= _LOW_BUDGET:
+                delay = min((budget.reset - now) / budget.remaining, _MAX_PACING_DELAY)
+            else:
+                delay = 0.0
+            if delay > self.max_wait:
+                raise RateLimitError(
+                    f"GitHub API rate limit for '{resource}' is exhausted until "
+                    f"{time.strftime('%H:%M:%S', time.localtime(budget.reset))}"
+                )
+            budget.remaining -= 1
+
+        self.sleep(delay)
+
+    def sleep(self, delay: float) -> None:
+        """Sleep for a rate limit delay, keeping track of the total."""
+        if delay > 0:
+            with self._lock:
+                self.waited += delay
+            time.sleep(delay)
+
+    def update(self, resource: str, headers) -> None:
+        """Record the budget reported in a response's X-RateLimit headers."""
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            budget = RateLimitBudget(
+                limit=int(headers.get("X-RateLimit-Limit", remaining)),
+                remaining=remaining,
+                reset=float(headers["X-RateLimit-Reset"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self._budgets[headers.get("X-RateLimit-Resource") or resource] = budget
+
+    def retry_delay(self, resp, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying a rate-limited response.
+
+        Returns None for responses that were not rate limited, such as a
+        403 for a private repository.
+        """
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            return max(0.0, float(resp.headers.get("X-RateLimit-Reset", 0)) - time.time()) + 1
+        if "secondary rate limit" in resp.text.lower():
+            return float(_SECONDARY_LIMIT_BACKOFF * 2 ** attempt)
+        return None
+
+    def summary(self) -> str:
+        """Describe the remaining budget of every resource seen this run."""
+        with self._lock:
+            parts = [
+                f"{resource} {b.remaining}/{b.limit} left "
+                f"(resets {time.strftime('%H:%M', time.localtime(b.reset))})"
+                for resource, b in sorted(self._budgets.items())
+            ]
+            waited = self.waited
+        if waited:
+            parts.append(f"waited {waited:.0f}s")
+        return ", ".join(parts)
+
+
+_rate_limiter = RateLimiter()
+
 # Reuse a single session for connection pooling and secure defaults
 _session: Optional[niquests.Session] = None
 
 
-def _get_session(token: Optional[str] = None) -> niquests.Session:
-    """Return a shared niquests session with GitHub API headers."""
+def _get_session(
+    token: Optional[str] = None, pool_size: int = _DEFAULT_JOBS,
+) -> niquests.Session:
+    """Return a shared niquests session with GitHub API headers.
+
+    The session is created on first use with room for pool_size concurrent
+    connections; call this before starting worker threads.
+    """
     global _session  # noqa: PLW0603
     if _session is None:
-        _session = niquests.Session()
+        _session = niquests.Session(pool_maxsize=pool_size)
         _session.headers.update({
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "pin-actions/1.0",
@@ -201,13 +489,61 @@ def _get_session(token: Optional[str] = None) -> niquests.Session:
     return _session
 
 
-def _https_get(path: str, token: Optional[str] = None) -> dict:
+def _api_request(
+    method: str, path: str, token: Optional[str], **kwargs: object,
+) -> niquests.Response:
+    """Send an API request through the rate limiter, retrying when limited.
+
+    Raises
+    ------
+        RateLimitError: If the limit would take longer than the limiter's
+            max_wait to clear, or is still hit after retrying.
+    """
     session = _get_session(token)
     url = f"https://{_GITHUB_API_HOST}{path}"
-    resp = session.get(url, timeout=15)
+    resource = "graphql" if path == "/graphql" else "core"
+
+    for attempt in range(_MAX_ATTEMPTS):
+        _rate_limiter.acquire(resource)
+        resp = session.request(method, url, **kwargs)
+        _rate_limiter.update(resource, resp.headers)
+
+        delay = _rate_limiter.retry_delay(resp, attempt)
+        if delay is None:
+            return resp
+        if delay > _rate_limiter.max_wait:
+            raise RateLimitError(
+                f"GitHub API rate limited ({resp.status_code}) on {path}; "
+                f"the limit clears in {delay:.0f}s, longer than --max-wait"
+            )
+        print(dim(f"  Rate limited on {path}, retrying in {delay:.0f}s"), file=sys.stderr)
+        _rate_limiter.sleep(delay)
+
+    raise RateLimitError(f"GitHub API still rate limited on {path} after {_MAX_ATTEMPTS} attempts")
+
+
+def _https_get(path: str, token: Optional[str] = None) -> dict:
+    cache = _response_cache
+    entry = cache.get(path) if cache else None
+    if entry and cache.is_fresh(path, entry):
+        cache.hit()
+        return entry["body"]
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+
+    resp = _api_request("GET", path, token, headers=headers, timeout=15)
+
+    if resp.status_code == 304 and entry:
+        cache.touch(path)
+        return entry["body"]
 
     if resp.status_code == 200:
-        return resp.json()
+        data = resp.json()
+        if cache:
+            cache.store(path, resp.headers.get("ETag"), data)
+        return data
 
     raise RuntimeError(f"GitHub API {resp.status_code}: {path}\n{resp.text}")
 
@@ -268,6 +604,9 @@ def resolve_ref_to_sha(
             result = strategy(owner_repo, ref, token)
             if result:
                 return result
+        except RateLimitError:
+            # Not an answer about the ref; trying other endpoints only burns quota
+            raise
         except RuntimeError:
             continue
 
@@ -276,6 +615,282 @@ def resolve_ref_to_sha(
     )
 
 
+# ---------------------------------------------------------------------------
+# GitHub GraphQL API — resolve many refs per request (requires a token)
+# ---------------------------------------------------------------------------
+
+
+def _graphql(query: str, variables: dict, token: str) -> dict:
+    """Run a GraphQL query and return its data, which may be partial."""
+    resp = _api_request(
+        "POST", "/graphql", token,
+        json={"query": query, "variables": variables}, timeout=30,
+    )
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"GitHub GraphQL {resp.status_code}\n{resp.text}")
+    payload = resp.json()
+    if any(e.get("type") == "RATE_LIMITED" for e in payload.get("errors") or []):
+        raise RateLimitError("GitHub GraphQL rate limit exceeded")
+    if not payload.get("data"):
+        raise RuntimeError(f"GitHub GraphQL error: {payload.get('errors')}")
+    return payload["data"]
+
+
+def _build_graphql_query(
+    keys: list[tuple[str, str]],
+) -> tuple[str, dict[str, str], dict[str, str]]:
+    """Build one aliased query looking up each ref as a tag and as a branch.
+
+    Values are passed as variables, so ref names need no escaping. Ref i
+    is aliased t<i> (tag) and h<i> (branch) inside its repository's alias.
+
+    Returns
+    -------
+        The query, its variables, and the alias of each owner/repo.
+    """
+    by_repo: dict[str, list[int]] = {}
+    for i, (owner_repo, _ref) in enumerate(keys):
+        by_repo.setdefault(owner_repo, []).append(i)
+
+    var_defs: list[str] = []
+    fields: list[str] = []
+    variables: dict[str, str] = {}
+    aliases: dict[str, str] = {}
+    for r, (owner_repo, indexes) in enumerate(by_repo.items()):
+        aliases[owner_repo] = f"r{r}"
+        owner, name = owner_repo.split("/", 1)
+        variables[f"o{r}"], variables[f"n{r}"] = owner, name
+        var_defs += [f"$o{r}: String!", f"$n{r}: String!"]
+        refs = []
+        for i in indexes:
+            ref = keys[i][1]
+            variables[f"t{i}"], variables[f"h{i}"] = f"refs/tags/{ref}", f"refs/heads/{ref}"
+            var_defs += [f"$t{i}: String!", f"$h{i}: String!"]
+            refs.append(
+                f"t{i}: ref(qualifiedName: $t{i}) {{ {_GRAPHQL_TARGET} }} "
+                f"h{i}: ref(qualifiedName: $h{i}) {{ {_GRAPHQL_TARGET} }}"
+            )
+        fields.append(f"r{r}: repository(owner: $o{r}, name: $n{r}) {{ {' '.join(refs)} }}")
+
+    query = f"query({', '.join(var_defs)}) {{ {' '.join(fields)} }}"
+    return query, variables, aliases
+
+
+def _peeled_commit(ref_node: Optional[dict]) -> Optional[str]:
+    """Return the commit a ref points to, peeling annotated tags."""
+    target = ref_node["target"] if ref_node else None
+    while target and target["__typename"] == "Tag":
+        target = target.get("target")
+    if target and target["__typename"] == "Commit":
+        return target["oid"]
+    return None
+
+
+def _resolve_graphql_batch(
+    keys: list[tuple[str, str]], token: str,
+) -> dict[tuple[str, str], str]:
+    """Resolve one batch of refs with a single query, preferring tags over branches."""
+    query, variables, aliases = _build_graphql_query(keys)
+    data = _graphql(query, variables, token)
+
+    resolved: dict[tuple[str, str], str] = {}
+    for i, key in enumerate(keys):
+        repo = data.get(aliases[key[0]])
+        if not repo:
+            continue
+        sha = _peeled_commit(repo.get(f"t{i}")) or _peeled_commit(repo.get(f"h{i}"))
+        if sha:
+            resolved[key] = sha
+    return resolved
+
+
+def resolve_refs_graphql(
+    keys: list[tuple[str, str]], token: str, executor: ThreadPoolExecutor,
+) -> tuple[dict[tuple[str, str], str], int]:
+    """Resolve refs in batches of aliased GraphQL queries.
+
+    Refs a batch could not resolve, and every ref of a batch whose query
+    failed, are left out so the caller can fall back to the REST chain.
+
+    Returns
+    -------
+        The resolved SHAs by key, and the number of queries sent.
+    """
+    batches = [
+        keys[i:i + _GRAPHQL_BATCH_SIZE] for i in range(0, len(keys), _GRAPHQL_BATCH_SIZE)
+    ]
+    resolved: dict[tuple[str, str], str] = {}
+    futures = [executor.submit(_resolve_graphql_batch, batch, token) for batch in batches]
+    for future in futures:
+        try:
+            resolved.update(future.result())
+        except RuntimeError as e:
+            print(yellow(f"  GraphQL batch failed, falling back to REST: {e}"))
+    return resolved, len(batches)
+
+
+# ---------------------------------------------------------------------------
+# Transitive crawl — composite actions and reusable workflows
+# ---------------------------------------------------------------------------
+
+
+def _node_id(ref: ActionRef) -> str:
+    """Return the graph node for a reference, e.g. "actions/checkout@v6"."""
+    return f"{ref.action}@{ref.ref}"
+
+
+@dataclass
+class DependencyGraph:
+    """Deduplicated graph of action references, keyed by "action@ref".
+
+    Roots are the references in the workflow files (depth 0); every other
+    node was found inside an action's action.yml or a reusable workflow.
+    """
+
+    refs: dict[str, ActionRef] = field(default_factory=dict)
+    depth: dict[str, int] = field(default_factory=dict)
+    parent: dict[str, Optional[str]] = field(default_factory=dict)
+    edges: dict[str, list[str]] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    def add(self, ref: ActionRef, parent: Optional[str]) -> Optional[str]:
+        """Add an edge to ref, returning its node if it was not seen before."""
+        node = _node_id(ref)
+        if parent is not None and node not in self.edges[parent]:
+            self.edges[parent].append(node)
+        if node in self.refs:
+            return None
+        self.refs[node] = ref
+        self.depth[node] = 0 if parent is None else self.depth[parent] + 1
+        self.parent[node] = parent
+        self.edges[node] = []
+        return node
+
+    @property
+    def transitive(self) -> list[ActionRef]:
+        """Return references found below the workflow files."""
+        return [ref for node, ref in self.refs.items() if self.depth[node] > 0]
+
+    @property
+    def transitive_mutable(self) -> list[ActionRef]:
+        """Return nested references that are not SHA-pinned."""
+        return [ref for ref in self.transitive if ref.risk != RISK_PINNED]
+
+    def chain(self, node: str) -> list[str]:
+        """Return the nodes leading from a workflow reference to node."""
+        path = [node]
+        while self.parent[path[-1]] is not None:
+            path.append(self.parent[path[-1]])
+        return path[::-1]
+
+
+def _fetch_file(owner_repo: str, path: str, sha: str, token: Optional[str]) -> Optional[str]:
+    """Return a file's text at a commit, or None if it does not exist."""
+    try:
+        data = _https_get(_build_api_path(owner_repo, f"contents/{path}?ref={sha}"), token)
+    except RateLimitError:
+        raise
+    except RuntimeError:
+        return None
+    if not isinstance(data, dict) or data.get("encoding") != "base64":
+        return None
+    return base64.b64decode(data["content"]).decode("utf-8", "replace")
+
+
+def _fetch_definition(ref: ActionRef, sha: str, token: Optional[str]) -> Optional[tuple[str, str]]:
+    """Return (path, text) of the reusable workflow or action.yml a ref runs.
+
+    Returns None if neither action.yml nor action.yaml exists at the SHA.
+    """
+    sub_path = ref.action.split("/", 2)[2] if ref.action.count("/") >= 2 else ""
+    if sub_path.startswith(".github/workflows/"):
+        candidates = [sub_path]
+    else:
+        candidates = [f"{sub_path}/{name}" if sub_path else name for name in _ACTION_FILES]
+
+    for path in candidates:
+        text = _fetch_file(ref.owner_repo, path, sha, token)
+        if text is not None:
+            return path, text
+    return None
+
+
+def crawl_dependencies(
+    roots: list[ActionRef], token: Optional[str], jobs: int = _DEFAULT_JOBS,
+) -> DependencyGraph:
+    """Follow references into the actions and reusable workflows they run.
+
+    Each distinct action@ref is resolved to a SHA and its definition is
+    fetched at that SHA and scanned with USES_PATTERN. The crawl runs
+    breadth first, one level at a time, with up to `jobs` requests in
+    parallel; mutable refs of a level are resolved in GraphQL batches
+    when a token is available. File contents are cached by SHA.
+    """
+    graph = DependencyGraph()
+    frontier = [node for ref in roots if (node := graph.add(ref, None))]
+    shas: dict[tuple[str, str], str] = {}
+    # One lock per (owner_repo, ref), so sibling sub-actions of the same
+    # repository and ref wait for a single resolution instead of each sending one
+    key_locks: dict[tuple[str, str], threading.Lock] = {}
+    key_locks_guard = threading.Lock()
+    _get_session(token, pool_size=jobs)
+
+    def sha_for(ref: ActionRef) -> str:
+        if ref.risk == RISK_PINNED:
+            return ref.ref
+        key = (ref.owner_repo, ref.ref)
+        with key_locks_guard:
+            lock = key_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in shas:
+                shas[key] = resolve_ref_to_sha(ref.owner_repo, ref.ref, token)
+            return shas[key]
+
+    def expand(node: str) -> tuple[list[ActionRef], Optional[str]]:
+        ref = graph.refs[node]
+        try:
+            sha = sha_for(ref)
+            ref.resolved_sha = sha
+            definition = _fetch_definition(ref, sha, token)
+        except RateLimitError:
+            raise
+        except RuntimeError as e:
+            return [], f"{node}: {e}"
+        if definition is None:
+            return [], None
+        path, text = definition
+        return scan_lines(text.splitlines(), Path(ref.owner_repo) / path), None
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while frontier:
+            depth = graph.depth[frontier[0]]
+            print(dim(f"  Crawling {len(frontier)} action(s) at depth {depth}..."))
+
+            if token:
+                pending = list(dict.fromkeys(
+                    (graph.refs[n].owner_repo, graph.refs[n].ref) for n in frontier
+                    if graph.refs[n].risk != RISK_PINNED
+                    and (graph.refs[n].owner_repo, graph.refs[n].ref) not in shas
+                ))
+                if pending:
+                    batched, _queries = resolve_refs_graphql(pending, token, executor)
+                    shas.update(batched)
+
+            next_frontier: list[str] = []
+            # map() keeps frontier order, so the graph is the same on every run
+            for node, (children, error) in zip(frontier, executor.map(expand, frontier)):
+                if error:
+                    graph.errors.append(error)
+                for child in children:
+                    new_node = graph.add(child, node)
+                    if new_node and depth + 1 < _MAX_CRAWL_DEPTH:
+                        next_frontier.append(new_node)
+            frontier = next_frontier
+
+    return graph
+
+
 # ---------------------------------------------------------------------------
 # Audit report
 # ---------------------------------------------------------------------------
@@ -370,35 +985,110 @@ def _print_ref(ref: ActionRef, color_fn: Callable[[str], str]) -> None:
     )
 
 
+def print_transitive(graph: DependencyGraph) -> None:
+    """Print the mutable refs found inside actions and reusable workflows."""
+    nested = graph.transitive
+    mutable = graph.transitive_mutable
+    print(bold("── Transitive Dependencies ─────────────────────────────"))
+    print(
+        f"  Crawled {bold(str(len(graph.refs)))} distinct action(s), "
+        f"{bold(str(len(nested)))} found inside other actions or workflows."
+    )
+    print()
+
+    for node, ref in graph.refs.items():
+        if graph.depth[node] == 0 or ref.risk == RISK_PINNED:
+            continue
+        color_fn = red if ref.risk == RISK_BRANCH else yellow
+        print(f"  {color_fn(f'[{ref.risk}] {node}')}")
+        root = graph.refs[graph.chain(node)[0]]
+        via = " → ".join([f"{root.file.name}:{root.line_number}", *graph.chain(node)[:-1]])
+        print(f"  {dim(f'    via {via}')}")
+        print(f"  {dim(f'    at {ref.file}:{ref.line_number}')}")
+    if mutable:
+        print()
+        print(
+            f"  {red(str(len(mutable)))} nested reference(s) are mutable. They can "
+            "only be fixed upstream or by replacing the action that uses them."
+        )
+    elif nested:
+        print(green("  ✅ All nested action references are SHA-pinned."))
+    print()
+
+    if graph.errors:
+        print(f"{red(bold('Errors:'))}")
+        for err in graph.errors:
+            print(f"  {err}")
+        print()
+
+    if _response_cache:
+        _response_cache.save()
+        print(dim(f"  API responses: {_response_cache.summary()}"))
+    budget = _rate_limiter.summary()
+    if budget:
+        print(dim(f"  API budget: {budget}"))
+    print()
+
+
 # ---------------------------------------------------------------------------
 # Pin (rewrite files)
 # ---------------------------------------------------------------------------
 
 
 def _resolve_shas(
-    mutable: list[ActionRef], token: Optional[str],
+    mutable: list[ActionRef],
+    token: Optional[str],
+    jobs: int = _DEFAULT_JOBS,
+    use_graphql: bool = False,
 ) -> tuple[dict[tuple[str, str], str], list[str]]:
+    """Resolve each distinct (owner_repo, ref) once, up to `jobs` at a time.
+
+    With use_graphql (and a token), refs are first resolved in batched
+    GraphQL queries; only refs those could not resolve go through the
+    REST chain. Progress is printed in reference order as results become
+    available, so the output is the same on every run regardless of which
+    request finishes first.
+    """
     cache: dict[tuple[str, str], str] = {}
     errors: list[str] = []
     total = len(mutable)
 
     print(bold(f"\nResolving {total} mutable references...\n"))
 
-    for i, ref in enumerate(mutable, 1):
-        key = (ref.owner_repo, ref.ref)
-        if key in cache:
-            ref.resolved_sha = cache[key]
-            print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {dim('(cached)')}")
-            continue
+    keys = list(dict.fromkeys((ref.owner_repo, ref.ref) for ref in mutable))
+    _get_session(token, pool_size=jobs)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(keys)))) as executor:
+        batched: dict[tuple[str, str], str] = {}
+        if use_graphql and token:
+            batched, queries = resolve_refs_graphql(keys, token, executor)
+            print(dim(
+                f"  GraphQL resolved {len(batched)}/{len(keys)} refs in {queries} "
+                f"quer{'y' if queries == 1 else 'ies'}; "
+                f"{len(keys) - len(batched)} left for the REST API\n"
+            ))
+
+        futures = {
+            key: executor.submit(resolve_ref_to_sha, key[0], key[1], token)
+            for key in keys
+            if key not in batched
+        }
 
-        try:
-            sha = resolve_ref_to_sha(ref.owner_repo, ref.ref, token)
-            ref.resolved_sha = sha
-            cache[key] = sha
-            print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {green(sha[:12])}")
-        except RuntimeError as e:
-            errors.append(f"  {red('✗')} {ref.action}@{ref.ref}: {e}")
-            print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {red('FAILED')}")
+        for i, ref in enumerate(mutable, 1):
+            key = (ref.owner_repo, ref.ref)
+            if key in cache:
+                ref.resolved_sha = cache[key]
+                print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {dim('(cached)')}")
+                continue
+
+            try:
+                sha = batched[key] if key in batched else futures[key].result()
+                ref.resolved_sha = sha
+                cache[key] = sha
+                print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {green(sha[:12])}")
+            except RuntimeError as e:
+                errors.append(f"  {red('✗')} {ref.action}@{ref.ref}: {e}")
+                print(f"  [{i}/{total}] {ref.action}@{ref.ref} → {red('FAILED')}")
 
     return cache, errors
 
@@ -445,7 +1135,13 @@ def _rewrite_file(
     return pinned_count
 
 
-def pin_workflows(result: AuditResult, dry_run: bool = False) -> int:
+def pin_workflows(
+    result: AuditResult,
+    dry_run: bool = False,
+    jobs: int = _DEFAULT_JOBS,
+    resolver: str = "auto",
+    max_wait: float = _DEFAULT_MAX_WAIT,
+) -> int:
     mutable = result.mutable
     if not mutable:
         print(green("✅ All action references are already SHA-pinned. Nothing to do."))
@@ -456,7 +1152,20 @@ def pin_workflows(result: AuditResult, dry_run: bool = False) -> int:
         print(yellow("Tip: Set GITHUB_TOKEN to raise the API rate limit from 60/hr to 5000/hr."))
         print()
 
-    _cache, errors = _resolve_shas(mutable, token)
+    _rate_limiter.max_wait = max_wait
+    use_graphql = resolver == "graphql" or (resolver == "auto" and bool(token))
+    if use_graphql and not token:
+        print(yellow("The GraphQL resolver needs GITHUB_TOKEN; using the REST API."))
+        use_graphql = False
+
+    _cache, errors = _resolve_shas(mutable, token, jobs, use_graphql)
+
+    if _response_cache:
+        _response_cache.save()
+        print(dim(f"\n  API responses: {_response_cache.summary()}"))
+    budget = _rate_limiter.summary()
+    if budget:
+        print(dim(f"  API budget: {budget}"))
 
     if errors:
         print(f"\n{red(bold('Errors:'))}")
@@ -525,6 +1234,46 @@ def verify_workflows(result: AuditResult) -> int:
     return 0
 
 
+# ---------------------------------------------------------------------------
+# Cache maintenance
+# ---------------------------------------------------------------------------
+
+
+def _format_age(seconds: float) -> str:
+    """Format an age in seconds as a short human-readable string."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.0f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def inspect_cache(cache: ResponseCache) -> None:
+    """Print every cached response with its age and freshness."""
+    entries = cache.items()
+    size = cache.path.stat().st_size if cache.path.exists() else 0
+    print(bold(f"Cache: {cache.path}"))
+    print(f"  {len(entries)} entries, {size / 1024:.1f} KB\n")
+
+    now = time.time()
+    for api_path, entry in entries:
+        if _cache_ttl(api_path) is None:
+            state = green("permanent")
+        elif cache.is_fresh(api_path, entry, now):
+            state = green("fresh    ")
+        else:
+            state = yellow("stale    ")
+        age = _format_age(now - entry["stored"])
+        etag = "" if entry.get("etag") else dim("  (no etag)")
+        print(f"  {state}  {dim(f'{age:>4} ago')}  {api_path}{etag}")
+
+
+def purge_cache(cache: ResponseCache, expired_only: bool, repo: Optional[str]) -> None:
+    """Remove cached responses and report how many were dropped."""
+    removed = cache.purge(expired_only=expired_only, repo=repo)
+    cache.save()
+    print(f"Removed {removed} cached response(s) from {cache.path}")
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -544,6 +1293,23 @@ def main() -> None:
     p_audit.add_argument(
         "--dir", default=_DEFAULT_WORKFLOW_DIR, help=_WORKFLOW_DIR_HELP,
     )
+    p_audit.add_argument(
+        "--transitive", action="store_true",
+        help="Also crawl composite actions and reusable workflows for nested refs",
+    )
+    p_audit.add_argument(
+        "--jobs", type=int, default=_DEFAULT_JOBS,
+        help=f"Actions to fetch in parallel with --transitive (default {_DEFAULT_JOBS})",
+    )
+    p_audit.add_argument(
+        "--no-cache", action="store_true",
+        help="Ignore the on-disk API response cache",
+    )
+    p_audit.add_argument(
+        "--max-wait", type=float, default=_DEFAULT_MAX_WAIT, metavar="SECONDS",
+        help="Longest wait for a rate limit to reset before giving up "
+        f"(default {_DEFAULT_MAX_WAIT})",
+    )
 
     # pin
     p_pin = sub.add_parser("pin", help="Rewrite workflow files with SHA-pinned refs")
@@ -553,6 +1319,24 @@ def main() -> None:
     p_pin.add_argument(
         "--dry-run", action="store_true", help="Show changes without writing files"
     )
+    p_pin.add_argument(
+        "--jobs", type=int, default=_DEFAULT_JOBS,
+        help=f"Refs to resolve in parallel (default {_DEFAULT_JOBS})",
+    )
+    p_pin.add_argument(
+        "--no-cache", action="store_true",
+        help="Ignore the on-disk API response cache",
+    )
+    p_pin.add_argument(
+        "--resolver", choices=RESOLVERS, default="auto",
+        help="Resolve refs with batched GraphQL queries, the REST API, or "
+        "GraphQL when GITHUB_TOKEN is set (default)",
+    )
+    p_pin.add_argument(
+        "--max-wait", type=float, default=_DEFAULT_MAX_WAIT, metavar="SECONDS",
+        help="Longest wait for a rate limit to reset before giving up "
+        f"(default {_DEFAULT_MAX_WAIT})",
+    )
 
     # verify
     p_verify = sub.add_parser(
@@ -562,19 +1346,64 @@ def main() -> None:
         "--dir", default=_DEFAULT_WORKFLOW_DIR, help=_WORKFLOW_DIR_HELP,
     )
 
+    # cache
+    p_cache = sub.add_parser("cache", help="Inspect or purge the API response cache")
+    cache_sub = p_cache.add_subparsers(dest="cache_command", required=True)
+    cache_sub.add_parser("inspect", help="List cached responses and their freshness")
+    p_purge = cache_sub.add_parser("purge", help="Remove cached responses")
+    p_purge.add_argument(
+        "--expired", action="store_true", help="Only remove entries past their TTL"
+    )
+    p_purge.add_argument(
+        "--repo", metavar="OWNER/REPO", help="Only remove entries for this repository"
+    )
+
     args = parser.parse_args()
+
+    if args.command == "cache":
+        cache = ResponseCache(_default_cache_path())
+        if args.cache_command == "inspect":
+            inspect_cache(cache)
+        else:
+            purge_cache(cache, args.expired, args.repo)
+        return
+
     workflow_dir = Path(args.dir)
     result = scan_workflows(workflow_dir)
 
     if args.command == "audit":
         print_audit(result)
-        sys.exit(1 if result.mutable else 0)
+        if not args.transitive:
+            sys.exit(1 if result.mutable else 0)
+        if not args.no_cache:
+            _enable_response_cache()
+        _rate_limiter.max_wait = args.max_wait
+        token = os.environ.get("GITHUB_TOKEN")
+        if not token:
+            print(yellow("Tip: Set GITHUB_TOKEN to raise the API rate limit from 60/hr to 5000/hr."))
+            print()
+        try:
+            graph = crawl_dependencies(result.refs, token, jobs=args.jobs)
+        except RateLimitError as e:
+            # Keep the responses fetched so far for the next attempt
+            if _response_cache:
+                _response_cache.save()
+            print(red(f"Error: {e}"), file=sys.stderr)
+            sys.exit(1)
+        print()
+        print_transitive(graph)
+        sys.exit(1 if result.mutable or graph.transitive_mutable else 0)
 
     elif args.command == "pin":
         print_audit(result)
         if not result.mutable:
             sys.exit(0)
-        pin_workflows(result, dry_run=args.dry_run)
+        if not args.no_cache:
+            _enable_response_cache()
+        pin_workflows(
+            result, dry_run=args.dry_run, jobs=args.jobs, resolver=args.resolver,
+            max_wait=args.max_wait,
+        )
 
     elif args.command == "verify":
         sys.exit(verify_workflows(result))
@@ -0,0 +1,90 @@
+"""Load scripts/pin-actions.py, whose file name is not importable, for the tests."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "pin-actions.py"
+
+_spec = importlib.util.spec_from_file_location("pin_actions", _SCRIPT)
+pin_actions = importlib.util.module_from_spec(_spec)
+# Registered before running it, so its dataclasses can find their module
+sys.modules["pin_actions"] = pin_actions
+_spec.loader.exec_module(pin_actions)
+
+
+class FakeResponse:
+
+    """Just enough of a niquests response for the API helpers."""
+
+    def __init__(self, status_code=200, body=None, headers=None, text=""):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = text
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+
+    """Session that answers requests with handler(method, path, kwargs).
+
+    Every request is recorded as (method, path, kwargs) in ``requests``.
+    """
+
+    def __init__(self, handler):
+        self._handler = handler
+        self.headers = {}
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        path = url.split(pin_actions._GITHUB_API_HOST, 1)[1]
+        self.requests.append((method, path, kwargs))
+        return self._handler(method, path, kwargs)
+
+
+@pytest.fixture
+def pin(monkeypatch):
+    """Return pin-actions with no response cache, session or rate limit state."""
+    monkeypatch.setattr(pin_actions, "_response_cache", None)
+    monkeypatch.setattr(pin_actions, "_rate_limiter", pin_actions.RateLimiter())
+    monkeypatch.setattr(pin_actions, "_session", None)
+    return pin_actions
+
+
+@pytest.fixture
+def fake_session(pin):
+    """Install a FakeSession; call the returned function with a handler."""
+
+    def install(handler):
+        session = FakeSession(handler)
+        pin._session = session
+        return session
+
+    return install
+
+
+@pytest.fixture
+def make_ref(pin):
+    """Return a factory for ActionRefs as scan_lines creates them for ``uses: action@ref``."""
+
+    def make(action, ref, line_number=1):
+        return pin.ActionRef(
+            file=Path("ci.yml"),
+            line_number=line_number,
+            line_text=f"      - uses: {action}@{ref}",
+            action=action,
+            ref=ref,
+        )
+
+    return make
+
+
+@pytest.fixture
+def response():
+    """Return the FakeResponse factory for session handlers."""
+    return FakeResponse
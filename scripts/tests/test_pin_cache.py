@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+TAG_OBJECT = f"/repos/actions/checkout/git/tags/{SHA}"
+CONTENT_AT_SHA = f"/repos/actions/checkout/contents/action.yml?ref={SHA}"
+BRANCH = "/repos/actions/checkout/branches/main"
+MATCHING_REFS = "/repos/actions/checkout/git/matching-refs/tags/v6"
+
+
+@pytest.fixture
+def cache(pin, tmp_path):
+    return pin._enable_response_cache(tmp_path / "responses.json")
+
+
+def _age(cache, api_path, seconds):
+    cache.get(api_path)["stored"] -= seconds
+
+
+@pytest.mark.parametrize(
+    ("api_path", "ttl"),
+    [
+        (TAG_OBJECT, None),
+        (CONTENT_AT_SHA, None),
+        ("/repos/actions/checkout/contents/action.yml?ref=main", 3600),
+        (BRANCH, 300),
+        (MATCHING_REFS, 3600),
+        ("/repos/actions/checkout/git/ref/tags/v6", 3600),
+    ],
+)
+def test_ttl_depends_on_how_mutable_the_ref_is(pin, api_path, ttl):
+    assert pin._cache_ttl(api_path) == ttl
+
+
+def test_freshness_follows_the_ttl(pin):
+    entry = {"etag": None, "stored": 1000.0, "body": {}}
+    assert pin.ResponseCache.is_fresh(BRANCH, entry, now=1000.0 + 299)
+    assert not pin.ResponseCache.is_fresh(BRANCH, entry, now=1000.0 + 301)
+    assert pin.ResponseCache.is_fresh(MATCHING_REFS, entry, now=1000.0 + 3599)
+    assert not pin.ResponseCache.is_fresh(MATCHING_REFS, entry, now=1000.0 + 3601)
+    assert pin.ResponseCache.is_fresh(TAG_OBJECT, entry, now=1000.0 + 10 ** 9)
+
+
+def test_fresh_entry_is_served_without_a_request(pin, cache, fake_session):
+    session = fake_session(lambda method, path, kwargs: pytest.fail("unexpected request"))
+    cache.store(BRANCH, '"etag-1"', {"commit": {"sha": SHA}})
+
+    assert pin._https_get(BRANCH) == {"commit": {"sha": SHA}}
+    assert session.requests == []
+    assert cache.fresh_hits == 1
+
+
+def test_expired_entry_is_revalidated_with_its_etag(pin, cache, fake_session, response):
+    session = fake_session(lambda method, path, kwargs: response(304))
+    cache.store(BRANCH, '"etag-1"', {"commit": {"sha": SHA}})
+    _age(cache, BRANCH, 301)
+
+    assert pin._https_get(BRANCH) == {"commit": {"sha": SHA}}
+    (_method, _path, kwargs), = session.requests
+    assert kwargs["headers"] == {"If-None-Match": '"etag-1"'}
+    assert cache.revalidated == 1 and cache.fetched == 1
+    # The 304 restarted the TTL
+    assert cache.is_fresh(BRANCH, cache.get(BRANCH))
+
+
+def test_changed_response_replaces_the_entry(pin, cache, fake_session, response):
+    new_sha = "f" * 40
+    fake_session(lambda method, path, kwargs: response(
+        200, {"commit": {"sha": new_sha}}, headers={"ETag": '"etag-2"'},
+    ))
+    cache.store(BRANCH, '"etag-1"', {"commit": {"sha": SHA}})
+    _age(cache, BRANCH, 301)
+
+    assert pin._https_get(BRANCH) == {"commit": {"sha": new_sha}}
+    assert cache.get(BRANCH)["etag"] == '"etag-2"'
+    assert cache.fetched == 2 and cache.revalidated == 0
+
+
+def test_error_response_is_raised_and_not_cached(pin, cache, fake_session, response):
+    fake_session(lambda method, path, kwargs: response(404, text="Not Found"))
+
+    with pytest.raises(RuntimeError, match="GitHub API 404"):
+        pin._https_get(BRANCH)
+    assert cache.get(BRANCH) is None
+
+
+def test_purge_all_expired_or_one_repo(pin, cache):
+    other_branch = "/repos/actions/cache/branches/main"
+    for api_path in (TAG_OBJECT, BRANCH, MATCHING_REFS, other_branch):
+        cache.store(api_path, None, {})
+    _age(cache, BRANCH, 301)
+    _age(cache, TAG_OBJECT, 10 ** 6)
+
+    assert cache.purge(expired_only=True) == 1
+    assert [api_path for api_path, _entry in cache.items()] == sorted(
+        [TAG_OBJECT, MATCHING_REFS, other_branch]
+    )
+    assert cache.purge(repo="actions/cache") == 1
+    assert cache.purge() == 2
+    assert cache.items() == []
+
+
+def test_save_round_trips_and_skips_unchanged_caches(pin, cache, tmp_path):
+    path = tmp_path / "responses.json"
+    cache.save()
+    assert not path.exists()
+
+    cache.store(TAG_OBJECT, '"etag-1"', {"object": {"sha": SHA}})
+    cache.save()
+
+    loaded = pin.ResponseCache(path)
+    assert loaded.get(TAG_OBJECT)["body"] == {"object": {"sha": SHA}}
+    assert json.loads(path.read_text())["version"] == 1
+
+
+def test_unknown_cache_version_starts_empty(pin, tmp_path):
+    path = tmp_path / "responses.json"
+    path.write_text(json.dumps({"version": 0, "entries": {BRANCH: {}}}))
+
+    assert pin.ResponseCache(path).items() == []
@@ -0,0 +1,148 @@
+import base64
+import threading
+
+import pytest
+
+SHAS = {
+    ("org/a", "v1"): "a" * 40,
+    ("org/b", "v1"): "b" * 40,
+    ("org/tools", "v2"): "2" * 40,
+    ("actions/checkout", "v6"): "6" * 40,
+    ("org/wf", "main"): "f" * 40,
+}
+PINNED = "9" * 40
+
+
+def _uses(*refs):
+    steps = "".join(f"    - uses: {ref}\n" for ref in refs)
+    return f"runs:\n  using: composite\n  steps:\n{steps}"
+
+
+@pytest.fixture
+def repo(pin, fake_session, response, monkeypatch):
+    """Serve files[(owner_repo, path)] at the SHA of the repo's ref and count resolutions."""
+    files = {}
+    resolved = []
+    lock = threading.Lock()
+    by_sha = {sha: owner_repo for (owner_repo, _ref), sha in SHAS.items()}
+    by_sha[PINNED] = "org/pinned"
+
+    def resolve(owner_repo, ref, token):
+        with lock:
+            resolved.append((owner_repo, ref))
+        try:
+            return SHAS[(owner_repo, ref)]
+        except KeyError:
+            raise RuntimeError(f"Could not resolve {owner_repo}@{ref}") from None
+
+    def handle(method, path, kwargs):
+        prefix, _, sha = path.partition("?ref=")
+        _, _, owner, name, _, file_path = prefix.split("/", 5)
+        owner_repo = f"{owner}/{name}"
+        text = files.get((owner_repo, file_path))
+        if text is None or by_sha.get(sha) != owner_repo:
+            return response(404, text="Not Found")
+        content = base64.b64encode(text.encode()).decode()
+        return response(200, {"encoding": "base64", "content": content})
+
+    monkeypatch.setattr(pin, "resolve_ref_to_sha", resolve)
+    fake_session(handle)
+    return files, resolved
+
+
+def test_graph_dedupes_nodes_and_records_every_edge(pin, make_ref):
+    graph = pin.DependencyGraph()
+    root = graph.add(make_ref("org/a", "v1"), None)
+    other = graph.add(make_ref("org/b", "v1"), None)
+    child = graph.add(make_ref("actions/checkout", "v6"), root)
+
+    assert graph.add(make_ref("actions/checkout", "v6"), other) is None
+    assert graph.add(make_ref("org/a", "v1"), child) is None
+    assert graph.edges == {
+        "org/a@v1": ["actions/checkout@v6"],
+        "org/b@v1": ["actions/checkout@v6"],
+        "actions/checkout@v6": ["org/a@v1"],
+    }
+    # The first path to a node is the one reported
+    assert graph.chain(child) == ["org/a@v1", "actions/checkout@v6"]
+    assert graph.depth == {"org/a@v1": 0, "org/b@v1": 0, "actions/checkout@v6": 1}
+
+
+def test_transitive_refs_exclude_roots_and_pinned(pin, make_ref):
+    graph = pin.DependencyGraph()
+    root = graph.add(make_ref("org/a", "v1"), None)
+    graph.add(make_ref("actions/checkout", "v6"), root)
+    graph.add(make_ref("org/pinned", PINNED), root)
+
+    assert [ref.action for ref in graph.transitive] == ["actions/checkout", "org/pinned"]
+    assert [ref.action for ref in graph.transitive_mutable] == ["actions/checkout"]
+
+
+def test_crawl_stops_at_cycles(pin, make_ref, repo):
+    files, resolved = repo
+    files[("org/a", "action.yml")] = _uses("org/b@v1")
+    files[("org/b", "action.yml")] = _uses("org/a@v1")
+
+    graph = pin.crawl_dependencies([make_ref("org/a", "v1")], token=None, jobs=2)
+
+    assert list(graph.refs) == ["org/a@v1", "org/b@v1"]
+    assert graph.edges == {"org/a@v1": ["org/b@v1"], "org/b@v1": ["org/a@v1"]}
+    assert graph.chain("org/b@v1") == ["org/a@v1", "org/b@v1"]
+    assert sorted(resolved) == [("org/a", "v1"), ("org/b", "v1")]
+    assert graph.errors == []
+
+
+def test_crawl_resolves_shared_repo_refs_once(pin, make_ref, repo):
+    files, resolved = repo
+    files[("org/tools", "lint/action.yml")] = _uses("actions/checkout@v6", f"org/pinned@{PINNED}")
+    files[("org/tools", "test/action.yml")] = _uses("actions/checkout@v6")
+    # Only action.yaml exists, so the action.yml lookup falls through
+    files[("actions/checkout", "action.yaml")] = _uses("org/wf/.github/workflows/build.yml@main")
+    files[("org/wf", ".github/workflows/build.yml")] = "jobs:\n  build:\n    steps: []\n"
+    roots = [
+        make_ref("org/tools/lint", "v2", 1),
+        make_ref("org/tools/test", "v2", 2),
+        make_ref("org/tools/lint", "v2", 3),
+    ]
+
+    graph = pin.crawl_dependencies(roots, token=None, jobs=4)
+
+    assert sorted(resolved) == [
+        ("actions/checkout", "v6"), ("org/tools", "v2"), ("org/wf", "main"),
+    ]
+    assert list(graph.refs) == [
+        "org/tools/lint@v2",
+        "org/tools/test@v2",
+        "actions/checkout@v6",
+        f"org/pinned@{PINNED}",
+        "org/wf/.github/workflows/build.yml@main",
+    ]
+    assert graph.edges["org/tools/test@v2"] == ["actions/checkout@v6"]
+    assert graph.chain("org/wf/.github/workflows/build.yml@main") == [
+        "org/tools/lint@v2", "actions/checkout@v6", "org/wf/.github/workflows/build.yml@main",
+    ]
+    assert graph.refs["actions/checkout@v6"].resolved_sha == SHAS[("actions/checkout", "v6")]
+    assert graph.refs[f"org/pinned@{PINNED}"].resolved_sha == PINNED
+    assert graph.errors == []
+
+
+def test_crawl_records_unresolvable_refs(pin, make_ref, repo):
+    files, _resolved = repo
+    files[("org/a", "action.yml")] = _uses("org/missing@v1")
+
+    graph = pin.crawl_dependencies([make_ref("org/a", "v1")], token=None, jobs=2)
+
+    assert list(graph.refs) == ["org/a@v1", "org/missing@v1"]
+    assert graph.errors == ["org/missing@v1: Could not resolve org/missing@v1"]
+
+
+def test_crawl_stops_at_max_depth(pin, make_ref, repo, monkeypatch):
+    files, resolved = repo
+    monkeypatch.setattr(pin, "_MAX_CRAWL_DEPTH", 1)
+    files[("org/a", "action.yml")] = _uses("org/b@v1")
+    files[("org/b", "action.yml")] = _uses("actions/checkout@v6")
+
+    graph = pin.crawl_dependencies([make_ref("org/a", "v1")], token=None, jobs=2)
+
+    assert list(graph.refs) == ["org/a@v1", "org/b@v1"]
+    assert resolved == [("org/a", "v1")]
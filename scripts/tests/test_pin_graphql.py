@@ -0,0 +1,124 @@
+import pytest
+
+COMMIT = "c" * 40
+TAG_OBJECT = "7" * 40
+
+
+def _commit(oid=COMMIT):
+    return {"__typename": "Commit", "oid": oid}
+
+
+def _tag(target):
+    return {"__typename": "Tag", "target": target}
+
+
+def test_query_groups_refs_by_repository(pin):
+    keys = [
+        ("actions/checkout", "v6"),
+        ("github/codeql-action", "v3"),
+        ("actions/checkout", "main"),
+    ]
+
+    query, variables, aliases = pin._build_graphql_query(keys)
+
+    assert aliases == {"actions/checkout": "r0", "github/codeql-action": "r1"}
+    assert variables == {
+        "o0": "actions", "n0": "checkout",
+        "t0": "refs/tags/v6", "h0": "refs/heads/v6",
+        "t2": "refs/tags/main", "h2": "refs/heads/main",
+        "o1": "github", "n1": "codeql-action",
+        "t1": "refs/tags/v3", "h1": "refs/heads/v3",
+    }
+    assert query.count("repository(") == 2
+    assert "r0: repository(owner: $o0, name: $n0)" in query
+    assert "t2: ref(qualifiedName: $t2)" in query
+    assert "h1: ref(qualifiedName: $h1)" in query
+    assert "$t2: String!" in query
+
+
+def test_ref_names_are_passed_as_variables(pin):
+    query, variables, _aliases = pin._build_graphql_query([("o/r", 'v1"}) { evil')])
+
+    assert "evil" not in query
+    assert variables["t0"] == 'refs/tags/v1"}) { evil'
+
+
+@pytest.mark.parametrize(
+    ("node", "expected"),
+    [
+        (None, None),
+        ({"target": _commit()}, COMMIT),
+        ({"target": _tag(_commit())}, COMMIT),
+        ({"target": _tag(_tag(_commit()))}, COMMIT),
+        ({"target": _tag({"__typename": "Tree"})}, None),
+        ({"target": _tag(None)}, None),
+    ],
+    ids=["missing", "lightweight", "annotated", "nested", "non-commit", "unpeeled"],
+)
+def test_peeled_commit(pin, node, expected):
+    assert pin._peeled_commit(node) == expected
+
+
+def test_batch_prefers_tags_over_branches(pin, monkeypatch):
+    branch_sha = "b" * 40
+    data = {"r0": {
+        "t0": {"target": _tag(_commit())}, "h0": {"target": _commit(branch_sha)},
+        "t1": None, "h1": {"target": _commit(branch_sha)},
+        "t2": None, "h2": None,
+    }}
+    monkeypatch.setattr(pin, "_graphql", lambda query, variables, token: data)
+    keys = [("o/r", "v1"), ("o/r", "main"), ("o/r", "nope")]
+
+    assert pin._resolve_graphql_batch(keys, "token") == {
+        ("o/r", "v1"): COMMIT,
+        ("o/r", "main"): branch_sha,
+    }
+
+
+def _rest_handler(response, graphql_reply):
+    """Answer GraphQL with graphql_reply and REST with an annotated tag v6."""
+
+    def handle(method, path, kwargs):
+        if path == "/graphql":
+            return graphql_reply
+        if path == "/repos/actions/checkout/git/matching-refs/tags/v6":
+            return response(200, [{
+                "ref": "refs/tags/v6",
+                "object": {"type": "tag", "sha": TAG_OBJECT},
+            }])
+        if path == f"/repos/actions/checkout/git/tags/{TAG_OBJECT}":
+            return response(200, {"object": {"type": "commit", "sha": COMMIT}})
+        return response(404, text="Not Found")
+
+    return handle
+
+
+def test_rate_limited_batch_falls_back_to_rest(pin, make_ref, fake_session, response, capsys):
+    rate_limited = response(200, {"errors": [{"type": "RATE_LIMITED", "message": "limit"}]})
+    session = fake_session(_rest_handler(response, rate_limited))
+    refs = [make_ref("actions/checkout", "v6")]
+
+    cache, errors = pin._resolve_shas(refs, "token", jobs=2, use_graphql=True)
+
+    assert cache == {("actions/checkout", "v6"): COMMIT}
+    assert errors == []
+    assert [path for _method, path, _kwargs in session.requests] == [
+        "/graphql",
+        "/repos/actions/checkout/git/matching-refs/tags/v6",
+        f"/repos/actions/checkout/git/tags/{TAG_OBJECT}",
+    ]
+    out = capsys.readouterr().out
+    assert "GraphQL batch failed, falling back to REST" in out
+    assert "GraphQL resolved 0/1 refs in 1 query; 1 left for the REST API" in out
+
+
+def test_resolved_batch_skips_rest(pin, make_ref, fake_session, response):
+    reply = response(200, {"data": {"r0": {"t0": {"target": _tag(_commit())}, "h0": None}}})
+    session = fake_session(_rest_handler(response, reply))
+    refs = [make_ref("actions/checkout", "v6")]
+
+    cache, errors = pin._resolve_shas(refs, "token", jobs=2, use_graphql=True)
+
+    assert cache == {("actions/checkout", "v6"): COMMIT}
+    assert errors == []
+    assert [path for _method, path, _kwargs in session.requests] == ["/graphql"]
@@ -0,0 +1,165 @@
+import time
+
+import pytest
+
+NOW = 1_700_000_000.0
+
+
+class FakeClock:
+
+    """Stands in for the time module: sleeping advances the clock."""
+
+    strftime = staticmethod(time.strftime)
+    localtime = staticmethod(time.localtime)
+
+    def __init__(self):
+        self.now = NOW
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(pin, monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(pin, "time", fake)
+    return fake
+
+
+def _limits(remaining, reset, resource=None):
+    headers = {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+    }
+    if resource:
+        headers["X-RateLimit-Resource"] = resource
+    return headers
+
+
+@pytest.mark.parametrize(
+    ("status", "headers", "text", "attempt", "expected"),
+    [
+        (200, {}, "", 0, None),
+        (404, {"X-RateLimit-Remaining": "0"}, "", 0, None),
+        (429, {"Retry-After": "30"}, "", 0, 30.0),
+        (403, {"Retry-After": "12", **_limits(0, NOW + 600)}, "", 0, 12.0),
+        (403, _limits(0, NOW + 120), "", 0, 121.0),
+        (403, _limits(0, NOW - 5), "", 0, 1.0),
+        (403, {"Retry-After": "soon", **_limits(0, NOW + 9)}, "", 0, 10.0),
+        (403, {}, "You have exceeded a secondary rate limit.", 0, 60.0),
+        (403, {}, "You have exceeded a Secondary Rate Limit.", 2, 240.0),
+        (403, _limits(4999, NOW + 60), "Resource not accessible by integration", 0, None),
+    ],
+    ids=[
+        "ok", "not-limited-status", "retry-after", "retry-after-wins", "primary-reset",
+        "reset-passed", "non-numeric-retry-after", "secondary", "secondary-backoff",
+        "forbidden",
+    ],
+)
+def test_retry_delay(pin, clock, response, status, headers, text, attempt, expected):
+    resp = response(status, headers=headers, text=text)
+
+    assert pin.RateLimiter().retry_delay(resp, attempt) == expected
+
+
+def test_acquire_without_a_known_budget_does_not_wait(pin, clock):
+    limiter = pin.RateLimiter()
+    limiter.acquire("core")
+    limiter.update("core", _limits(4000, NOW - 1))
+    limiter.acquire("core")
+
+    assert clock.sleeps == []
+
+
+def test_acquire_reserves_budget_without_pacing_when_plenty_is_left(pin, clock):
+    limiter = pin.RateLimiter()
+    limiter.update("core", _limits(100, NOW + 600))
+
+    limiter.acquire("core")
+    limiter.acquire("core")
+
+    assert clock.sleeps == []
+    assert limiter._budgets["core"].remaining == 98
+
+
+@pytest.mark.parametrize(
+    ("remaining", "reset_in", "delay"),
+    [(10, 5, 0.5), (5, 600, 1.0)],
+    ids=["spread-until-reset", "capped"],
+)
+def test_acquire_paces_a_low_budget(pin, clock, remaining, reset_in, delay):
+    limiter = pin.RateLimiter()
+    limiter.update("core", _limits(remaining, NOW + reset_in))
+
+    limiter.acquire("core")
+
+    assert clock.sleeps == [delay]
+    assert limiter.waited == delay
+
+
+def test_acquire_waits_out_an_exhausted_budget_within_max_wait(pin, clock):
+    limiter = pin.RateLimiter(max_wait=60)
+    limiter.update("core", _limits(0, NOW + 30))
+
+    limiter.acquire("core")
+
+    assert clock.sleeps == [31]
+
+
+def test_acquire_fails_when_the_reset_is_beyond_max_wait(pin, clock):
+    limiter = pin.RateLimiter(max_wait=60)
+    limiter.update("core", _limits(0, NOW + 120))
+
+    with pytest.raises(pin.RateLimitError, match="'core' is exhausted"):
+        limiter.acquire("core")
+    assert clock.sleeps == []
+
+
+def test_budgets_are_tracked_per_resource(pin, clock):
+    limiter = pin.RateLimiter(max_wait=60)
+    limiter.update("core", _limits(0, NOW + 120, resource="graphql"))
+
+    limiter.acquire("core")
+    with pytest.raises(pin.RateLimitError):
+        limiter.acquire("graphql")
+
+
+def test_api_request_retries_after_retry_after(pin, clock, fake_session, response):
+    replies = [response(429, headers={"Retry-After": "5"}), response(200, {"ok": True})]
+    session = fake_session(lambda method, path, kwargs: replies.pop(0))
+
+    resp = pin._api_request("GET", "/repos/o/r/branches/main", None)
+
+    assert resp.status_code == 200
+    assert len(session.requests) == 2
+    assert clock.sleeps == [5.0]
+
+
+def test_api_request_stops_when_the_limit_outlasts_max_wait(pin, clock, fake_session, response):
+    pin._rate_limiter.max_wait = 60
+    session = fake_session(
+        lambda method, path, kwargs: response(403, headers=_limits(0, NOW + 3600))
+    )
+
+    with pytest.raises(pin.RateLimitError, match="longer than --max-wait"):
+        pin._api_request("GET", "/repos/o/r/branches/main", None)
+    assert len(session.requests) == 1
+    assert clock.sleeps == []
+    # The exhausted budget stops the next request before it is sent
+    with pytest.raises(pin.RateLimitError, match="exhausted"):
+        pin._api_request("GET", "/repos/o/r/branches/dev", None)
+    assert len(session.requests) == 1
+
+
+def test_api_request_gives_up_after_max_attempts(pin, clock, fake_session, response):
+    session = fake_session(lambda method, path, kwargs: response(429, headers={"Retry-After": "1"}))
+
+    with pytest.raises(pin.RateLimitError, match="after 3 attempts"):
+        pin._api_request("GET", "/repos/o/r/branches/main", None)
+    assert len(session.requests) == pin._MAX_ATTEMPTS
@@ -0,0 +1,97 @@
+import threading
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+SHA_C = "c" * 40
+
+
+def _progress(out):
+    return [line.strip() for line in out.splitlines() if line.strip().startswith("[")]
+
+
+def test_progress_keeps_reference_order(pin, make_ref, monkeypatch, capsys):
+    shas = {"actions/checkout": SHA_A, "actions/setup-node": SHA_B, "actions/cache": SHA_C}
+    last_done = threading.Event()
+    finished = []
+
+    def resolve(owner_repo, ref, token):
+        if owner_repo == "actions/checkout":
+            # The first reference only finishes after the last one
+            assert last_done.wait(5)
+        finished.append(owner_repo)
+        if owner_repo == "actions/cache":
+            last_done.set()
+        return shas[owner_repo]
+
+    monkeypatch.setattr(pin, "resolve_ref_to_sha", resolve)
+    refs = [
+        make_ref("actions/checkout", "v6", 1),
+        make_ref("actions/setup-node", "v4", 2),
+        make_ref("actions/cache", "v4", 3),
+    ]
+
+    cache, errors = pin._resolve_shas(refs, token=None, jobs=3)
+
+    assert finished[-1] == "actions/checkout"
+    assert errors == []
+    assert cache == {
+        ("actions/checkout", "v6"): SHA_A,
+        ("actions/setup-node", "v4"): SHA_B,
+        ("actions/cache", "v4"): SHA_C,
+    }
+    assert [ref.resolved_sha for ref in refs] == [SHA_A, SHA_B, SHA_C]
+    assert _progress(capsys.readouterr().out) == [
+        f"[1/3] actions/checkout@v6 → {SHA_A[:12]}",
+        f"[2/3] actions/setup-node@v4 → {SHA_B[:12]}",
+        f"[3/3] actions/cache@v4 → {SHA_C[:12]}",
+    ]
+
+
+def test_each_ref_is_resolved_once_and_repeats_are_cached(pin, make_ref, monkeypatch, capsys):
+    calls = []
+    lock = threading.Lock()
+
+    def resolve(owner_repo, ref, token):
+        with lock:
+            calls.append((owner_repo, ref))
+        return SHA_A if ref == "v6" else SHA_B
+
+    monkeypatch.setattr(pin, "resolve_ref_to_sha", resolve)
+    refs = [
+        make_ref("actions/checkout", "v6", 1),
+        make_ref("github/codeql-action/init", "v3", 2),
+        make_ref("actions/checkout", "v6", 3),
+        make_ref("github/codeql-action/analyze", "v3", 4),
+    ]
+
+    cache, errors = pin._resolve_shas(refs, token=None, jobs=4)
+
+    assert sorted(calls) == [("actions/checkout", "v6"), ("github/codeql-action", "v3")]
+    assert len(cache) == 2 and errors == []
+    assert [ref.resolved_sha for ref in refs] == [SHA_A, SHA_B, SHA_A, SHA_B]
+    assert _progress(capsys.readouterr().out) == [
+        f"[1/4] actions/checkout@v6 → {SHA_A[:12]}",
+        f"[2/4] github/codeql-action/init@v3 → {SHA_B[:12]}",
+        "[3/4] actions/checkout@v6 → (cached)",
+        "[4/4] github/codeql-action/analyze@v3 → (cached)",
+    ]
+
+
+def test_failures_are_reported_in_place(pin, make_ref, monkeypatch, capsys):
+    def resolve(owner_repo, ref, token):
+        if ref == "missing":
+            raise RuntimeError(f"Could not resolve {owner_repo}@{ref}")
+        return SHA_A
+
+    monkeypatch.setattr(pin, "resolve_ref_to_sha", resolve)
+    refs = [make_ref("actions/checkout", "missing", 1), make_ref("actions/cache", "v4", 2)]
+
+    cache, errors = pin._resolve_shas(refs, token=None, jobs=2)
+
+    assert cache == {("actions/cache", "v4"): SHA_A}
+    assert len(errors) == 1 and "actions/checkout@missing" in errors[0]
+    assert refs[0].resolved_sha is None
+    assert _progress(capsys.readouterr().out) == [
+        "[1/2] actions/checkout@missing → FAILED",
+        f"[2/2] actions/cache@v4 → {SHA_A[:12]}",
+    ]